@@ -4,6 +4,7 @@ Script de gestión de data (cache y backups)
 """
 
 import sys
+import functools
 from pathlib import Path
 
 # Agregar src al path
@@ -14,9 +15,21 @@ from utils.backup_manager import BackupManager
 import argparse
 
 
+@functools.lru_cache(maxsize=1)
+def _get_cache() -> CacheManager:
+    """Instancia única de CacheManager (carga el índice una sola vez)"""
+    return CacheManager()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_backups() -> BackupManager:
+    """Instancia única de BackupManager"""
+    return BackupManager()
+
+
 def cache_stats():
     """Mostrar estadísticas del cache"""
-    cache = CacheManager()
+    cache = _get_cache()
     stats = cache.get_stats()
     
     print("\n" + "="*60)
@@ -31,42 +44,49 @@ def cache_stats():
 
 def cache_list():
     """Listar contenido del cache"""
-    cache = CacheManager()
+    cache = _get_cache()
     keys = cache.list_keys()
     
-    print("\n" + "="*60)
-    print("📦 CONTENIDO DEL CACHE")
-    print("="*60 + "\n")
+    # Construir el reporte completo y escribirlo de una sola vez
+    parts = [
+        "\n" + "="*60 + "\n",
+        "📦 CONTENIDO DEL CACHE\n",
+        "="*60 + "\n\n"
+    ]
     
     if not keys:
-        print("  (vacío)")
+        parts.append("  (vacío)\n")
     else:
         for key_info in keys:
             status = "❌ Expirado" if key_info['expired'] else "✅ Válido"
-            print(f"  • {key_info['key']}")
-            print(f"    Tamaño: {key_info['size_kb']} KB")
-            print(f"    Estado: {status}")
-            print(f"    Creado: {key_info['created_at']}")
-            print(f"    Expira: {key_info['expires_at']}\n")
+            parts.append(
+                f"  • {key_info['key']}\n"
+                f"    Tamaño: {key_info['size_kb']} KB\n"
+                f"    Estado: {status}\n"
+                f"    Creado: {key_info['created_at']}\n"
+                f"    Expira: {key_info['expires_at']}\n\n"
+            )
+    
+    sys.stdout.write("".join(parts))
 
 
 def cache_clear():
     """Limpiar todo el cache"""
-    cache = CacheManager()
+    cache = _get_cache()
     count = cache.clear()
     print(f"\n✓ {count} archivos eliminados del cache\n")
 
 
 def cache_cleanup():
     """Limpiar entradas expiradas"""
-    cache = CacheManager()
+    cache = _get_cache()
     count = cache.cleanup_expired()
     print(f"\n✓ {count} entradas expiradas eliminadas\n")
 
 
 def backup_create():
     """Crear backup de configuración"""
-    backup_mgr = BackupManager()
+    backup_mgr = _get_backups()
     
     print("\n📦 Creando backup de configuración...")
     backup_path = backup_mgr.backup_config()
@@ -79,34 +99,57 @@ def backup_create():
 
 def backup_list():
     """Listar backups disponibles"""
-    backup_mgr = BackupManager()
+    backup_mgr = _get_backups()
     backups = backup_mgr.list_backups()
     
-    print("\n" + "="*60)
-    print("💾 BACKUPS DISPONIBLES")
-    print("="*60 + "\n")
+    # Construir el reporte completo y escribirlo de una sola vez
+    parts = [
+        "\n" + "="*60 + "\n",
+        "💾 BACKUPS DISPONIBLES\n",
+        "="*60 + "\n\n"
+    ]
     
     if not backups:
-        print("  (ninguno)")
+        parts.append("  (ninguno)\n")
     else:
         for backup in backups:
-            print(f"  • {backup['name']}")
-            print(f"    Tipo: {backup['type']}")
-            print(f"    Tamaño: {backup['size_mb']} MB")
-            print(f"    Creado: {backup['created_at']}")
-            print(f"    Archivos: {len(backup['files'])}\n")
-    
-    print(f"Total: {len(backups)} backups\n")
+            parts.append(
+                f"  • {backup['name']}\n"
+                f"    Tipo: {backup['type']}\n"
+                f"    Tamaño: {backup['size_mb']} MB\n"
+            )
+            if 'physical_mb' in backup:
+                parts.append(f"    Tamaño físico (chunks propios): {backup['physical_mb']} MB\n")
+            parts.append(
+                f"    Creado: {backup['created_at']}\n"
+                f"    Archivos: {len(backup['files'])}\n\n"
+            )
+    
+    parts.append(f"Total: {len(backups)} backups\n\n")
+    sys.stdout.write("".join(parts))
 
 
 def backup_cleanup():
     """Limpiar backups antiguos"""
-    backup_mgr = BackupManager()
+    backup_mgr = _get_backups()
     count = backup_mgr.cleanup_old_backups()
     print(f"\n✓ {count} backups antiguos eliminados\n")
 
 
-def main():
+# Tabla de comandos: (comando, acción) → handler
+HANDLERS = {
+    ('cache', 'stats'): cache_stats,
+    ('cache', 'list'): cache_list,
+    ('cache', 'clear'): cache_clear,
+    ('cache', 'cleanup'): cache_cleanup,
+    ('backup', 'create'): backup_create,
+    ('backup', 'list'): backup_list,
+    ('backup', 'cleanup'): backup_cleanup,
+}
+
+
+def _build_parser():
+    """Construir el parser de argumentos y los sub-parsers por comando"""
     parser = argparse.ArgumentParser(
         description='Gestión de data (cache y backups)'
     )
@@ -130,32 +173,27 @@ def main():
     backup_subparsers.add_parser('list', help='Listar backups')
     backup_subparsers.add_parser('cleanup', help='Limpiar antiguos')
     
-    args = parser.parse_args()
-    
-    if args.command == 'cache':
-        if args.cache_action == 'stats':
-            cache_stats()
-        elif args.cache_action == 'list':
-            cache_list()
-        elif args.cache_action == 'clear':
-            cache_clear()
-        elif args.cache_action == 'cleanup':
-            cache_cleanup()
-        else:
-            cache_parser.print_help()
-    
-    elif args.command == 'backup':
-        if args.backup_action == 'create':
-            backup_create()
-        elif args.backup_action == 'list':
-            backup_list()
-        elif args.backup_action == 'cleanup':
-            backup_cleanup()
-        else:
-            backup_parser.print_help()
+    return parser, {'cache': cache_parser, 'backup': backup_parser}
+
+
+# El parser se construye una sola vez al importar el módulo
+PARSER, COMMAND_PARSERS = _build_parser()
+
+
+def main(argv=None):
+    args = PARSER.parse_args(argv)
+    
+    if args.command is None:
+        PARSER.print_help()
+        return
+    
+    action = getattr(args, f'{args.command}_action', None)
+    handler = HANDLERS.get((args.command, action))
     
+    if handler:
+        handler()
     else:
-        parser.print_help()
+        COMMAND_PARSERS[args.command].print_help()
 
 
 if __name__ == "__main__":
@@ -3,49 +3,64 @@ IT Monitoring Agent - Utilities Module
 Funciones de utilidad compartidas en todo el proyecto
 """
 
-from utils.system_info import (
-    get_os_info,
-    get_hostname,
-    get_platform_info,
-    get_python_version,
-    is_admin,
-    get_uptime
-)
+import importlib
 
-from utils.validators import (
-    validate_ip,
-    validate_email,
-    validate_version,
-    validate_port,
-    validate_url,
-    is_valid_mac_address
-)
+# Carga perezosa (PEP 562): cada submódulo se importa solo cuando se
+# accede por primera vez a uno de sus nombres
+_LAZY = {
+    # system_info
+    'get_os_info': 'utils.system_info',
+    'get_hostname': 'utils.system_info',
+    'get_platform_info': 'utils.system_info',
+    'get_python_version': 'utils.system_info',
+    'is_admin': 'utils.system_info',
+    'get_uptime': 'utils.system_info',
+    
+    # validators
+    'validate_ip': 'utils.validators',
+    'validate_email': 'utils.validators',
+    'validate_version': 'utils.validators',
+    'validate_port': 'utils.validators',
+    'validate_url': 'utils.validators',
+    'is_valid_mac_address': 'utils.validators',
+    
+    # formatters
+    'format_bytes': 'utils.formatters',
+    'format_timestamp': 'utils.formatters',
+    'format_duration': 'utils.formatters',
+    'format_percentage': 'utils.formatters',
+    'truncate_string': 'utils.formatters',
+    'sanitize_filename': 'utils.formatters',
+    
+    # file_utils
+    'ensure_directory': 'utils.file_utils',
+    'safe_read_file': 'utils.file_utils',
+    'safe_write_file': 'utils.file_utils',
+    'compress_file': 'utils.file_utils',
+    'decompress_file': 'utils.file_utils',
+    'get_file_hash': 'utils.file_utils',
+    
+    # network_utils
+    'is_port_open': 'utils.network_utils',
+    'ping_host': 'utils.network_utils',
+    'get_local_ip': 'utils.network_utils',
+    'resolve_hostname': 'utils.network_utils',
+    'check_internet_connection': 'utils.network_utils',
+}
 
-from utils.formatters import (
-    format_bytes,
-    format_timestamp,
-    format_duration,
-    format_percentage,
-    truncate_string,
-    sanitize_filename
-)
 
-from utils.file_utils import (
-    ensure_directory,
-    safe_read_file,
-    safe_write_file,
-    compress_file,
-    decompress_file,
-    get_file_hash
-)
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    module = importlib.import_module(_LAZY[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
 
-from utils.network_utils import (
-    is_port_open,
-    ping_host,
-    get_local_ip,
-    resolve_hostname,
-    check_internet_connection
-)
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 __all__ = [
     # system_info
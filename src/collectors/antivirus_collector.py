@@ -3,46 +3,897 @@ Antivirus Collector - Detección multiplataforma de software antivirus
 Soporta: Windows, macOS, Linux
 """
 
+import contextlib
+import contextvars
+import copy
+import functools
+import hashlib
+import json
+import logging
 import os
 import platform
+import plistlib
+import re
+import stat
 import subprocess
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
+from utils.powershell_host import get_powershell_host
+from utils.system_info import OS_TYPE, which
+from .base_collector import BaseCollector
+
+log = logging.getLogger('ITAgent.AntivirusCollector')
+
+try:
+    import ctypes
+except ImportError:
+    ctypes = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Se usa 'ps aux' como alternativa
+
 # Para Windows
 try:
     import winreg
 except ImportError:
     winreg = None  # No disponible en macOS/Linux
 
+try:
+    import win32api  # pywin32
+except ImportError:
+    win32api = None
+
+try:
+    import pythoncom  # pywin32: COM por hilo para WMI en workers
+except ImportError:
+    pythoncom = None
+
+# Duraciones de la recopilación en curso (ns), una por llamada a collect();
+# BaseCollector.submit propaga el contexto a los workers del pool
+_TIMINGS: 'contextvars.ContextVar[Optional[Dict[str, int]]]' = contextvars.ContextVar(
+    'av_collector_timings', default=None
+)
+
+# WMI solo existe en Windows; se importa una vez y se consulta el flag
+wmi = None
+if OS_TYPE == 'Windows':
+    try:
+        import wmi
+    except ImportError:
+        pass
+_WMI_AVAILABLE = wmi is not None
+
+
+# Bases de datos de paquetes cuya fecha cambia al instalar/desinstalar;
+# rpm usa Berkeley DB (Packages) o sqlite (RHEL 9, Fedora 33+)
+_DPKG_STATUS = '/var/lib/dpkg/status'
+_RPM_DBS = ('/var/lib/rpm/Packages', '/var/lib/rpm/rpmdb.sqlite')
+_LINUX_PACKAGE_DBS = (_DPKG_STATUS,) + _RPM_DBS
+
+# Firmas/definiciones cuya fecha cambia al actualizar el antivirus: una
+# actualización invalida la detección cacheada aunque no cambie el software
+_SIGNATURE_WATCH_PATHS = {
+    'Linux': (
+        '/var/lib/clamav/daily.cvd',
+        '/var/lib/clamav/daily.cld',
+        '/var/log/clamav/freshclam.log',
+    ),
+    'Darwin': (
+        '/System/Library/CoreServices/XProtect.bundle/Contents/Resources/XProtect.meta.plist',
+        '/Library/Application Support/ESET/esets/cache/virusdbs',
+        '/Library/Application Support/com.eset.esets/cache',
+    ),
+}
+
+# Preferencias del firewall de aplicaciones de macOS
+_MACOS_ALF_PLIST = '/Library/Preferences/com.apple.alf.plist'
+_MACOS_ALF_CMD = ['defaults', 'read', '/Library/Preferences/com.apple.alf', 'globalstate']
+
+# Configuración de ufw y pid de firewalld: estado del firewall sin procesos
+_UFW_CONF = '/etc/ufw/ufw.conf'
+_FIREWALLD_PID_FILES = ('/run/firewalld.pid', '/var/run/firewalld.pid')
+
+# Registro de Microsoft Defender: alternativa sin procesos a Get-MpComputerStatus
+_DEFENDER_REG_KEY = r'SOFTWARE\Microsoft\Windows Defender'
+
+# EnableFirewall de cada perfil del Firewall de Windows
+_FIREWALL_PROFILE_KEYS = tuple(
+    r'SYSTEM\CurrentControlSet\Services\SharedAccess\Parameters\FirewallPolicy\%s' % profile
+    for profile in ('DomainProfile', 'StandardProfile', 'PublicProfile')
+)
+
+# Diferencia entre las épocas de FILETIME (1601) y Unix, en intervalos de 100 ns
+_FILETIME_EPOCH_OFFSET = 116444736000000000
+
+# Windows Security Center (wscapi.dll): proveedores y estados de salud
+_WSC_SECURITY_PROVIDER_FIREWALL = 0x1
+_WSC_SECURITY_PROVIDER_ANTIVIRUS = 0x4
+_WSC_SECURITY_PROVIDER_HEALTH_GOOD = 0
+
+# productState de SecurityCenter2: nibble del producto (bits 16-19) y
+# nibble de definiciones (bits 12-15)
+_AV_STATE_ENABLED_MASK = 0x000F0000
+_AV_STATE_OUTDATED_MASK = 0x0000F000
+
+# Estado decodificado: inmutable y sin dict por llamada. Solo hay cuatro
+# combinaciones posibles (más la desconocida), así que se precalculan
+AVState = namedtuple('AVState', 'protection_status real_time_protection definitions_up_to_date')
+
+_AV_STATE_UNKNOWN = AVState('unknown', False, False)
+_AV_STATES = {
+    (enabled, up_to_date): AVState('active' if enabled else 'inactive', enabled, up_to_date)
+    for enabled in (True, False)
+    for up_to_date in (True, False)
+}
+
+
+@dataclass
+class ScanInfo:
+    """Fechas de escaneo/actualización obtenidas de un antivirus de macOS"""
+    last_scan: Optional[str] = None
+    last_update: Optional[str] = None
+    definitions_up_to_date: Optional[bool] = None
+    
+    def __bool__(self) -> bool:
+        """Falso si no se obtuvo ningún dato"""
+        return (
+            self.last_scan is not None
+            or self.last_update is not None
+            or self.definitions_up_to_date is not None
+        )
+
+
+# Patrones insensibles a mayúsculas: evitan copiar la salida con .lower()
+_NETSH_STATE_ON_RE = re.compile(r'State\s+ON', re.IGNORECASE)
+_UFW_STATUS_RE = re.compile(r'Status:\s*(active|inactive)', re.IGNORECASE)
+_FIREWALLD_RUNNING_RE = re.compile(r'\brunning\b', re.IGNORECASE)
+_UFW_ENABLED_RE = re.compile(r'\s*ENABLED\s*=\s*"?(yes|no)"?', re.IGNORECASE)
+_FRESHCLAM_UPDATED_RE = re.compile(r'database updated', re.IGNORECASE)
+# Fecha al inicio de cada línea de freshclam.log: 'Mon Dec 25 12:00:00 2025'
+_FRESHCLAM_DATE_RE = re.compile(r'^(\w{3} \w{3}\s+\d+\s+\d+:\d+:\d+\s+\d{4})')
+
+# Claves del registro con los programas instalados (64 y 32 bits)
+_UNINSTALL_KEYS = (
+    r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall",
+    r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall",
+)
+
+
+# ═══════════════════════════════════════════════════════════
+# TABLAS DE ANTIVIRUS CONOCIDOS
+# Se construyen una sola vez al importar el módulo
+# ═══════════════════════════════════════════════════════════
+
+# Antivirus conocidos para Linux
+# Nombre del proceso/paquete: (Nombre completo, vendor)
+_LINUX_AV_TABLE = {
+    'clamav': ('ClamAV', 'Cisco'),
+    'clamd': ('ClamAV Daemon', 'Cisco'),
+    'freshclam': ('ClamAV Updater', 'Cisco'),
+    'avast': ('Avast for Linux', 'Avast Software'),
+    'avg': ('AVG Antivirus', 'AVG Technologies'),
+    'bitdefender': ('Bitdefender', 'Bitdefender'),
+    'comodo': ('Comodo Antivirus', 'Comodo'),
+    'chkrootkit': ('chkrootkit', 'chkrootkit'),
+    'rkhunter': ('RKHunter', 'RKHunter'),
+    'sophos': ('Sophos Antivirus', 'Sophos'),
+    'eset': ('ESET NOD32', 'ESET'),
+    'esets': ('ESET Server Security', 'ESET'),
+    'fsecure': ('F-Secure', 'F-Secure'),
+    'kaspersky': ('Kaspersky', 'Kaspersky'),
+    'mcafee': ('McAfee', 'McAfee'),
+    'mcafeeespd': ('McAfee', 'McAfee'),
+    'trend': ('Trend Micro', 'Trend Micro'),
+}
+
+# Aplicaciones de antivirus en macOS: bundle → (Nombre completo, vendor)
+_MACOS_AV_TABLE = {
+    'ESET Cyber Security.app': ('ESET Cyber Security', 'ESET'),
+    'ESET Endpoint Antivirus.app': ('ESET Endpoint Antivirus', 'ESET'),
+    'Malwarebytes.app': ('Malwarebytes', 'Malwarebytes'),
+    'Avast Security.app': ('Avast Security', 'Avast Software'),
+    'AVG AntiVirus.app': ('AVG Antivirus', 'AVG Technologies'),
+    'Bitdefender Antivirus.app': ('Bitdefender Antivirus', 'Bitdefender'),
+    'Sophos Home.app': ('Sophos Home', 'Sophos'),
+    'Kaspersky Internet Security.app': ('Kaspersky Internet Security', 'Kaspersky'),
+    'Norton 360.app': ('Norton 360', 'NortonLifeLock'),
+    'F-Secure SAFE.app': ('F-Secure', 'F-Secure'),
+    'Intego Mac Internet Security.app': ('Intego VirusBarrier', 'Intego'),
+    'VirusBarrier X9.app': ('Intego VirusBarrier', 'Intego'),
+    'Webroot SecureAnywhere.app': ('Webroot SecureAnywhere', 'Webroot'),
+}
+
+# Procesos de antivirus en macOS: patrón → nombre del antivirus
+_MACOS_PROCESS_TABLE = {
+    'esets_daemon': 'ESET Cyber Security',
+    'esets_gui': 'ESET Cyber Security',
+    'MalwarebytesDaemon': 'Malwarebytes',
+    'AvastSecurityAgent': 'Avast Security',
+    'com.avast.daemon': 'Avast Security',
+    'AVGAgent': 'AVG Antivirus',
+    'SophosScanD': 'Sophos Home',
+    'sophossxld': 'Sophos Home',
+    'KasperskyAV': 'Kaspersky Internet Security',
+}
+
+# Antivirus de macOS con método de escaneo propio: subcadena del nombre
+# → método del collector
+_MACOS_VENDOR_DISPATCH = (
+    ('ESET', '_get_eset_macos_info'),
+    ('Malwarebytes', '_get_malwarebytes_macos_info'),
+    ('Sophos', '_get_sophos_macos_info'),
+    ('Avast', '_get_avast_macos_info'),
+    ('AVG', '_get_avast_macos_info'),
+)
+
+# Antivirus de terceros habituales en Windows Server (sin SecurityCenter2),
+# buscados por nombre en las claves Uninstall del registro
+_WINDOWS_SERVER_AV_VENDORS = (
+    'ClamAV', 'ClamWin', 'Kaspersky', 'Symantec', 'Norton', 'CrowdStrike',
+    'ESET', 'McAfee', 'Trellix', 'Sophos', 'Trend Micro', 'Bitdefender',
+    'SentinelOne', 'Carbon Black', 'Cylance', 'Webroot', 'Malwarebytes',
+    'F-Secure', 'WithSecure', 'Cortex XDR',
+)
+
+# Antivirus de Windows con información de escaneo conocida: subcadena del
+# displayName de SecurityCenter2 → clave de _WINDOWS_VENDOR_TABLE
+_WINDOWS_VENDOR_DISPATCH = (
+    ('ESET', 'ESET'),
+    ('Norton', 'Norton'),
+    ('Symantec', 'Norton'),
+    ('Avast', 'Avast'),
+    ('AVG', 'AVG'),
+    ('Kaspersky', 'Kaspersky'),
+    ('McAfee', 'McAfee'),
+    ('Bitdefender', 'Bitdefender'),
+)
+
+# Dónde guarda cada vendor sus fechas (rutas en orden de preferencia):
+# - registry: (clave HKLM, valor) con la última actualización
+# - update_paths: archivos/carpetas cuya fecha es la última actualización
+# - scan_paths: archivos cuya fecha es el último escaneo
+# - scan_log_dirs: carpetas cuyo .log más reciente es el último escaneo
+# Defender no aparece: se etiqueta con 'is_defender' en los productos de
+# SecurityCenter2 y se consulta por WMI (MSFT_MpComputerStatus)
+_WINDOWS_VENDOR_TABLE = {
+    'ESET': {
+        'registry': (
+            (r"SOFTWARE\ESET\ESET Security\CurrentVersion\Info", 'ScannerVersion'),
+        ),
+        'scan_paths': (
+            r"C:\ProgramData\ESET\ESET Security\Logs\virlog.dat",
+            r"C:\ProgramData\ESET\ESET NOD32 Antivirus\Logs\virlog.dat",
+        ),
+    },
+    'Norton': {
+        'scan_log_dirs': (
+            r"C:\ProgramData\Norton\{0C55C096-0F1D-4F28-AAA2-85EF591126E7}\NIS_22.0.0.110\Logs",
+            r"C:\ProgramData\Symantec\Symantec Endpoint Protection\CurrentVersion\Data\Logs",
+        ),
+    },
+    'Avast': {
+        'update_paths': (
+            r"C:\ProgramData\AVAST Software\Avast\defs",
+            r"C:\ProgramData\AVAST Software\Avast\report\FileSystemShield.txt",
+        ),
+    },
+    'AVG': {
+        'update_paths': (
+            r"C:\ProgramData\AVG\Antivirus\defs",
+        ),
+    },
+    'Kaspersky': {
+        'update_paths': (
+            r"C:\ProgramData\Kaspersky Lab\AVP21.3\Data\Updater\UpdateInfo.txt",
+            r"C:\ProgramData\Kaspersky Lab\KES\Data\Bases",
+        ),
+    },
+    'McAfee': {
+        'update_paths': (
+            r"C:\ProgramData\McAfee\DesktopProtection",
+        ),
+    },
+    'Bitdefender': {
+        'update_paths': (
+            r"C:\ProgramData\Bitdefender\Desktop\Profiles\Logs",
+            r"C:\Program Files\Bitdefender\Bitdefender Security\Antivirus_##########\Profiles\Logs",
+        ),
+    },
+}
+
+# XProtect: protección nativa de macOS
+_XPROTECT_PATH = '/System/Library/CoreServices/XProtect.bundle'
+
+# Detección genérica: carpetas de definiciones/logs y profundidad máxima
+_GENERIC_KEYWORD_RE = re.compile(r'def|sig|update|virus', re.IGNORECASE)
+_GENERIC_SCAN_MAX_DEPTH = 2
+
+# Profundidad máxima al recorrer las carpetas de ESET en macOS
+_ESET_WALK_MAX_DEPTH = 2
+
+# Archivos de ESET en macOS: el grupo que coincide indica su tipo
+# (1 = escaneo, 2 = actualización, 3 = otro archivo de antivirus)
+_ESET_KW_RE = re.compile(r'(scan)|(update|signature)|(virus)', re.IGNORECASE)
+_ESET_KW_SCAN = 1
+_ESET_KW_UPDATE = 2
+
+
+def _compile_alternation(keys) -> re.Pattern:
+    """
+    Compila una alternancia insensible a mayúsculas con los nombres dados
+    
+    Solo una letra vecina invalida la coincidencia: '_', dígitos, '.' o '-'
+    separan, de modo que 'esets_daemon' o 'clamd.service' siguen
+    detectándose y 'trending' no.
+    """
+    # Los más largos primero para que 'esets' gane a 'eset'
+    ordered = sorted(keys, key=len, reverse=True)
+    return re.compile(
+        r'(?<![a-z])(' + '|'.join(re.escape(k) for k in ordered) + r')(?![a-z])',
+        re.IGNORECASE
+    )
+
+
+# Índices por nombre en minúsculas: cada coincidencia de la alternancia se
+# resuelve con una búsqueda O(1). Una sola pasada de regex por cada salida
+# de ps/dpkg/rpm/systemctl en lugar de una búsqueda por nombre
+_LINUX_AV_KEYS_LOWER = frozenset(k.lower() for k in _LINUX_AV_TABLE)
+_LINUX_AV_LOOKUP = {k.lower(): v for k, v in _LINUX_AV_TABLE.items()}
+_LINUX_AV_RANK = {k.lower(): i for i, k in enumerate(_LINUX_AV_TABLE)}
+_LINUX_AV_RE = _compile_alternation(_LINUX_AV_TABLE)
+
+_MACOS_AV_KEYS_LOWER = frozenset(k.lower() for k in _MACOS_AV_TABLE)
+_MACOS_AV_LOOKUP = {k.lower(): v for k, v in _MACOS_AV_TABLE.items()}
+_MACOS_AV_RANK = {k.lower(): i for i, k in enumerate(_MACOS_AV_TABLE)}
+_MACOS_AV_RE = _compile_alternation(_MACOS_AV_TABLE)
+
+_WINDOWS_SERVER_AV_RE = _compile_alternation(_WINDOWS_SERVER_AV_VENDORS)
+
+# Una sola pasada sobre el nombre del antivirus en lugar de la cadena if/elif
+_WINDOWS_VENDOR_KEYS = dict(_WINDOWS_VENDOR_DISPATCH)
+_WINDOWS_VENDOR_RE = re.compile(
+    '|'.join(re.escape(needle) for needle, _ in _WINDOWS_VENDOR_DISPATCH)
+)
+
+_MACOS_VENDOR_METHODS = dict(_MACOS_VENDOR_DISPATCH)
+_MACOS_VENDOR_RE = re.compile(
+    '|'.join(re.escape(needle) for needle, _ in _MACOS_VENDOR_DISPATCH)
+)
+
+_MACOS_PROCESS_LOOKUP = {k.lower(): v for k, v in _MACOS_PROCESS_TABLE.items()}
+_MACOS_PROCESS_RE = _compile_alternation(_MACOS_PROCESS_TABLE)
+
+
+# ═══════════════════════════════════════════════════════════
+# ESTADO DEL FIREWALL
+# El estado del firewall casi nunca cambia durante una sesión: cada
+# consulta se cachea y se invalida cuando se hace una detección completa
+# ═══════════════════════════════════════════════════════════
+
+@functools.lru_cache(maxsize=1)
+def _load_wscapi():
+    """Carga wscapi.dll (no existe en Windows Server ni fuera de Windows)"""
+    if os.name != 'nt' or ctypes is None:
+        return None
+    try:
+        return ctypes.WinDLL('wscapi.dll')
+    except OSError:
+        return None
+
+
+def _wsc_provider_health(provider: int) -> Optional[int]:
+    """
+    Salud agregada de un tipo de proveedor según Windows Security Center
+    
+    Llama directamente a WscGetSecurityProviderHealth, sin pasar por COM/WMI.
+    
+    Returns:
+        int: WSC_SECURITY_PROVIDER_HEALTH (0 = bueno) o None si no disponible
+    """
+    wscapi = _load_wscapi()
+    if wscapi is None:
+        return None
+    
+    try:
+        health = ctypes.c_int()
+        hresult = wscapi.WscGetSecurityProviderHealth(provider, ctypes.byref(health))
+    except (AttributeError, OSError):
+        return None
+    
+    return health.value if hresult == 0 else None
+
+
+@functools.lru_cache(maxsize=1)
+def _windows_firewall_state() -> str:
+    """
+    Estado del firewall en Windows
+    
+    Security Center agrega el Firewall de Windows y los de terceros; si no
+    está disponible se lee EnableFirewall de cada perfil en el registro y,
+    como último recurso, 'netsh advfirewall'.
+    """
+    health = _wsc_provider_health(_WSC_SECURITY_PROVIDER_FIREWALL)
+    if health is not None:
+        return 'active' if health == _WSC_SECURITY_PROVIDER_HEALTH_GOOD else 'inactive'
+    
+    # EnableFirewall de los perfiles en el registro: sin lanzar procesos
+    profiles = [_read_hklm_value(key, 'EnableFirewall') for key in _FIREWALL_PROFILE_KEYS]
+    if any(value is not None for value in profiles):
+        return 'active' if any(profiles) else 'inactive'
+    
+    try:
+        result = subprocess.run(
+            ['netsh', 'advfirewall', 'show', 'allprofiles', 'state'],
+            capture_output=True,
+            text=True,
+            timeout=3
+        )
+    except Exception:
+        return 'unknown'
+    
+    if result.returncode != 0:
+        return 'unknown'
+    return 'active' if _NETSH_STATE_ON_RE.search(result.stdout) else 'inactive'
+
+
+@functools.lru_cache(maxsize=1)
+def _macos_firewall_state() -> str:
+    """Estado del firewall de aplicaciones de macOS (com.apple.alf)"""
+    # Leer el plist directamente evita lanzar 'defaults'
+    try:
+        with open(_MACOS_ALF_PLIST, 'rb') as f:
+            fw_state = plistlib.load(f).get('globalstate', 0)
+        return 'active' if fw_state != 0 else 'inactive'
+    except (OSError, plistlib.InvalidFileException, AttributeError):
+        pass
+    
+    try:
+        result = _spawn(_MACOS_ALF_CMD, timeout=5)
+    except Exception:
+        return 'unknown'
+    
+    return 'active' if result.stdout.strip() != '0' else 'inactive'
+
+
+def _ufw_conf_enabled() -> Optional[bool]:
+    """ENABLED de /etc/ufw/ufw.conf; None si ufw no está configurado"""
+    try:
+        with open(_UFW_CONF, 'r') as f:
+            for line in f:
+                match = _UFW_ENABLED_RE.match(line)
+                if match:
+                    return match.group(1).lower() == 'yes'
+    except OSError:
+        pass
+    return None
+
+
+def _firewalld_running() -> bool:
+    """Indica si el proceso del pid file de firewalld sigue vivo"""
+    for pid_file in _FIREWALLD_PID_FILES:
+        try:
+            with open(pid_file, 'r') as f:
+                pid = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        return os.path.exists(f'/proc/{pid}')
+    return False
+
+
+@functools.lru_cache(maxsize=1)
+def _linux_firewall_state() -> str:
+    """
+    Estado del firewall en Linux (ufw o firewalld)
+    
+    ufw.conf y el pid file de firewalld dan el estado sin lanzar procesos;
+    'ufw status' y 'firewall-cmd' quedan para cuando ufw no está configurado.
+    """
+    ufw_enabled = _ufw_conf_enabled()
+    if ufw_enabled or _firewalld_running():
+        return 'active'
+    if ufw_enabled is False:
+        return 'inactive'
+    
+    try:
+        # Intentar con ufw primero
+        result = _spawn(['ufw', 'status'], timeout=5)
+        match = _UFW_STATUS_RE.search(result.stdout)
+        if match:
+            return match.group(1).lower()
+    except:
+        try:
+            # Intentar con firewalld
+            result = _spawn(['firewall-cmd', '--state'], timeout=5)
+            if _FIREWALLD_RUNNING_RE.search(result.stdout):
+                return 'active'
+        except:
+            pass
+    
+    return 'unknown'
+
+
+def _clear_firewall_state_cache() -> None:
+    """Invalida los estados de firewall cacheados"""
+    for func in (_windows_firewall_state, _macos_firewall_state, _linux_firewall_state):
+        func.cache_clear()
+
+
+# ═══════════════════════════════════════════════════════════
+# RUTAS Y HERRAMIENTAS DEL SISTEMA
+# Su presencia no cambia mientras el agente está en ejecución
+# ═══════════════════════════════════════════════════════════
+
+@functools.lru_cache(maxsize=None)
+def _exists(path: str) -> bool:
+    """os.path.exists cacheado para rutas del sistema (XProtect, etc.)"""
+    return os.path.exists(path)
+
+
+def _spawn(cmd: List[str], timeout: float) -> subprocess.CompletedProcess:
+    """
+    subprocess.run para comandos cortos (ps, ufw, dpkg, ...)
+    
+    En Linux/macOS CPython solo lanza el hijo con posix_spawn (sin copiar
+    las tablas de páginas del agente) si el ejecutable tiene ruta absoluta
+    y close_fds=False. Los descriptores de Python no son heredables por
+    defecto (PEP 446), así que el hijo solo recibe sus pipes.
+    
+    Raises:
+        FileNotFoundError: Si el comando no está en el PATH
+    """
+    if OS_TYPE != 'Windows':
+        executable = which(cmd[0])
+        if executable is None:
+            raise FileNotFoundError(cmd[0])
+        return subprocess.run(
+            [executable] + cmd[1:],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            close_fds=False
+        )
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+
+
+@functools.lru_cache(maxsize=1)
+def _is_windows_server() -> bool:
+    """
+    Indica si el sistema es una edición Windows Server
+    
+    Las ediciones Server no incluyen el namespace SecurityCenter2.
+    """
+    try:
+        edition = platform.win32_edition() or ''
+    except Exception:
+        edition = ''
+    
+    if 'server' in edition.lower():
+        return True
+    
+    if winreg is None:
+        return False
+    
+    try:
+        with winreg.OpenKey(
+            winreg.HKEY_LOCAL_MACHINE,
+            r"SOFTWARE\Microsoft\Windows NT\CurrentVersion"
+        ) as key:
+            installation_type, _ = winreg.QueryValueEx(key, 'InstallationType')
+            return 'server' in str(installation_type).lower()
+    except OSError:
+        return False
+
+
+def _read_hklm_value(key_path: str, value_name: str) -> Optional[Any]:
+    """Valor de HKEY_LOCAL_MACHINE o None si la clave/valor no existe"""
+    if winreg is None:
+        return None
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ) as key:
+            return winreg.QueryValueEx(key, value_name)[0]
+    except OSError:
+        return None
+
+
+def _filetime_iso(value: Any) -> Optional[str]:
+    """
+    FILETIME del registro (REG_BINARY de 8 bytes o REG_QWORD) a ISO 8601
+    
+    Returns:
+        str: Fecha en hora local o None si el valor no es válido o es cero
+    """
+    if isinstance(value, (bytes, bytearray)):
+        if len(value) != 8:
+            return None
+        value = int.from_bytes(value, 'little')
+    if not isinstance(value, int) or value <= _FILETIME_EPOCH_OFFSET:
+        return None
+    try:
+        return _iso((value - _FILETIME_EPOCH_OFFSET) // 10_000_000)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _tail_lines(path: str, n: int = 20, block: int = 8192) -> List[str]:
+    """
+    Últimas n líneas de un archivo de texto leyendo solo su final
+    
+    Args:
+        path: Ruta del archivo
+        n: Número de líneas
+        block: Bytes leídos desde el final
+    """
+    with open(path, 'rb') as f:
+        start = max(0, f.seek(0, os.SEEK_END) - block)
+        f.seek(start)
+        lines = f.read().decode('utf-8', errors='replace').splitlines()
+    
+    # La primera línea del bloque puede estar cortada
+    if start > 0:
+        lines = lines[1:]
+    
+    return lines[-n:]
+
+
+@functools.lru_cache(maxsize=1024)
+def _iso(timestamp: int) -> str:
+    """
+    Timestamp (segundos) a ISO 8601 en hora local
+    
+    Los archivos de una misma carpeta suelen compartir el segundo de
+    modificación: se formatea una sola vez por segundo distinto. Se arma
+    desde time.localtime, sin crear un datetime (mismo formato que
+    datetime.isoformat() para segundos enteros).
+    """
+    lt = time.localtime(timestamp)
+    return '%04d-%02d-%02dT%02d:%02d:%02d' % (
+        lt.tm_year, lt.tm_mon, lt.tm_mday, lt.tm_hour, lt.tm_min, lt.tm_sec
+    )
+
+
+def _wmi_datetime_iso(value: Optional[str]) -> Optional[str]:
+    """Convierte un datetime CIM ('20240115103000.000000+000') a ISO 8601"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:14], '%Y%m%d%H%M%S').isoformat()
+    except ValueError:
+        return None
+
+
+def _pe_file_version(path: Optional[str]) -> Optional[str]:
+    """
+    Versión de archivo de un ejecutable PE (recurso VS_FIXEDFILEINFO)
+    
+    Args:
+        path: Ruta al ejecutable (admite variables de entorno)
+    
+    Returns:
+        str: Versión 'a.b.c.d' o None si no se puede leer
+    """
+    if not path or win32api is None:
+        return None
+    
+    path = os.path.expandvars(path)
+    if not os.path.isfile(path):
+        return None
+    
+    try:
+        info = win32api.GetFileVersionInfo(path, '\\')
+        ms, ls = info['FileVersionMS'], info['FileVersionLS']
+        return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+    except Exception:
+        return None
+
 
 class AntivirusCollector:
-    """Recolector de información de antivirus multiplataforma"""
+    """
+    Recolector de información de antivirus multiplataforma
+    
+    Win32_Product queda desactivado por defecto (enable_win32_product):
+    enumerarlo dispara una verificación de consistencia MSI de todos los
+    paquetes instalados (lento, y puede generar el evento 11708).
+    """
+    
+    # Cache compartido de resultados WMI/registro: clave → (timestamp, valor)
+    _WMI_CACHE_TTL = 60
+    _wmi_cache: Dict[str, Tuple[float, Any]] = {}
+    _wmi_lock = threading.Lock()
+    
+    # Las conexiones WMI (COM) pertenecen al apartamento del hilo que las crea
+    _wmi_local = threading.local()
+    
+    # Cache en disco de la última detección (se invalida por huella o TTL),
+    # en el directorio del usuario: no en un /tmp compartido
+    CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'it_moniting', 'av_collector.json')
+    CACHE_TTL = 3600
+    
+    # Tiempo máximo que una llamada concurrente espera a la que está en curso
+    INFLIGHT_TIMEOUT = 10
+    
+    # 'basic': solo estado (sin fechas de escaneo por vendor); 'full': todo
+    DETAIL_LEVELS = ('basic', 'full')
+    
+    def __init__(
+        self,
+        use_cache: bool = True,
+        enable_win32_product: bool = False,
+        thorough: bool = False
+    ):
+        self.os_type = OS_TYPE
+        self.logger = log
+        self.use_cache = use_cache
+        self.enable_win32_product = enable_win32_product
+        
+        # Linux: con thorough=False, si hay un antivirus en ejecución no se
+        # consultan dpkg/rpm/systemctl (solo aportarían antivirus instalados)
+        self.thorough = thorough
+        self.cache_file = self.CACHE_FILE
+        
+        # Single-flight: las llamadas concurrentes a collect() con el mismo
+        # nivel de detalle comparten el resultado de la recopilación en curso;
+        # si esta excede INFLIGHT_TIMEOUT se devuelve el último resultado
+        self._inflight_lock = threading.Lock()
+        self._inflight_results: Dict[str, Future] = {}
+        self._last_results: Dict[str, Dict] = {}
+    
+    @contextlib.contextmanager
+    def _timed(self, name: str):
+        """Mide la duración del bloque y la guarda en las duraciones de la llamada"""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            timings = _TIMINGS.get()
+            if timings is not None:
+                timings[name] = time.perf_counter_ns() - start
+    
+    def _timed_call(self, name: str, func: Callable, *args) -> Any:
+        """Ejecuta func(*args) midiendo su duración (para usar con executors)"""
+        with self._timed(name):
+            return func(*args)
+    
+    @staticmethod
+    def _run(cmd: List[str], timeout: int = 5) -> Tuple[List[str], Optional[str]]:
+        """
+        Ejecuta un comando y devuelve (cmd, stdout)
+        
+        stdout es None si el comando falla o excede el timeout.
+        """
+        try:
+            result = _spawn(cmd, timeout)
+            return cmd, result.stdout
+        except Exception as e:
+            log.warning("Error ejecutando %s: %s", cmd[0], e)
+            return cmd, None
     
-    def __init__(self):
-        self.os_type = platform.system()
-        self.logger = None  # Si tienes logging, asigna aquí
-    def collect(self) -> Dict:
+    @staticmethod
+    def _run_ps(script: str, timeout: int = 10) -> Optional[str]:
+        """
+        Ejecuta un script de PowerShell y devuelve su stdout
+        
+        Usa el proceso persistente compartido (PowerShellHost): el arranque
+        de PowerShell se paga una vez por vida del agente. Devuelve None si
+        PowerShell no está disponible o excede el timeout.
+        """
+        return get_powershell_host().run(script, timeout)
+    
+    def _get_process_names(self) -> Optional[str]:
+        """
+        Nombres de los procesos en ejecución, uno por línea
+        
+        Con psutil se leen directamente del sistema (sin fork ni parseo de
+        texto); si no está disponible se usa la salida de 'ps aux'.
+        """
+        if psutil is not None:
+            try:
+                return '\n'.join(
+                    p.info['name'] for p in psutil.process_iter(['name']) if p.info['name']
+                )
+            except Exception as e:
+                log.warning("Error listando procesos con psutil: %s", e)
+        
+        return self._run(['ps', 'aux'])[1]
+    
+    @staticmethod
+    def _find_matches(pattern: re.Pattern, text: str) -> set:
+        """Nombres (en minúsculas) encontrados por el patrón en el texto"""
+        return {m.group(1).lower() for m in pattern.finditer(text)}
+    
+    @staticmethod
+    def _stat_or_none(path: str) -> Optional[os.stat_result]:
+        """os.stat(path) o None si no existe: reemplaza exists() + getmtime()"""
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _mtime_iso(path: str) -> Optional[str]:
+        """Fecha de modificación en ISO 8601 con un solo stat, o None si no existe"""
+        try:
+            return _iso(int(os.stat(path).st_mtime))
+        except (OSError, ValueError):
+            return None
+    
+    def collect(self, detail_level: str = 'full') -> Dict:
         """
         Método de interfaz unificada para compatibilidad con otros collectors
         Llama internamente a collect_antivirus_info()
         
+        Si otra llamada ya está recopilando, espera su resultado en lugar de
+        repetir todas las consultas. Si la espera excede INFLIGHT_TIMEOUT se
+        devuelve el último resultado (o un error), sin recopilar de nuevo.
+        Cada llamador recibe su propia copia del resultado.
+        
+        Args:
+            detail_level: 'full' (por defecto) o 'basic'. En 'basic' no se
+                consultan las fechas de escaneo/actualización específicas de
+                cada vendor en Windows: el estado ya viene en productState
+        
         Returns:
             dict: Información del antivirus detectado
         """
+        if detail_level not in self.DETAIL_LEVELS:
+            raise ValueError(f"detail_level inválido: {detail_level}")
+        
+        with self._inflight_lock:
+            inflight = self._inflight_results.get(detail_level)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self._inflight_results[detail_level] = Future()
+        
+        if not is_leader:
+            try:
+                return copy.deepcopy(inflight.result(timeout=self.INFLIGHT_TIMEOUT))
+            except FutureTimeoutError:
+                log.warning("Timeout esperando la recopilación en curso; usando el último resultado")
+                last = self._last_results.get(detail_level)
+                if last is not None:
+                    return copy.deepcopy(last)
+                return {
+                    'antivirus_name': 'Unknown',
+                    'error': 'Timeout esperando la recopilación en curso',
+                    'os_type': self.os_type
+                }
+        
         try:
-            return self.collect_antivirus_info()
+            result = self._collect_once(detail_level)
+            if 'error' not in result:
+                self._last_results[detail_level] = result
+            inflight.set_result(result)
+            return copy.deepcopy(result)
+        finally:
+            with self._inflight_lock:
+                del self._inflight_results[detail_level]
+    
+    def _collect_once(self, detail_level: str) -> Dict:
+        """Una recopilación completa con manejo de errores"""
+        try:
+            return self.collect_antivirus_info(detail_level)
         except Exception as e:
-            print(f"❌ Error en collect(): {e}")
+            log.exception("Error en collect()")
             return {
                 'antivirus_name': 'Error',
                 'error': str(e),
                 'os_type': self.os_type
             }
-    def collect_antivirus_info(self) -> Dict:
+    
+    def collect_antivirus_info(self, detail_level: str = 'full') -> Dict:
         """
         Recopila información del antivirus según el sistema operativo
         
+        Args:
+            detail_level: 'full' o 'basic' (ver collect())
+        
         Returns:
             dict: Información del antivirus detectado
         """
@@ -62,91 +913,301 @@ class AntivirusCollector:
             'os_type': self.os_type
         }
         
+        timings: Dict[str, int] = {}
+        token = _TIMINGS.set(timings)
+        try:
+            with self._timed('total'):
+                result = self._detect(antivirus_info, detail_level)
+        finally:
+            _TIMINGS.reset(token)
+        
+        # AV_COLLECTOR_PROFILE=1 adjunta la duración de cada subdetector
+        if os.environ.get('AV_COLLECTOR_PROFILE'):
+            result['_timings_ns'] = dict(timings)
+        
+        return result
+    
+    def _detect(self, antivirus_info: Dict, detail_level: str = 'full') -> Dict:
+        """Detección (con cache en disco) para el sistema operativo actual"""
         try:
+            with self._timed('fingerprint'):
+                fingerprint = self._fingerprint() if self.use_cache else None
+            
+            if fingerprint:
+                cached = self._load_cached_detection(fingerprint)
+                if cached:
+                    # El antivirus instalado no cambió: refrescar el firewall y
+                    # si su proceso sigue en ejecución (la huella no lo cubre)
+                    with self._timed('firewall'):
+                        _clear_firewall_state_cache()
+                        cached['firewall_status'] = self._get_firewall_status()
+                    with self._timed('liveness'):
+                        self._refresh_protection_status(cached)
+                    return cached
+            
+            # Detección completa: volver a consultar también el firewall
+            _clear_firewall_state_cache()
+            
             if self.os_type == "Windows":
-                return self._collect_windows_antivirus(antivirus_info)
+                result = self._collect_windows_antivirus(antivirus_info, detail_level)
             
             elif self.os_type == "Darwin":  # macOS
-                return self._collect_macos_antivirus(antivirus_info)
+                result = self._collect_macos_antivirus(antivirus_info)
             
             elif self.os_type == "Linux":
-                return self._collect_linux_antivirus(antivirus_info)
+                result = self._collect_linux_antivirus(antivirus_info)
             
             else:
                 antivirus_info['antivirus_name'] = f'Unsupported OS: {self.os_type}'
                 return antivirus_info
+            
+            # Un resultado 'basic' no sirve para una llamada 'full' posterior
+            if fingerprint and 'error' not in result and detail_level == 'full':
+                self._save_cached_detection(fingerprint, result)
+            
+            return result
         
         except Exception as e:
-            print(f"❌ Error recopilando info de antivirus: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error recopilando info de antivirus")
             antivirus_info['antivirus_name'] = 'Error during detection'
             antivirus_info['error'] = str(e)
             return antivirus_info
     
+    def _running_antivirus_names(self) -> Optional[set]:
+        """
+        Antivirus con un proceso en ejecución (Linux y macOS)
+        
+        None en Windows: allí el productState ya forma parte de la huella.
+        """
+        if self.os_type == "Linux":
+            return {av['name'] for av in self._linux_ps()}
+        if self.os_type == "Darwin":
+            processes = self._get_process_names() or ''
+            return {
+                _MACOS_PROCESS_LOOKUP[token]
+                for token in self._find_matches(_MACOS_PROCESS_RE, processes)
+            }
+        return None
+    
+    def _refresh_protection_status(self, cached: Dict) -> None:
+        """
+        Recalcula protection_status/real_time_protection de un resultado cacheado
+        
+        En Linux y macOS el estado de un antivirus de terceros depende de que
+        su proceso esté en ejecución, lo que puede cambiar sin invalidar la
+        huella (paquetes y aplicaciones instaladas).
+        """
+        name = cached.get('antivirus_name')
+        if name not in (cached.get('third_party_antivirus') or []):
+            return
+        
+        running = self._running_antivirus_names()
+        if running is None:
+            return
+        
+        is_running = name in running
+        cached['protection_status'] = 'active' if is_running else 'installed'
+        cached['real_time_protection'] = is_running
+    
+    # ═══════════════════════════════════════════════════════════
+    # CACHE DE DETECCIÓN EN DISCO
+    # ═══════════════════════════════════════════════════════════
+    
+    def _fingerprint(self) -> Optional[str]:
+        """
+        Huella barata del software de seguridad instalado
+        
+        - Linux: fechas de modificación de las bases de datos de paquetes
+        - macOS: fechas de modificación de las carpetas de aplicaciones
+        - Windows: GUIDs y productState de los productos de SecurityCenter2
+        
+        En Linux y macOS se añaden las fechas de _SIGNATURE_WATCH_PATHS para
+        que una actualización de firmas invalide el cache.
+        
+        Returns:
+            str: Hash de la huella o None si no se puede calcular
+        """
+        try:
+            if self.os_type == "Windows":
+                if not _WMI_AVAILABLE:
+                    return None
+                parts = sorted(
+                    (str(av['guid']), av['state']) for av in self._query_av_products()
+                )
+            else:
+                if self.os_type == "Linux":
+                    paths = _LINUX_PACKAGE_DBS
+                elif self.os_type == "Darwin":
+                    paths = ('/Applications', os.path.expanduser('~/Applications'))
+                else:
+                    return None
+                
+                parts = []
+                for path in paths + _SIGNATURE_WATCH_PATHS[self.os_type]:
+                    path_stat = self._stat_or_none(path)
+                    parts.append(path_stat.st_mtime if path_stat else 0)
+        except Exception:
+            return None
+        
+        raw = repr((self.os_type, platform.node(), self.thorough, parts)).encode('utf-8')
+        return hashlib.sha1(raw).hexdigest()
+    
+    def _load_cached_detection(self, fingerprint: str) -> Optional[Dict]:
+        """Devuelve la detección cacheada si la huella coincide y no expiró"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if cached.get('fingerprint') != fingerprint:
+            return None
+        if time.time() - cached.get('timestamp', 0) > self.CACHE_TTL:
+            return None
+        
+        return cached.get('info')
+    
+    def _save_cached_detection(self, fingerprint: str, info: Dict) -> None:
+        """Guarda la detección en disco de forma atómica"""
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'fingerprint': fingerprint,
+                    'timestamp': time.time(),
+                    'info': info
+                }, f, default=str)
+            os.replace(tmp_file, self.cache_file)
+        except (OSError, TypeError, ValueError) as e:
+            log.warning("No se pudo guardar el cache de antivirus: %s", e)
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+    
+    # ═══════════════════════════════════════════════════════════
+    # FIREWALL
+    # ═══════════════════════════════════════════════════════════
+    
+    def _get_firewall_status(self) -> str:
+        """Estado del firewall del sistema operativo actual"""
+        if self.os_type == "Windows":
+            return self._get_windows_firewall_status()
+        if self.os_type == "Darwin":
+            return _macos_firewall_state()
+        if self.os_type == "Linux":
+            return _linux_firewall_state()
+        return 'unknown'
+    
+    def _get_windows_firewall_status(self) -> str:
+        """
+        Estado del firewall en Windows
+        
+        Primero Security Center (wscapi) o el Firewall de Windows (netsh); si
+        wscapi no está disponible y netsh no lo reporta activo se consulta
+        SecurityCenter2 por firewalls de terceros.
+        """
+        state = _windows_firewall_state()
+        if state == 'active' or _load_wscapi() is not None:
+            return state
+        
+        if _WMI_AVAILABLE:
+            try:
+                if self._query_firewall_products():
+                    return 'active'
+            except Exception:
+                pass
+        
+        return state
+    
     # ═══════════════════════════════════════════════════════════
     # WINDOWS - WMI SecurityCenter2
     # ═══════════════════════════════════════════════════════════
     
-    def _collect_windows_antivirus(self, antivirus_info: Dict) -> Dict:
+    def _collect_windows_antivirus(self, antivirus_info: Dict, detail_level: str = 'full') -> Dict:
         """Recopila información de antivirus en Windows usando WMI"""
         
-        try:
-            import wmi
-        except ImportError:
-            print("⚠️  Librería WMI no disponible")
+        # Windows Server no tiene SecurityCenter2: evitar el intento fallido
+        if _is_windows_server():
+            return self._collect_windows_server_antivirus(antivirus_info)
+        
+        if not _WMI_AVAILABLE:
+            log.warning("Librería WMI no disponible")
             antivirus_info['antivirus_name'] = 'WMI not available'
             antivirus_info['detection_method'] = 'WMI (not installed)'
+            
+            # Sin WMI aún se puede conocer el estado agregado vía wscapi
+            self._apply_wsc_antivirus_health(antivirus_info)
+            
+            antivirus_info['firewall_status'] = self._get_windows_firewall_status()
             return antivirus_info
         
+        # netsh y el registro no usan COM: se consultan en segundo plano
+        # mientras se hacen las consultas WMI (ambos resultados se cachean)
+        prefetch = [
+            BaseCollector.submit(self._timed_call, 'windows.firewall', _windows_firewall_state),
+            BaseCollector.submit(self._timed_call, 'windows.registry', self._get_installed_programs),
+        ]
+        
         try:
-            c = wmi.WMI(namespace="root/SecurityCenter2")
             antivirus_info['detection_method'] = 'WMI SecurityCenter2'
             
-            antivirus_products = []
-            
             # Obtener todos los productos antivirus instalados
-            for av in c.AntiVirusProduct():
-                product_info = {
-                    'name': av.displayName,
-                    'state': av.productState,
-                    'path': av.pathToSignedProductExe if hasattr(av, 'pathToSignedProductExe') else None,
-                    'guid': av.instanceGuid
-                }
-                antivirus_products.append(product_info)
+            try:
+                with self._timed('windows.wmi_antivirus'):
+                    antivirus_products = self._query_av_products()
+            except Exception as e:
+                # SecurityCenter2 inaccesible (RPC/COM): estado agregado de wscapi
+                if not self._apply_wsc_antivirus_health(antivirus_info):
+                    raise
+                log.warning("SecurityCenter2 no disponible, usando wscapi: %s", e)
+                antivirus_products = []
             
-            print(f"\n🛡️  Antivirus detectados: {len(antivirus_products)}")
-            for av in antivirus_products:
-                print(f"   - {av['name']}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Antivirus detectados: %d", len(antivirus_products))
+                for av in antivirus_products:
+                    log.debug("  - %s", av['name'])
             
             # Separar Windows Defender de antivirus de terceros
             windows_defender = None
             third_party_list = []
+            seen_names = set()
             primary_antivirus = None
             
             for av_product in antivirus_products:
                 name = av_product['name']
                 
-                if 'Windows Defender' in name or 'Microsoft Defender' in name:
+                if av_product['is_defender']:
                     windows_defender = av_product
-                else:
+                elif name not in seen_names:
+                    seen_names.add(name)
                     third_party_list.append(name)
                     if primary_antivirus is None:  # El primero que encontremos
                         primary_antivirus = av_product
             
             # PRIORIDAD: Si hay antivirus de terceros, usar ese
             if primary_antivirus:
-                print(f"✅ Usando antivirus principal: {primary_antivirus['name']}")
+                log.debug("Usando antivirus principal: %s", primary_antivirus['name'])
                 active_antivirus = primary_antivirus
                 antivirus_info['third_party_antivirus'] = third_party_list
             elif windows_defender:
-                print(f"✅ Usando Windows Defender (no hay terceros)")
+                log.debug("Usando Windows Defender (no hay terceros)")
                 active_antivirus = windows_defender
                 antivirus_info['third_party_antivirus'] = []
             else:
-                print(f"⚠️  No se detectaron productos antivirus")
+                log.debug("No se detectaron productos antivirus")
                 active_antivirus = None
-                        
+            
+            # El escaneo específico del vendor (PowerShell, registro, disco)
+            # corre en un worker mientras se resuelven firewall y versión
+            scan_future = None
+            if active_antivirus and detail_level == 'full':
+                scan_future = BaseCollector.submit(
+                    self._com_call, self._timed_call,
+                    'windows.scan_info', self._get_windows_scan_info, active_antivirus
+                )
+            
             # Extraer información del antivirus activo
             if active_antivirus:
                 antivirus_info['antivirus_name'] = active_antivirus['name']
@@ -155,366 +1216,453 @@ class AntivirusCollector:
                 product_state = active_antivirus['state']
                 state_info = self._decode_antivirus_state(product_state)
                 
-                antivirus_info['protection_status'] = state_info['protection_status']
-                antivirus_info['real_time_protection'] = state_info['real_time_protection']
-                antivirus_info['definitions_up_to_date'] = state_info['definitions_up_to_date']
-                
-                print(f"   Estado: {antivirus_info['protection_status']}")
-                print(f"   Protección en tiempo real: {antivirus_info['real_time_protection']}")
-                print(f"   Definiciones actualizadas: {antivirus_info['definitions_up_to_date']}")
-                
-                # ✅ NUEVO: Obtener last_scan y last_update según el tipo de antivirus
-                av_name = active_antivirus['name']
-                
-                # Intentar obtener información específica por antivirus
-                scan_info = None
-                
-                if 'Windows Defender' in av_name or 'Microsoft Defender' in av_name:
-                    scan_info = self._get_windows_defender_scan_info()
-                
-                elif 'ESET' in av_name:
-                    scan_info = self._get_eset_scan_info()
-                
-                elif 'Norton' in av_name or 'Symantec' in av_name:
-                    scan_info = self._get_norton_scan_info()
-                
-                elif 'Avast' in av_name:
-                    scan_info = self._get_avast_scan_info()
-                
-                elif 'AVG' in av_name:
-                    scan_info = self._get_avg_scan_info()
-                
-                elif 'Kaspersky' in av_name:
-                    scan_info = self._get_kaspersky_scan_info()
-                
-                elif 'McAfee' in av_name:
-                    scan_info = self._get_mcafee_scan_info()
-                
-                elif 'Bitdefender' in av_name:
-                    scan_info = self._get_bitdefender_scan_info()
+                antivirus_info['protection_status'] = state_info.protection_status
+                antivirus_info['real_time_protection'] = state_info.real_time_protection
+                antivirus_info['definitions_up_to_date'] = state_info.definitions_up_to_date
                 
-                else:
-                    # Método genérico para otros antivirus
-                    scan_info = self._get_generic_antivirus_scan_info(active_antivirus)
-                
-                if scan_info:
-                    if scan_info.get('last_scan'):
-                        antivirus_info['last_scan'] = scan_info['last_scan']
-                    if scan_info.get('last_update'):
-                        antivirus_info['last_update'] = scan_info['last_update']
+                log.debug(
+                    "Estado: %s, tiempo real: %s, definiciones actualizadas: %s",
+                    antivirus_info['protection_status'],
+                    antivirus_info['real_time_protection'],
+                    antivirus_info['definitions_up_to_date']
+                )
+            
+            wait(prefetch)
             
             # Obtener información de firewall
-            try:
-                firewall_detected = False
-                for fw in c.FirewallProduct():
-                    if fw.displayName:
-                        antivirus_info['firewall_status'] = 'active'
-                        firewall_detected = True
-                        break
-                
-                if not firewall_detected:
-                    antivirus_info['firewall_status'] = 'inactive'
-            except:
-                antivirus_info['firewall_status'] = 'unknown'
+            antivirus_info['firewall_status'] = self._get_windows_firewall_status()
             
-            # Intentar obtener versión desde Win32_Product
+            # Obtener versión del recurso de versión del ejecutable firmado y,
+            # si no está disponible, del registro (Uninstall). Win32_Product
+            # se evita: dispara una verificación MSI de todos los paquetes
             try:
-                c2 = wmi.WMI()
-                for product in c2.Win32_Product():
-                    if antivirus_info['antivirus_name'] in product.Name:
-                        antivirus_info['antivirus_version'] = product.Version
-                        print(f"   Versión: {antivirus_info['antivirus_version']}")
-                        break
+                version = _pe_file_version(active_antivirus['path']) if active_antivirus else None
+                
+                if not version:
+                    av_name = antivirus_info['antivirus_name']
+                    for display_name, installed_version in self._get_installed_programs().items():
+                        if av_name in display_name and installed_version:
+                            version = installed_version
+                            break
+                
+                # Último recurso, solo si se habilitó explícitamente
+                if not version and self.enable_win32_product:
+                    version = self._query_win32_product_version(antivirus_info['antivirus_name'])
+                
+                if version:
+                    antivirus_info['antivirus_version'] = version
+                    log.debug("Versión: %s", version)
             except:
                 pass
+            
+            # ✅ NUEVO: last_scan y last_update según el tipo de antivirus
+            scan_info = scan_future.result() if scan_future else None
+            if scan_info:
+                if scan_info.get('last_scan'):
+                    antivirus_info['last_scan'] = scan_info['last_scan']
+                if scan_info.get('last_update'):
+                    antivirus_info['last_update'] = scan_info['last_update']
         
         except Exception as e:
-            print(f"❌ Error en detección Windows: {e}")
+            log.error("Error en detección Windows: %s", e)
             antivirus_info['error'] = str(e)
         
         return antivirus_info
-    def _get_windows_defender_scan_info(self) -> Optional[Dict]:
+    
+    @staticmethod
+    def _apply_wsc_antivirus_health(antivirus_info: Dict) -> bool:
         """
-        Obtiene información de escaneo de Windows Defender usando PowerShell
+        Completa el estado de protección con la salud agregada de wscapi
         
         Returns:
-            dict: Información de último escaneo y actualización, o None si falla
+            bool: True si Windows Security Center respondió
         """
-        try:
-            # Ejecutar PowerShell para obtener información de Windows Defender
-            powershell_cmd = [
-                'powershell',
-                '-NoProfile',
-                '-Command',
-                'Get-MpComputerStatus | Select-Object AntivirusSignatureLastUpdated, FullScanEndTime, QuickScanEndTime | ConvertTo-Json'
-            ]
-            
-            result = subprocess.run(
-                powershell_cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0 and result.stdout:
-                import json
-                data = json.loads(result.stdout)
-                
-                scan_info = {}
-                
-                # Última actualización de definiciones
-                if data.get('AntivirusSignatureLastUpdated'):
-                    scan_info['last_update'] = data['AntivirusSignatureLastUpdated']
-                    print(f"   Última actualización: {scan_info['last_update']}")
-                
-                # Último escaneo (usar el más reciente entre completo y rápido)
-                full_scan = data.get('FullScanEndTime')
-                quick_scan = data.get('QuickScanEndTime')
-                
-                if full_scan and quick_scan:
-                    # Comparar y usar el más reciente
-                    scan_info['last_scan'] = max(full_scan, quick_scan)
-                elif full_scan:
-                    scan_info['last_scan'] = full_scan
-                elif quick_scan:
-                    scan_info['last_scan'] = quick_scan
-                
-                if scan_info.get('last_scan'):
-                    print(f"   Último escaneo: {scan_info['last_scan']}")
-                
-                return scan_info
+        health = _wsc_provider_health(_WSC_SECURITY_PROVIDER_ANTIVIRUS)
+        if health is None:
+            return False
+        
+        is_good = health == _WSC_SECURITY_PROVIDER_HEALTH_GOOD
+        antivirus_info['detection_method'] = 'Windows Security Center (wscapi)'
+        antivirus_info['protection_status'] = 'active' if is_good else 'inactive'
+        antivirus_info['real_time_protection'] = is_good
+        return True
+    
+    def _get_windows_scan_info(self, av_product: Dict) -> Optional[Dict]:
+        """Obtiene last_scan/last_update con el método específico del vendor"""
+        if av_product.get('is_defender'):
+            return self._get_windows_defender_scan_info()
         
-        except Exception as e:
-            print(f"   ⚠️  No se pudo obtener info de escaneo de Defender: {e}")
-            return None
+        match = _WINDOWS_VENDOR_RE.search(av_product['name'])
+        if match:
+            return self._scan_by_vendor(_WINDOWS_VENDOR_KEYS[match.group(0)])
+        
+        # Método genérico para otros antivirus
+        return self._get_generic_antivirus_scan_info(av_product)
     
-
-# ═══════════════════════════════════════════════════════════
-# MÉTODOS ESPECÍFICOS POR ANTIVIRUS - WINDOWS
-# ═══════════════════════════════════════════════════════════
-
-    def _get_eset_scan_info(self) -> Optional[Dict]:
-        """Obtiene información de escaneo de ESET"""
+    def _collect_windows_server_antivirus(self, antivirus_info: Dict) -> Dict:
+        """
+        Recopila información de antivirus en Windows Server
+        
+        Los antivirus de terceros se buscan en las claves Uninstall del
+        registro y Microsoft Defender se consulta en su propio namespace WMI.
+        """
+        antivirus_info['detection_method'] = 'Registry and Defender WMI (Windows Server)'
+        
         try:
-            scan_info = {}
-            
-            # ESET guarda información en el registro
-            import winreg
-            
-            try:
-                # Intentar leer del registro de ESET
-                key_path = r"SOFTWARE\ESET\ESET Security\CurrentVersion\Info"
-                key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ)
-                
-                try:
-                    # Última actualización de definiciones
-                    scan_date, _ = winreg.QueryValueEx(key, "ScannerVersion")
-                    scan_info['last_update'] = scan_date
-                    print(f"   Última actualización ESET: {scan_date}")
-                except:
-                    pass
-                
-                winreg.CloseKey(key)
-            except:
-                pass
-            
-            # Intentar leer archivos de log de ESET
-            log_paths = [
-                r"C:\ProgramData\ESET\ESET Security\Logs\virlog.dat",
-                r"C:\ProgramData\ESET\ESET NOD32 Antivirus\Logs\virlog.dat"
-            ]
-            
-            for log_path in log_paths:
-                if os.path.exists(log_path):
-                    try:
-                        # Obtener fecha de modificación del archivo de log
-                        mod_time = os.path.getmtime(log_path)
-                        last_scan = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_scan'] = last_scan
-                        print(f"   Último escaneo ESET: {last_scan}")
-                        break
-                    except:
-                        pass
-            
-            return scan_info if scan_info else None
+            third_party = []
+            for display_name, version in self._get_installed_programs().items():
+                if _WINDOWS_SERVER_AV_RE.search(display_name):
+                    third_party.append((display_name, version))
+            
+            antivirus_info['third_party_antivirus'] = [name for name, _ in third_party]
+            
+            if third_party:
+                # Instalado; sin SecurityCenter2 no se conoce su estado real
+                name, version = third_party[0]
+                antivirus_info['antivirus_name'] = name
+                antivirus_info['antivirus_version'] = version
+                antivirus_info['protection_status'] = 'installed'
+                log.debug("Antivirus en Windows Server: %s", name)
+            else:
+                defender = self._query_defender_status()
+                if defender:
+                    antivirus_info['antivirus_name'] = 'Windows Defender'
+                    antivirus_info['antivirus_version'] = defender.get('version')
+                    antivirus_info['protection_status'] = 'active' if defender.get('enabled') else 'inactive'
+                    antivirus_info['real_time_protection'] = bool(defender.get('real_time_protection'))
+                    antivirus_info['definitions_up_to_date'] = bool(defender.get('definitions_up_to_date'))
+                    antivirus_info['last_update'] = defender.get('last_update')
+                    antivirus_info['last_scan'] = defender.get('last_scan')
+                else:
+                    antivirus_info['antivirus_name'] = 'None detected'
+                    antivirus_info['protection_status'] = 'none'
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de ESET: {e}")
+            log.error("Error en detección Windows Server: %s", e)
+            antivirus_info['error'] = str(e)
+        
+        antivirus_info['firewall_status'] = self._get_windows_firewall_status()
+        
+        return antivirus_info
+    
+    def _query_defender_status(self) -> Optional[Dict]:
+        """
+        Estado de Microsoft Defender desde MSFT_MpComputerStatus
+        
+        Returns:
+            dict: Estado de Defender o None si el namespace no está disponible
+        """
+        if not _WMI_AVAILABLE:
             return None
-
-
-    def _get_norton_scan_info(self) -> Optional[Dict]:
-        """Obtiene información de escaneo de Norton"""
-        try:
-            scan_info = {}
+        
+        def load():
+            c = self._get_wmi(r"root\Microsoft\Windows\Defender")
+            rows = c.query(
+                "SELECT AMProductVersion, AntivirusEnabled, RealTimeProtectionEnabled, "
+                "AntivirusSignatureAge, AntivirusSignatureLastUpdated, "
+                "QuickScanEndTime, FullScanEndTime FROM MSFT_MpComputerStatus"
+            )
+            if not rows:
+                return None
             
-            # Norton guarda logs en ProgramData
-            log_paths = [
-                r"C:\ProgramData\Norton\{0C55C096-0F1D-4F28-AAA2-85EF591126E7}\NIS_22.0.0.110\Logs",
-                r"C:\ProgramData\Symantec\Symantec Endpoint Protection\CurrentVersion\Data\Logs"
+            status = rows[0]
+            scans = [
+                _wmi_datetime_iso(getattr(status, 'QuickScanEndTime', None)),
+                _wmi_datetime_iso(getattr(status, 'FullScanEndTime', None)),
             ]
+            signature_age = getattr(status, 'AntivirusSignatureAge', None)
             
-            for log_dir in log_paths:
-                if os.path.exists(log_dir):
-                    try:
-                        # Buscar el archivo de log más reciente
-                        log_files = [f for f in os.listdir(log_dir) if f.endswith('.log')]
-                        if log_files:
-                            latest_log = max([os.path.join(log_dir, f) for f in log_files], 
-                                        key=os.path.getmtime)
-                            mod_time = os.path.getmtime(latest_log)
-                            last_scan = datetime.fromtimestamp(mod_time).isoformat()
-                            scan_info['last_scan'] = last_scan
-                            print(f"   Último escaneo Norton: {last_scan}")
-                            break
-                    except:
-                        pass
-            
-            return scan_info if scan_info else None
+            return {
+                'version': getattr(status, 'AMProductVersion', None),
+                'enabled': bool(getattr(status, 'AntivirusEnabled', False)),
+                'real_time_protection': bool(getattr(status, 'RealTimeProtectionEnabled', False)),
+                # Defender considera desactualizadas las firmas con más de 7 días
+                'definitions_up_to_date': signature_age is not None and signature_age <= 7,
+                'last_update': _wmi_datetime_iso(getattr(status, 'AntivirusSignatureLastUpdated', None)),
+                'last_scan': max((scan for scan in scans if scan), default=None)
+            }
         
+        try:
+            return self._cached('Defender:MSFT_MpComputerStatus', load)
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de Norton: {e}")
+            log.debug("MSFT_MpComputerStatus no disponible: %s", e)
             return None
-
-
-    def _get_avast_scan_info(self) -> Optional[Dict]:
-        """Obtiene información de escaneo de Avast"""
-        try:
-            scan_info = {}
-            
-            # Avast guarda información en ProgramData
-            log_path = r"C:\ProgramData\AVAST Software\Avast\report\FileSystemShield.txt"
-            
-            if os.path.exists(log_path):
-                try:
-                    mod_time = os.path.getmtime(log_path)
-                    last_update = datetime.fromtimestamp(mod_time).isoformat()
-                    scan_info['last_update'] = last_update
-                    print(f"   Última actualización Avast: {last_update}")
-                except:
-                    pass
-            
-            # Buscar archivo de base de datos de virus
-            db_path = r"C:\ProgramData\AVAST Software\Avast\defs"
-            if os.path.exists(db_path):
-                try:
-                    mod_time = os.path.getmtime(db_path)
-                    last_update = datetime.fromtimestamp(mod_time).isoformat()
-                    scan_info['last_update'] = last_update
-                except:
-                    pass
-            
-            return scan_info if scan_info else None
+    
+    @staticmethod
+    def _read_defender_registry() -> Optional[Dict]:
+        """
+        Estado de Microsoft Defender leído del registro (_DEFENDER_REG_KEY)
         
-        except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de Avast: {e}")
+        Returns:
+            dict: real_time_protection, signature_version, last_update y
+            last_scan, o None si la clave de Defender no existe
+        """
+        signature_version = _read_hklm_value(
+            _DEFENDER_REG_KEY + r'\Signature Updates', 'AVSignatureVersion'
+        )
+        last_update = _filetime_iso(_read_hklm_value(
+            _DEFENDER_REG_KEY + r'\Signature Updates', 'SignaturesLastUpdated'
+        ))
+        if signature_version is None and last_update is None:
             return None
-
-
-    def _get_avg_scan_info(self) -> Optional[Dict]:
-        """Obtiene información de escaneo de AVG"""
+        
+        # Sin DisableRealtimeMonitoring la protección en tiempo real está activa
+        disabled = _read_hklm_value(
+            _DEFENDER_REG_KEY + r'\Real-Time Protection', 'DisableRealtimeMonitoring'
+        )
+        
+        return {
+            'real_time_protection': not disabled,
+            'signature_version': signature_version,
+            'last_update': last_update,
+            'last_scan': _filetime_iso(_read_hklm_value(_DEFENDER_REG_KEY + r'\Scan', 'LastScanRun'))
+        }
+    
+    # ═══════════════════════════════════════════════════════════
+    # WINDOWS - Cache de WMI y registro
+    # ═══════════════════════════════════════════════════════════
+    
+    def _cached(self, cache_key: str, loader: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado para cache_key o lo recalcula si expiró"""
+        now = time.monotonic()
+        
+        with self._wmi_lock:
+            cached = self._wmi_cache.get(cache_key)
+            if cached and now - cached[0] < self._WMI_CACHE_TTL:
+                return cached[1]
+        
+        value = loader()
+        
+        with self._wmi_lock:
+            self._wmi_cache[cache_key] = (now, value)
+        
+        return value
+    
+    def _get_wmi(self, namespace: str = "root/SecurityCenter2"):
+        """Devuelve una conexión WMI reutilizable (por hilo) para el namespace"""
+        connections = getattr(self._wmi_local, 'connections', None)
+        if connections is None:
+            connections = self._wmi_local.connections = {}
+        
+        connection = connections.get(namespace)
+        if connection is None:
+            connection = connections[namespace] = wmi.WMI(namespace=namespace)
+        return connection
+    
+    def _com_call(self, func: Callable, *args) -> Any:
+        """
+        Ejecuta func(*args) en un hilo worker con COM inicializado
+        
+        Las conexiones WMI creadas en el hilo se liberan antes de
+        CoUninitialize para no dejar objetos COM huérfanos.
+        """
+        if pythoncom is None:
+            return func(*args)
+        
+        pythoncom.CoInitialize()
         try:
-            scan_info = {}
-            
-            # AVG es similar a Avast
-            db_path = r"C:\ProgramData\AVG\Antivirus\defs"
-            
-            if os.path.exists(db_path):
-                try:
-                    mod_time = os.path.getmtime(db_path)
-                    last_update = datetime.fromtimestamp(mod_time).isoformat()
-                    scan_info['last_update'] = last_update
-                    print(f"   Última actualización AVG: {last_update}")
-                except:
-                    pass
-            
-            return scan_info if scan_info else None
+            return func(*args)
+        finally:
+            self._wmi_local.__dict__.pop('connections', None)
+            pythoncom.CoUninitialize()
+    
+    def _query_av_products(self) -> List[Dict]:
+        """
+        Productos antivirus de SecurityCenter2 como dicts planos
+        
+        Se copian los atributos para no volver a cruzar COM en llamadas
+        posteriores; el resultado se cachea durante _WMI_CACHE_TTL segundos.
+        """
+        def load():
+            c = self._get_wmi()
+            # Solo las columnas necesarias: menos datos cruzando DCOM
+            rows = c.query(
+                "SELECT displayName, productState, instanceGuid, pathToSignedProductExe "
+                "FROM AntiVirusProduct WHERE displayName IS NOT NULL"
+            )
+            return [
+                {
+                    'name': av.displayName,
+                    'state': av.productState,
+                    'path': getattr(av, 'pathToSignedProductExe', None),
+                    'guid': av.instanceGuid,
+                    # Windows/Microsoft Defender: se etiqueta una sola vez
+                    'is_defender': 'Defender' in av.displayName
+                }
+                for av in rows
+            ]
         
+        return self._cached('SecurityCenter2:AntiVirusProduct', load)
+    
+    def _query_firewall_products(self) -> List[str]:
+        """Nombres de los productos firewall registrados en SecurityCenter2"""
+        def load():
+            c = self._get_wmi()
+            # El filtro se evalúa en el proveedor WMI: sin filas vacías por DCOM
+            rows = c.query("SELECT displayName FROM FirewallProduct WHERE displayName IS NOT NULL")
+            return [fw.displayName for fw in rows]
+        
+        return self._cached('SecurityCenter2:FirewallProduct', load)
+    
+    def _query_win32_product_version(self, name: str) -> Optional[str]:
+        """
+        Versión de un producto según Win32_Product (opt-in, muy lento)
+        
+        Solo se llama con enable_win32_product=True.
+        """
+        try:
+            c = self._get_wmi("root/cimv2")
+            escaped = name.replace("\\", "\\\\").replace("'", "\\'")
+            rows = c.query(f"SELECT Version FROM Win32_Product WHERE Name LIKE '%{escaped}%'")
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de AVG: {e}")
+            log.debug("Win32_Product no disponible: %s", e)
             return None
-
-
-    def _get_kaspersky_scan_info(self) -> Optional[Dict]:
-        """Obtiene información de escaneo de Kaspersky"""
-        try:
-            scan_info = {}
-            
-            # Kaspersky guarda información en ProgramData
-            log_paths = [
-                r"C:\ProgramData\Kaspersky Lab\AVP21.3\Data\Updater\UpdateInfo.txt",
-                r"C:\ProgramData\Kaspersky Lab\KES\Data\Bases"
-            ]
+        
+        return next((row.Version for row in rows if row.Version), None)
+    
+    def _get_installed_programs(self) -> Dict[str, Optional[str]]:
+        """
+        Programas instalados según las claves Uninstall del registro
+        
+        Returns:
+            dict: DisplayName → DisplayVersion
+        """
+        def load():
+            programs = {}
+            if winreg is None:
+                return programs
             
-            for path in log_paths:
-                if os.path.exists(path):
-                    try:
-                        mod_time = os.path.getmtime(path)
-                        last_update = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_update'] = last_update
-                        print(f"   Última actualización Kaspersky: {last_update}")
-                        break
-                    except:
-                        pass
+            for key_path in _UNINSTALL_KEYS:
+                try:
+                    key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path)
+                except OSError:
+                    continue
+                
+                with key:
+                    for i in range(winreg.QueryInfoKey(key)[0]):
+                        try:
+                            with winreg.OpenKey(key, winreg.EnumKey(key, i)) as subkey:
+                                name, _ = winreg.QueryValueEx(subkey, 'DisplayName')
+                                try:
+                                    version, _ = winreg.QueryValueEx(subkey, 'DisplayVersion')
+                                except OSError:
+                                    version = None
+                                programs.setdefault(name, version)
+                        except OSError:
+                            continue
             
-            return scan_info if scan_info else None
+            return programs
+        
+        return self._cached('registry:Uninstall', load)
+    
+    def _get_windows_defender_scan_info(self) -> Optional[Dict]:
+        """
+        Obtiene información de escaneo de Windows Defender
+        
+        Se consulta MSFT_MpComputerStatus por WMI y, si el namespace de
+        Defender no está disponible, su clave del registro; PowerShell (cuyo
+        arranque domina el tiempo de recopilación) es el último recurso.
+        
+        Returns:
+            dict: Información de último escaneo y actualización, o None si falla
+        """
+        defender = self._query_defender_status()
+        if defender is None:
+            defender = self._read_defender_registry()
+        if defender is not None:
+            return {
+                key: defender[key]
+                for key in ('last_update', 'last_scan')
+                if defender.get(key)
+            }
         
-        except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de Kaspersky: {e}")
-            return None
-
-
-    def _get_mcafee_scan_info(self) -> Optional[Dict]:
-        """Obtiene información de escaneo de McAfee"""
         try:
-            scan_info = {}
-            
-            # McAfee guarda logs en ProgramData
-            log_path = r"C:\ProgramData\McAfee\DesktopProtection"
-            
-            if os.path.exists(log_path):
-                try:
-                    mod_time = os.path.getmtime(log_path)
-                    last_update = datetime.fromtimestamp(mod_time).isoformat()
-                    scan_info['last_update'] = last_update
-                    print(f"   Última actualización McAfee: {last_update}")
-                except:
-                    pass
+            # Ejecutar PowerShell para obtener información de Windows Defender
+            output = self._run_ps(
+                'Get-MpComputerStatus | Select-Object AntivirusSignatureLastUpdated, FullScanEndTime, QuickScanEndTime | ConvertTo-Json'
+            )
             
-            return scan_info if scan_info else None
+            if output:
+                data = json.loads(output)
+                
+                scan_info = {}
+                
+                # Última actualización de definiciones
+                if data.get('AntivirusSignatureLastUpdated'):
+                    scan_info['last_update'] = data['AntivirusSignatureLastUpdated']
+                    log.debug("Última actualización: %s", scan_info['last_update'])
+                
+                # Último escaneo (usar el más reciente entre completo y rápido)
+                full_scan = data.get('FullScanEndTime')
+                quick_scan = data.get('QuickScanEndTime')
+                
+                if full_scan and quick_scan:
+                    # Comparar y usar el más reciente
+                    scan_info['last_scan'] = max(full_scan, quick_scan)
+                elif full_scan:
+                    scan_info['last_scan'] = full_scan
+                elif quick_scan:
+                    scan_info['last_scan'] = quick_scan
+                
+                if scan_info.get('last_scan'):
+                    log.debug("Último escaneo: %s", scan_info['last_scan'])
+                
+                return scan_info
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de McAfee: {e}")
+            log.warning("No se pudo obtener info de escaneo de Defender: %s", e)
             return None
+    
 
+# ═══════════════════════════════════════════════════════════
+# MÉTODOS ESPECÍFICOS POR ANTIVIRUS - WINDOWS
+# ═══════════════════════════════════════════════════════════
 
-    def _get_bitdefender_scan_info(self) -> Optional[Dict]:
-        """Obtiene información de escaneo de Bitdefender"""
+    def _scan_by_vendor(self, vendor: str) -> Optional[Dict]:
+        """
+        Obtiene last_update/last_scan según la entrada de _WINDOWS_VENDOR_TABLE
+        
+        En cada grupo de rutas gana la primera que existe.
+        """
+        spec = _WINDOWS_VENDOR_TABLE[vendor]
+        scan_info = {}
+        
         try:
-            scan_info = {}
-            
-            # Bitdefender guarda información en ProgramData
-            log_paths = [
-                r"C:\ProgramData\Bitdefender\Desktop\Profiles\Logs",
-                r"C:\Program Files\Bitdefender\Bitdefender Security\Antivirus_##########\Profiles\Logs"
-            ]
+            for key_path, value_name in spec.get('registry', ()):
+                value = _read_hklm_value(key_path, value_name)
+                if value:
+                    scan_info['last_update'] = value
+                    break
+            
+            if 'last_update' not in scan_info:
+                last_update = self._first_mtime_iso(spec.get('update_paths', ()))
+                if last_update:
+                    scan_info['last_update'] = last_update
             
-            for log_dir in log_paths:
-                if os.path.exists(log_dir):
-                    try:
-                        mod_time = os.path.getmtime(log_dir)
-                        last_update = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_update'] = last_update
-                        print(f"   Última actualización Bitdefender: {last_update}")
+            last_scan = self._first_mtime_iso(spec.get('scan_paths', ()))
+            if not last_scan:
+                for log_dir in spec.get('scan_log_dirs', ()):
+                    mod_time = self._latest_mtime(log_dir, '.log')
+                    if mod_time is not None:
+                        last_scan = _iso(int(mod_time))
                         break
-                    except:
-                        pass
-            
-            return scan_info if scan_info else None
+            if last_scan:
+                scan_info['last_scan'] = last_scan
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de Bitdefender: {e}")
+            log.warning("Error obteniendo info de %s: %s", vendor, e)
             return None
+        
+        log.debug("Información de escaneo %s: %s", vendor, scan_info)
+        return scan_info if scan_info else None
+    
+    def _first_mtime_iso(self, paths) -> Optional[str]:
+        """Fecha de modificación (ISO) de la primera ruta existente"""
+        for path in paths:
+            mod_time = self._mtime_iso(path)
+            if mod_time:
+                return mod_time
+        return None
 
 
     def _get_generic_antivirus_scan_info(self, av_product: Dict) -> Optional[Dict]:
@@ -546,34 +1694,80 @@ class AntivirusCollector:
             if os.path.exists(programdata_path):
                 search_dirs.append(programdata_path)
             
-            # Buscar archivos de definiciones o logs
+            # Buscar carpetas de definiciones o logs
             for search_dir in search_dirs:
-                try:
-                    for root, dirs, files in os.walk(search_dir):
-                        # Buscar carpetas con nombres como: defs, definitions, signatures, updates
-                        for dirname in dirs:
-                            if any(keyword in dirname.lower() for keyword in ['def', 'sig', 'update', 'virus']):
-                                def_path = os.path.join(root, dirname)
-                                try:
-                                    mod_time = os.path.getmtime(def_path)
-                                    last_update = datetime.fromtimestamp(mod_time).isoformat()
-                                    scan_info['last_update'] = last_update
-                                    print(f"   Última actualización (genérico): {last_update}")
-                                    return scan_info
-                                except:
-                                    pass
-                        
-                        # Limitar la profundidad de búsqueda
-                        if root.count(os.sep) - search_dir.count(os.sep) > 2:
-                            break
-                except:
-                    pass
+                mod_time = self._find_definitions_mtime(search_dir)
+                if mod_time is not None:
+                    last_update = _iso(int(mod_time))
+                    scan_info['last_update'] = last_update
+                    log.debug("Última actualización (genérico): %s", last_update)
+                    return scan_info
             
             return scan_info if scan_info else None
         
         except Exception as e:
-            print(f"   ⚠️  Error en detección genérica: {e}")
+            log.warning("Error en detección genérica: %s", e)
             return None
+    
+    @staticmethod
+    def _latest_mtime(directory: str, suffix: str) -> Optional[float]:
+        """
+        mtime del archivo más reciente con la extensión dada en directory
+        
+        Un solo os.scandir y un stat por archivo, sin volver a consultar
+        el ganador.
+        
+        Returns:
+            float: mtime más reciente o None si no hay archivos
+        """
+        latest = None
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(suffix):
+                        continue
+                    try:
+                        mod_time = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if latest is None or mod_time > latest:
+                        latest = mod_time
+        except OSError:
+            return None
+        
+        return latest
+    
+    @staticmethod
+    def _find_definitions_mtime(search_dir: str) -> Optional[float]:
+        """
+        Busca en anchura una carpeta de definiciones bajo search_dir
+        
+        Usa os.scandir (el tipo de entrada viene del propio listado) y no
+        desciende más de _GENERIC_SCAN_MAX_DEPTH niveles.
+        
+        Returns:
+            float: mtime de la primera carpeta que coincide o None
+        """
+        pending = deque([(search_dir, 0)])
+        
+        while pending:
+            path, depth = pending.popleft()
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        
+                        # Carpetas con nombres como: defs, definitions, signatures, updates
+                        if _GENERIC_KEYWORD_RE.search(entry.name):
+                            return entry.stat(follow_symlinks=False).st_mtime
+                        
+                        if depth < _GENERIC_SCAN_MAX_DEPTH:
+                            pending.append((entry.path, depth + 1))
+            except OSError:
+                continue
+        
+        return None
 
 
 
@@ -590,53 +1784,25 @@ class AntivirusCollector:
         antivirus_info['detection_method'] = 'Process and Application scanning'
         
         detected = []
+        seen_names = set()
+        
+        # Subdetectores independientes en paralelo: procesos, firewall y
+        # aplicaciones instaladas; XProtect se comprueba mientras tanto
+        ps_future = BaseCollector.submit(self._timed_call, 'macos.processes', self._get_process_names)
+        firewall_future = BaseCollector.submit(self._timed_call, 'macos.firewall', _macos_firewall_state)
+        apps_future = BaseCollector.submit(self._timed_call, 'macos.apps', self._macos_installed_apps)
+        
+        xprotect_detected = _exists(_XPROTECT_PATH)
         
         # ═══════════════════════════════════════════════════════════
         # MÉTODO 1: VERIFICAR APLICACIONES INSTALADAS (MÁS CONFIABLE)
         # ═══════════════════════════════════════════════════════════
         
-        # Lista de aplicaciones específicas de antivirus
-        known_apps = {
-            'ESET Cyber Security.app': ('ESET Cyber Security', 'ESET'),
-            'ESET Endpoint Antivirus.app': ('ESET Endpoint Antivirus', 'ESET'),
-            'Malwarebytes.app': ('Malwarebytes', 'Malwarebytes'),
-            'Avast Security.app': ('Avast Security', 'Avast Software'),
-            'AVG AntiVirus.app': ('AVG Antivirus', 'AVG Technologies'),
-            'Bitdefender Antivirus.app': ('Bitdefender Antivirus', 'Bitdefender'),
-            'Sophos Home.app': ('Sophos Home', 'Sophos'),
-            'Kaspersky Internet Security.app': ('Kaspersky Internet Security', 'Kaspersky'),
-            'Norton 360.app': ('Norton 360', 'NortonLifeLock'),
-            'F-Secure SAFE.app': ('F-Secure', 'F-Secure'),
-            'Intego Mac Internet Security.app': ('Intego VirusBarrier', 'Intego'),
-            'VirusBarrier X9.app': ('Intego VirusBarrier', 'Intego'),
-            'Webroot SecureAnywhere.app': ('Webroot SecureAnywhere', 'Webroot'),
-        }
-        
-        app_paths = ['/Applications', os.path.expanduser('~/Applications')]
-        
-        print("\n🔍 Verificando aplicaciones instaladas...")
-        
-        for app_path in app_paths:
-            if os.path.exists(app_path):
-                try:
-                    apps = os.listdir(app_path)
-                    
-                    for app_name, (full_name, vendor) in known_apps.items():
-                        if app_name in apps:
-                            full_path = os.path.join(app_path, app_name)
-                            
-                            # Verificar que sea una aplicación real (no solo una carpeta)
-                            if os.path.isdir(full_path) and full_path.endswith('.app'):
-                                detected.append({
-                                    'name': full_name,
-                                    'vendor': vendor,
-                                    'detection_method': 'Installed application',
-                                    'app_path': full_path,
-                                    'is_builtin': False
-                                })
-                                print(f"   ✅ Aplicación encontrada: {app_name}")
-                except Exception as e:
-                    print(f"⚠️  Error verificando {app_path}: {e}")
+        for av in apps_future.result():
+            if av['name'] in seen_names:
+                continue
+            seen_names.add(av['name'])
+            detected.append(av)
         
         # ═══════════════════════════════════════════════════════════
         # MÉTODO 2: VERIFICAR PROCESOS (SOLO SI LA APP EXISTE)
@@ -644,69 +1810,51 @@ class AntivirusCollector:
         
         # Solo verificar procesos si ya detectamos alguna aplicación
         if detected:
-            print("\n🔍 Verificando procesos en ejecución...")
-            
-            process_patterns = {
-                'esets_daemon': 'ESET Cyber Security',
-                'esets_gui': 'ESET Cyber Security',
-                'MalwarebytesDaemon': 'Malwarebytes',
-                'AvastSecurityAgent': 'Avast Security',
-                'com.avast.daemon': 'Avast Security',
-                'AVGAgent': 'AVG Antivirus',
-                'SophosScanD': 'Sophos Home',
-                'sophossxld': 'Sophos Home',
-                'KasperskyAV': 'Kaspersky Internet Security',
-            }
+            log.debug("Verificando procesos en ejecución...")
             
             try:
-                result = subprocess.run(['ps', 'aux'], capture_output=True, text=True, timeout=5)
-                processes = result.stdout
+                processes = ps_future.result()
+                running = {}
+                for token in self._find_matches(_MACOS_PROCESS_RE, processes or ''):
+                    running.setdefault(_MACOS_PROCESS_LOOKUP[token], token)
                 
                 # Marcar qué antivirus están corriendo
                 for av in detected:
-                    for process_pattern, av_name in process_patterns.items():
-                        if av['name'] == av_name and process_pattern in processes:
-                            av['is_running'] = True
-                            print(f"   ✅ Proceso activo detectado: {process_pattern} → {av_name}")
-                            break
+                    process_name = running.get(av['name'])
+                    if process_name:
+                        av['is_running'] = True
+                        log.debug("Proceso activo detectado: %s → %s", process_name, av['name'])
             except Exception as e:
-                print(f"⚠️  Error verificando procesos: {e}")
+                log.warning("Error verificando procesos: %s", e)
         
         # ═══════════════════════════════════════════════════════════
         # XPROTECT (NATIVO DE macOS)
         # ═══════════════════════════════════════════════════════════
         
-        xprotect_path = '/System/Library/CoreServices/XProtect.bundle'
-        xprotect_detected = False
-        
-        if os.path.exists(xprotect_path):
-            xprotect_detected = True
+        if xprotect_detected:
             detected.append({
                 'name': 'XProtect',
                 'vendor': 'Apple',
                 'detection_method': 'Built-in macOS protection',
-                'app_path': xprotect_path,
+                'app_path': _XPROTECT_PATH,
                 'is_builtin': True
             })
-            print(f"\n✅ XProtect (nativo de macOS) detectado")
+            log.debug("XProtect (nativo de macOS) detectado")
         
         # ═══════════════════════════════════════════════════════════
         # RESUMEN DE DETECCIÓN
         # ═══════════════════════════════════════════════════════════
         
-        print(f"\n{'='*70}")
-        print(f"🛡️  ANTIVIRUS DETECTADOS EN macOS: {len(detected)}")
-        print(f"{'='*70}")
-        
-        if detected:
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Antivirus detectados en macOS: %d", len(detected))
             for av in detected:
-                builtin_tag = " [NATIVO]" if av.get('is_builtin') else " [TERCEROS]"
-                running_tag = " 🟢 ACTIVO" if av.get('is_running') else ""
-                print(f"   - {av['name']} ({av.get('vendor', 'Unknown')}){builtin_tag}{running_tag}")
-        else:
-            print(f"   ⚠️  No se detectaron productos antivirus")
-        
-        print(f"{'='*70}\n")
+                log.debug(
+                    "  - %s (%s)%s%s",
+                    av['name'],
+                    av.get('vendor', 'Unknown'),
+                    " [NATIVO]" if av.get('is_builtin') else " [TERCEROS]",
+                    " [ACTIVO]" if av.get('is_running') else ""
+                )
         
         # ═══════════════════════════════════════════════════════════
         # DETERMINAR ANTIVIRUS PRINCIPAL
@@ -730,32 +1878,24 @@ class AntivirusCollector:
                 antivirus_info['protection_status'] = 'installed'
                 antivirus_info['real_time_protection'] = False
             
-            print(f"✅ Usando antivirus principal: {primary_av['name']}")
-            print(f"   Estado: {antivirus_info['protection_status']}")
-            print(f"   Protección en tiempo real: {antivirus_info['real_time_protection']}")
+            log.debug(
+                "Usando antivirus principal: %s (estado: %s, tiempo real: %s)",
+                primary_av['name'],
+                antivirus_info['protection_status'],
+                antivirus_info['real_time_protection']
+            )
             
             # Obtener información de escaneo según el antivirus
-            av_name = primary_av['name']
-            scan_info = None
-            
-            if 'ESET' in av_name:
-                scan_info = self._get_eset_macos_info()
-            elif 'Malwarebytes' in av_name:
-                scan_info = self._get_malwarebytes_macos_info()
-            elif 'Sophos' in av_name:
-                scan_info = self._get_sophos_macos_info()
-            elif 'Avast' in av_name or 'AVG' in av_name:
-                scan_info = self._get_avast_macos_info()
-            else:
-                scan_info = self._get_generic_macos_antivirus_info(primary_av)
+            with self._timed('macos.scan_info'):
+                scan_info = self._get_macos_scan_info(primary_av)
             
             if scan_info:
-                if scan_info.get('last_scan'):
-                    antivirus_info['last_scan'] = scan_info['last_scan']
-                if scan_info.get('last_update'):
-                    antivirus_info['last_update'] = scan_info['last_update']
-                if scan_info.get('definitions_up_to_date') is not None:
-                    antivirus_info['definitions_up_to_date'] = scan_info['definitions_up_to_date']
+                if scan_info.last_scan:
+                    antivirus_info['last_scan'] = scan_info.last_scan
+                if scan_info.last_update:
+                    antivirus_info['last_update'] = scan_info.last_update
+                if scan_info.definitions_up_to_date is not None:
+                    antivirus_info['definitions_up_to_date'] = scan_info.definitions_up_to_date
         
         elif xprotect_detected:
             # Solo XProtect (nativo)
@@ -764,68 +1904,104 @@ class AntivirusCollector:
             antivirus_info['real_time_protection'] = True
             antivirus_info['third_party_antivirus'] = []
             
-            print(f"✅ Usando XProtect (no hay antivirus de terceros instalados)")
+            log.debug("Usando XProtect (no hay antivirus de terceros instalados)")
             
             # Obtener información de XProtect
             xprotect_info = self._get_xprotect_info()
             if xprotect_info:
-                antivirus_info['last_update'] = xprotect_info.get('last_update')
+                antivirus_info['last_update'] = xprotect_info.last_update
         
         else:
             antivirus_info['antivirus_name'] = 'None detected'
             antivirus_info['protection_status'] = 'none'
             antivirus_info['third_party_antivirus'] = []
-            print(f"⚠️  No se detectaron productos antivirus instalados")
+            log.debug("No se detectaron productos antivirus instalados")
         
         # ═══════════════════════════════════════════════════════════
         # FIREWALL DE macOS
         # ═══════════════════════════════════════════════════════════
         
-        try:
-            result = subprocess.run(
-                ['defaults', 'read', '/Library/Preferences/com.apple.alf', 'globalstate'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            fw_state = result.stdout.strip()
-            antivirus_info['firewall_status'] = 'active' if fw_state != '0' else 'inactive'
-        except:
-            antivirus_info['firewall_status'] = 'unknown'
+        antivirus_info['firewall_status'] = firewall_future.result()
         
         return antivirus_info
     
-    def _get_xprotect_info(self) -> Optional[Dict]:
+    def _macos_installed_apps(self) -> List[Dict]:
+        """Aplicaciones de antivirus conocidas en /Applications y ~/Applications"""
+        app_paths = ['/Applications', os.path.expanduser('~/Applications')]
+        
+        log.debug("Verificando aplicaciones instaladas...")
+        
+        # Una sola pasada por directorio: cada entrada se compara con la
+        # alternancia compilada y DirEntry evita un stat() extra por carpeta
+        found_apps = {}
+        for app_path in app_paths:
+            try:
+                with os.scandir(app_path) as entries:
+                    for entry in entries:
+                        match = _MACOS_AV_RE.fullmatch(entry.name)
+                        if not match:
+                            continue
+                        
+                        key = match.group(1).lower()
+                        
+                        # Verificar que sea una aplicación real (no solo una carpeta)
+                        if key in _MACOS_AV_KEYS_LOWER and entry.is_dir():
+                            found_apps.setdefault(key, entry.path)
+                            log.debug("Aplicación encontrada: %s", entry.name)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                log.warning("Error verificando %s: %s", app_path, e)
+        
+        # Mismo orden de prioridad que la tabla de aplicaciones conocidas
+        apps = []
+        for key in sorted(found_apps, key=_MACOS_AV_RANK.__getitem__):
+            full_name, vendor = _MACOS_AV_LOOKUP[key]
+            apps.append({
+                'name': full_name,
+                'vendor': vendor,
+                'detection_method': 'Installed application',
+                'app_path': found_apps[key],
+                'is_builtin': False
+            })
+        
+        return apps
+    
+    def _get_macos_scan_info(self, av_info: Dict) -> Optional[ScanInfo]:
+        """Obtiene last_scan/last_update con el método específico del vendor"""
+        match = _MACOS_VENDOR_RE.search(av_info['name'])
+        if match:
+            return getattr(self, _MACOS_VENDOR_METHODS[match.group(0)])()
+        
+        # Método genérico para otros antivirus
+        return self._get_generic_macos_antivirus_info(av_info)
+    
+    def _get_xprotect_info(self) -> Optional[ScanInfo]:
         """
         Obtiene información de XProtect de macOS
         
         Returns:
-            dict: Información de XProtect o None si falla
+            ScanInfo: Información de XProtect o None si falla
         """
         try:
             xprotect_plist = '/System/Library/CoreServices/XProtect.bundle/Contents/Resources/XProtect.meta.plist'
             
-            if not os.path.exists(xprotect_plist):
-                return None
-            
             # Obtener fecha de modificación del archivo
-            import datetime
-            mod_time = os.path.getmtime(xprotect_plist)
-            last_update = datetime.datetime.fromtimestamp(mod_time).isoformat()
+            last_update = self._mtime_iso(xprotect_plist)
+            if not last_update:
+                return None
             
-            print(f"   Última actualización de XProtect: {last_update}")
+            log.debug("Última actualización de XProtect: %s", last_update)
             
-            return {
-                'last_update': last_update
-            }
+            return ScanInfo(last_update=last_update)
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de XProtect: {e}")
+            log.warning("Error obteniendo info de XProtect: %s", e)
             return None
-    def _get_malwarebytes_macos_info(self) -> Optional[Dict]:
+    def _get_malwarebytes_macos_info(self) -> Optional[ScanInfo]:
         """Obtiene información de Malwarebytes en macOS"""
         try:
-            scan_info = {}
+            scan_info = ScanInfo()
             
             # Malwarebytes guarda información en Library
             log_paths = [
@@ -833,30 +2009,24 @@ class AntivirusCollector:
                 '/Library/Logs/Malwarebytes'
             ]
             
-            for log_dir in log_paths:
-                if os.path.exists(log_dir):
-                    try:
-                        mod_time = os.path.getmtime(log_dir)
-                        last_update = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_update'] = last_update
-                        print(f"   Última actividad Malwarebytes: {last_update}")
-                        break
-                    except:
-                        pass
+            last_update = self._first_mtime_iso(log_paths)
+            if last_update:
+                scan_info.last_update = last_update
+                log.debug("Última actividad Malwarebytes: %s", last_update)
             
             return scan_info if scan_info else None
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de Malwarebytes: {e}")
+            log.warning("Error obteniendo info de Malwarebytes: %s", e)
             return None
 
 
-    def _get_eset_macos_info(self) -> Optional[Dict]:
+    def _get_eset_macos_info(self) -> Optional[ScanInfo]:
         """Obtiene información de ESET Cyber Security en macOS"""
         try:
-            scan_info = {}
+            scan_info = ScanInfo()
             
-            print("   🔍 Buscando información de ESET...")
+            log.debug("Buscando información de ESET...")
             
             # Ubicaciones donde ESET guarda información en macOS
             eset_paths = [
@@ -867,112 +2037,123 @@ class AntivirusCollector:
                 os.path.expanduser('~/Library/Logs/ESET')
             ]
             
+            # Buscar base de datos de virus
+            virus_db_paths = [
+                '/Library/Application Support/ESET/esets/cache/virusdbs',
+                '/Library/Application Support/com.eset.esets/cache'
+            ]
+            
+            # Preferencias de ESET
+            plist_paths = [
+                os.path.expanduser('~/Library/Preferences/com.eset.esets.plist'),
+                '/Library/Preferences/com.eset.esets.plist'
+            ]
+            
+            # Un solo stat por ruta; se reutiliza en las tres búsquedas
+            all_paths = eset_paths + virus_db_paths + plist_paths
+            stats = {path: self._stat_or_none(path) for path in all_paths}
+            
             # Buscar carpeta de logs
             for eset_path in eset_paths:
-                if os.path.exists(eset_path):
-                    print(f"   📁 Encontrado: {eset_path}")
+                eset_stat = stats[eset_path]
+                if eset_stat:
+                    log.debug("Encontrado: %s", eset_path)
                     
                     try:
                         # Obtener fecha de modificación
-                        mod_time = os.path.getmtime(eset_path)
-                        last_activity = datetime.fromtimestamp(mod_time).isoformat()
+                        last_activity = _iso(int(eset_stat.st_mtime))
                         
                         # Si no tenemos last_update aún, usar esta fecha
-                        if not scan_info.get('last_update'):
-                            scan_info['last_update'] = last_activity
+                        if not scan_info.last_update:
+                            scan_info.last_update = last_activity
                         
                         # Buscar archivos específicos dentro
-                        if os.path.isdir(eset_path):
-                            for root, dirs, files in os.walk(eset_path):
-                                for file in files:
-                                    file_lower = file.lower()
-                                    
-                                    # Buscar archivos de actualización o escaneo
-                                    if any(keyword in file_lower for keyword in ['update', 'scan', 'virus', 'signature']):
-                                        file_path = os.path.join(root, file)
-                                        try:
-                                            file_mod_time = os.path.getmtime(file_path)
-                                            file_date = datetime.fromtimestamp(file_mod_time).isoformat()
-                                            
-                                            if 'scan' in file_lower and not scan_info.get('last_scan'):
-                                                scan_info['last_scan'] = file_date
-                                            
-                                            if 'update' in file_lower or 'signature' in file_lower:
-                                                scan_info['last_update'] = file_date
-                                        except:
-                                            pass
-                                
-                                # No buscar demasiado profundo
-                                if root.count(os.sep) - eset_path.count(os.sep) > 2:
-                                    break
+                        if stat.S_ISDIR(eset_stat.st_mode):
+                            self._scan_eset_dir(eset_path, scan_info)
                     except Exception as e:
-                        print(f"   ⚠️  Error procesando {eset_path}: {e}")
-            
-            # Buscar base de datos de virus
-            virus_db_paths = [
-                '/Library/Application Support/ESET/esets/cache/virusdbs',
-                '/Library/Application Support/com.eset.esets/cache'
-            ]
+                        log.warning("Error procesando %s: %s", eset_path, e)
             
             for db_path in virus_db_paths:
-                if os.path.exists(db_path):
+                db_stat = stats[db_path]
+                if db_stat:
                     try:
-                        mod_time = os.path.getmtime(db_path)
-                        db_date = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_update'] = db_date
+                        mod_time = db_stat.st_mtime
+                        db_date = _iso(int(mod_time))
+                        scan_info.last_update = db_date
                         
                         # Verificar si está actualizado (menos de 7 días)
-                        days_old = (datetime.now() - datetime.fromtimestamp(mod_time)).days
-                        scan_info['definitions_up_to_date'] = days_old < 7
+                        days_old = int((time.time() - mod_time) // 86400)
+                        scan_info.definitions_up_to_date = days_old < 7
                         
-                        print(f"   📊 Base de datos encontrada: {db_path}")
-                        print(f"   📅 Última actualización: {db_date} ({days_old} días)")
+                        log.debug("Base de datos encontrada: %s", db_path)
+                        log.debug("Última actualización: %s (%s días)", db_date, days_old)
                         break
                     except Exception as e:
-                        print(f"   ⚠️  Error leyendo base de datos: {e}")
+                        log.warning("Error leyendo base de datos: %s", e)
             
             # Intentar leer preferencias de ESET
-            plist_paths = [
-                os.path.expanduser('~/Library/Preferences/com.eset.esets.plist'),
-                '/Library/Preferences/com.eset.esets.plist'
-            ]
-            
             for plist_path in plist_paths:
-                if os.path.exists(plist_path):
-                    try:
-                        mod_time = os.path.getmtime(plist_path)
-                        plist_date = datetime.fromtimestamp(mod_time).isoformat()
-                        
-                        if not scan_info.get('last_update'):
-                            scan_info['last_update'] = plist_date
-                        
-                        print(f"   ⚙️  Preferencias encontradas: {plist_path}")
-                    except:
-                        pass
+                plist_stat = stats[plist_path]
+                if plist_stat:
+                    if not scan_info.last_update:
+                        scan_info.last_update = _iso(int(plist_stat.st_mtime))
+                    
+                    log.debug("Preferencias encontradas: %s", plist_path)
             
             if scan_info:
-                print(f"   ✅ Información de ESET obtenida:")
-                if scan_info.get('last_update'):
-                    print(f"      - Última actualización: {scan_info['last_update']}")
-                if scan_info.get('last_scan'):
-                    print(f"      - Último escaneo: {scan_info['last_scan']}")
-                if scan_info.get('definitions_up_to_date') is not None:
-                    print(f"      - Definiciones actualizadas: {scan_info['definitions_up_to_date']}")
+                log.debug("Información de ESET obtenida: %s", scan_info)
             else:
-                print(f"   ⚠️  No se pudo obtener información detallada de ESET")
+                log.debug("No se pudo obtener información detallada de ESET")
             
             return scan_info if scan_info else None
         
-        except Exception as e:
-            print(f"   ❌ Error obteniendo info de ESET: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error obteniendo info de ESET")
             return None
 
-    def _get_sophos_macos_info(self) -> Optional[Dict]:
+    @staticmethod
+    def _scan_eset_dir(eset_path: str, scan_info: ScanInfo) -> None:
+        """
+        Busca en anchura archivos de escaneo/actualización de ESET
+        
+        Usa os.scandir: el tipo de entrada viene del listado y cada archivo
+        que coincide se consulta con un único stat. No desciende más de
+        _ESET_WALK_MAX_DEPTH niveles ni entra en carpetas ocultas.
+        """
+        pending = deque([(eset_path, 0)])
+        
+        while pending:
+            path, depth = pending.popleft()
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if depth < _ESET_WALK_MAX_DEPTH and not entry.name.startswith('.'):
+                                pending.append((entry.path, depth + 1))
+                            continue
+                        
+                        # Una pasada de regex clasifica el nombre
+                        kinds = {m.lastindex for m in _ESET_KW_RE.finditer(entry.name)}
+                        if not kinds:
+                            continue
+                        
+                        try:
+                            file_date = _iso(int(entry.stat(follow_symlinks=False).st_mtime))
+                        except OSError:
+                            continue
+                        
+                        if _ESET_KW_SCAN in kinds and not scan_info.last_scan:
+                            scan_info.last_scan = file_date
+                        
+                        if _ESET_KW_UPDATE in kinds:
+                            scan_info.last_update = file_date
+            except OSError:
+                continue
+    
+    def _get_sophos_macos_info(self) -> Optional[ScanInfo]:
         """Obtiene información de Sophos en macOS"""
         try:
-            scan_info = {}
+            scan_info = ScanInfo()
             
             # Sophos guarda logs en Library
             log_paths = [
@@ -980,28 +2161,22 @@ class AntivirusCollector:
                 os.path.expanduser('~/Library/Logs/Sophos')
             ]
             
-            for log_dir in log_paths:
-                if os.path.exists(log_dir):
-                    try:
-                        mod_time = os.path.getmtime(log_dir)
-                        last_update = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_update'] = last_update
-                        print(f"   Última actualización Sophos: {last_update}")
-                        break
-                    except:
-                        pass
+            last_update = self._first_mtime_iso(log_paths)
+            if last_update:
+                scan_info.last_update = last_update
+                log.debug("Última actualización Sophos: %s", last_update)
             
             return scan_info if scan_info else None
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de Sophos: {e}")
+            log.warning("Error obteniendo info de Sophos: %s", e)
             return None
 
 
-    def _get_avast_macos_info(self) -> Optional[Dict]:
+    def _get_avast_macos_info(self) -> Optional[ScanInfo]:
         """Obtiene información de Avast/AVG en macOS"""
         try:
-            scan_info = {}
+            scan_info = ScanInfo()
             
             # Avast guarda información en Library
             db_paths = [
@@ -1009,28 +2184,22 @@ class AntivirusCollector:
                 '/Library/Application Support/AVG/config'
             ]
             
-            for db_path in db_paths:
-                if os.path.exists(db_path):
-                    try:
-                        mod_time = os.path.getmtime(db_path)
-                        last_update = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_update'] = last_update
-                        print(f"   Última actualización: {last_update}")
-                        break
-                    except:
-                        pass
+            last_update = self._first_mtime_iso(db_paths)
+            if last_update:
+                scan_info.last_update = last_update
+                log.debug("Última actualización: %s", last_update)
             
             return scan_info if scan_info else None
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de Avast: {e}")
+            log.warning("Error obteniendo info de Avast: %s", e)
             return None
 
 
-    def _get_generic_macos_antivirus_info(self, av_info: Dict) -> Optional[Dict]:
+    def _get_generic_macos_antivirus_info(self, av_info: Dict) -> Optional[ScanInfo]:
         """Método genérico para antivirus de macOS"""
         try:
-            scan_info = {}
+            scan_info = ScanInfo()
             
             # Buscar en ubicaciones comunes de logs
             log_bases = [
@@ -1042,26 +2211,21 @@ class AntivirusCollector:
             
             av_name = av_info['name'].split()[0]  # Primera palabra
             
-            for log_base in log_bases:
-                av_log_path = os.path.join(log_base, av_name)
-                if os.path.exists(av_log_path):
-                    try:
-                        mod_time = os.path.getmtime(av_log_path)
-                        last_update = datetime.fromtimestamp(mod_time).isoformat()
-                        scan_info['last_update'] = last_update
-                        print(f"   Última actualización (genérico): {last_update}")
-                        return scan_info
-                    except:
-                        pass
+            last_update = self._first_mtime_iso(
+                os.path.join(log_base, av_name) for log_base in log_bases
+            )
+            if last_update:
+                scan_info.last_update = last_update
+                log.debug("Última actualización (genérico): %s", last_update)
             
             return scan_info if scan_info else None
         
         except Exception as e:
-            print(f"   ⚠️  Error en detección genérica macOS: {e}")
+            log.warning("Error en detección genérica macOS: %s", e)
             return None
 
 
-    def _decode_antivirus_state(self, product_state: int) -> Dict[str, any]:
+    def _decode_antivirus_state(self, product_state: int) -> AVState:
         """
         Decodifica el productState de Windows Security Center
         
@@ -1077,44 +2241,24 @@ class AntivirusCollector:
         - 397312 (0x061000): producto=0x6 (ON), definiciones=0x1 (OUT OF DATE)
         - 266240 (0x041000): producto=0x4 (ON), definiciones=0x1 (OUT OF DATE)
         - 393216 (0x060000): producto=0x6 (ON), definiciones=0x0 (UP TO DATE)
-        """
-        
-        state_info = {
-            'protection_status': 'unknown',
-            'real_time_protection': False,
-            'definitions_up_to_date': False
-        }
         
+        Returns:
+            AVState: Estado precalculado (no se crea un objeto por llamada)
+        """
         try:
-            # Extraer nibbles (4 bits cada uno)
-            # Bits 16-19: Estado del producto
-            product_enabled = (product_state & 0x000F0000) >> 16
-            
-            # Bits 12-15: Estado de definiciones
-            definitions_state = (product_state & 0x0000F000) >> 12
-            
-            # Producto habilitado si el nibble NO es 0x0
-            if product_enabled != 0x0:
-                state_info['protection_status'] = 'active'
-                state_info['real_time_protection'] = True
-            else:
-                state_info['protection_status'] = 'inactive'
-                state_info['real_time_protection'] = False
-            
-            # Definiciones actualizadas si el nibble ES 0x0
-            if definitions_state == 0x0:
-                state_info['definitions_up_to_date'] = True
-            else:
-                state_info['definitions_up_to_date'] = False
-            
-            print(f"   📊 productState: {product_state} (0x{product_state:06X})")
-            print(f"      - Producto: 0x{product_enabled:X} → {'Habilitado' if state_info['real_time_protection'] else 'Deshabilitado'}")
-            print(f"      - Definiciones: 0x{definitions_state:X} → {'Actualizadas' if state_info['definitions_up_to_date'] else 'Desactualizadas'}")
-            
-        except Exception as e:
-            print(f"   ⚠️  Error decodificando estado: {e}")
-        
-        return state_info
+            # Producto habilitado si su nibble NO es 0x0; definiciones
+            # actualizadas si su nibble ES 0x0
+            enabled = bool(product_state & _AV_STATE_ENABLED_MASK)
+            up_to_date = not product_state & _AV_STATE_OUTDATED_MASK
+        except TypeError as e:
+            log.warning("Error decodificando estado: %s", e)
+            return _AV_STATE_UNKNOWN
+        
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("productState=%d (0x%06X)", product_state, product_state)
+        
+        return _AV_STATES[enabled, up_to_date]
+    
     # ═══════════════════════════════════════════════════════════
     # Linux - Paquetes, Procesos y Servicios
     # ═══════════════════════════════════════════════════════════
@@ -1124,106 +2268,49 @@ class AntivirusCollector:
         
         antivirus_info['detection_method'] = 'Package, Process and Service scanning'
         
-        # Antivirus conocidos para Linux
-        known_antivirus = {
-            # Nombre del proceso/paquete: (Nombre completo, vendor)
-            'clamav': ('ClamAV', 'Cisco'),
-            'clamd': ('ClamAV Daemon', 'Cisco'),
-            'freshclam': ('ClamAV Updater', 'Cisco'),
-            'avast': ('Avast for Linux', 'Avast Software'),
-            'avg': ('AVG Antivirus', 'AVG Technologies'),
-            'bitdefender': ('Bitdefender', 'Bitdefender'),
-            'comodo': ('Comodo Antivirus', 'Comodo'),
-            'chkrootkit': ('chkrootkit', 'chkrootkit'),
-            'rkhunter': ('RKHunter', 'RKHunter'),
-            'sophos': ('Sophos Antivirus', 'Sophos'),
-            'eset': ('ESET NOD32', 'ESET'),
-            'esets': ('ESET Server Security', 'ESET'),
-            'fsecure': ('F-Secure', 'F-Secure'),
-            'kaspersky': ('Kaspersky', 'Kaspersky'),
-            'mcafee': ('McAfee', 'McAfee'),
-            'trend': ('Trend Micro', 'Trend Micro'),
-        }
-        
         detected = []
-        
-        # Método 1: Verificar procesos en ejecución
-        try:
-            result = subprocess.run(['ps', 'aux'], capture_output=True, text=True, timeout=5)
-            processes = result.stdout.lower()
-            
-            for process_name, (full_name, vendor) in known_antivirus.items():
-                if process_name in processes:
-                    detected.append({
-                        'name': full_name,
-                        'vendor': vendor,
-                        'detection_method': 'Running process',
-                        'process_name': process_name
-                    })
-        except Exception as e:
-            print(f"⚠️  Error verificando procesos: {e}")
-        
-        # Método 2: Verificar paquetes (dpkg - Debian/Ubuntu)
-        if os.path.exists('/usr/bin/dpkg'):
-            try:
-                result = subprocess.run(['dpkg', '-l'], capture_output=True, text=True, timeout=5)
-                packages = result.stdout.lower()
-                
-                for package_name, (full_name, vendor) in known_antivirus.items():
-                    if package_name in packages:
-                        if not any(d['name'] == full_name for d in detected):
-                            detected.append({
-                                'name': full_name,
-                                'vendor': vendor,
-                                'detection_method': 'Installed package (dpkg)',
-                                'package_name': package_name
-                            })
-            except Exception as e:
-                print(f"⚠️  Error verificando paquetes dpkg: {e}")
-        
-        # Método 3: Verificar paquetes (rpm - RedHat/CentOS/Fedora)
-        if os.path.exists('/usr/bin/rpm'):
-            try:
-                result = subprocess.run(['rpm', '-qa'], capture_output=True, text=True, timeout=5)
-                packages = result.stdout.lower()
-                
-                for package_name, (full_name, vendor) in known_antivirus.items():
-                    if package_name in packages:
-                        if not any(d['name'] == full_name for d in detected):
-                            detected.append({
-                                'name': full_name,
-                                'vendor': vendor,
-                                'detection_method': 'Installed package (rpm)',
-                                'package_name': package_name
-                            })
-            except Exception as e:
-                print(f"⚠️  Error verificando paquetes rpm: {e}")
-        
-        # Método 4: Verificar servicios systemd
-        if os.path.exists('/usr/bin/systemctl'):
-            try:
-                result = subprocess.run(
-                    ['systemctl', 'list-units', '--type=service', '--all'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                services = result.stdout.lower()
-                
-                for service_name, (full_name, vendor) in known_antivirus.items():
-                    if service_name in services and not any(d['name'] == full_name for d in detected):
-                        detected.append({
-                            'name': full_name,
-                            'vendor': vendor,
-                            'detection_method': 'systemd service',
-                            'service_name': service_name
-                        })
-            except Exception as e:
-                print(f"⚠️  Error verificando servicios systemd: {e}")
-        
-        print(f"\n🛡️  Antivirus detectados en Linux: {len(detected)}")
-        for av in detected:
-            print(f"   - {av['name']} ({av.get('vendor', 'Unknown')})")
+        seen_names = set()
+        
+        # Subdetectores independientes: se ejecutan en paralelo junto con
+        # el firewall; la latencia total es la del más lento
+        package_detectors = [
+            ('linux.dpkg', self._linux_dpkg),
+            ('linux.rpm', self._linux_rpm),
+            ('linux.systemd', self._linux_systemd),
+        ]
+        firewall_future = BaseCollector.submit(self._timed_call, 'linux.firewall', _linux_firewall_state)
+        ps_future = BaseCollector.submit(self._timed_call, 'linux.ps', self._linux_ps)
+        
+        # Los detectores de paquetes se lanzan de forma especulativa junto a
+        # ps: la latencia es la del más lento y no la suma de ambos
+        package_futures = [
+            BaseCollector.submit(self._timed_call, name, detector)
+            for name, detector in package_detectors
+        ]
+        futures = [ps_future] + package_futures
+        
+        # Un proceso en ejecución ya define el antivirus principal: sin
+        # thorough se descartan paquetes y servicios (y se cancelan los
+        # detectores que aún no empezaron)
+        if not self.thorough and ps_future.result():
+            for future in package_futures:
+                future.cancel()
+            futures = [ps_future]
+        
+        # Combinar en orden fijo: los procesos en ejecución tienen prioridad
+        for future in futures:
+            for av in future.result():
+                if av['name'] in seen_names:
+                    continue
+                seen_names.add(av['name'])
+                detected.append(av)
+        
+        firewall_status = firewall_future.result()
+        
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Antivirus detectados en Linux: %d", len(detected))
+            for av in detected:
+                log.debug("  - %s (%s)", av['name'], av.get('vendor', 'Unknown'))
         
          # Determinar antivirus principal
         if detected:
@@ -1239,37 +2326,126 @@ class AntivirusCollector:
                 antivirus_info['protection_status'] = 'installed'
                 antivirus_info['real_time_protection'] = False
             
-            print(f"✅ Usando antivirus principal: {primary_av['name']}")
+            log.debug("Usando antivirus principal: %s", primary_av['name'])
             
             # ✅ NUEVO: Obtener información de escaneo para ClamAV
             if 'clamav' in primary_av['name'].lower():
-                clamav_info = self._get_clamav_scan_info()
+                with self._timed('linux.scan_info'):
+                    clamav_info = self._get_clamav_scan_info()
                 if clamav_info:
                     antivirus_info['last_scan'] = clamav_info.get('last_scan')
                     antivirus_info['last_update'] = clamav_info.get('last_update')
-            else:
-                antivirus_info['antivirus_name'] = 'None detected'
-                print(f"⚠️  No se detectaron productos antivirus")
-            
-            # Firewall (iptables/ufw/firewalld)
-            try:
-                # Intentar con ufw primero
-                result = subprocess.run(['ufw', 'status'], capture_output=True, text=True, timeout=5)
-                if 'active' in result.stdout.lower():
-                    antivirus_info['firewall_status'] = 'active'
-                elif 'inactive' in result.stdout.lower():
-                    antivirus_info['firewall_status'] = 'inactive'
-            except:
-                try:
-                    # Intentar con firewalld
-                    result = subprocess.run(['firewall-cmd', '--state'], capture_output=True, text=True, timeout=5)
-                    if 'running' in result.stdout.lower():
-                        antivirus_info['firewall_status'] = 'active'
-                except:
-                    antivirus_info['firewall_status'] = 'unknown'
-            
+        else:
+            antivirus_info['antivirus_name'] = 'None detected'
+            log.debug("No se detectaron productos antivirus")
+        
+        # Firewall (ufw/firewalld)
+        antivirus_info['firewall_status'] = firewall_status
+        
         return antivirus_info
 
+    def _linux_detections(self, output: Optional[str], method: str, field: str) -> List[Dict]:
+        """Antivirus conocidos presentes en la salida de una fuente"""
+        if output is None:
+            return []
+        
+        found = self._find_matches(_LINUX_AV_RE, output) & _LINUX_AV_KEYS_LOWER
+        
+        # Mismo orden de prioridad que la tabla de antivirus conocidos
+        detections = []
+        for key in sorted(found, key=_LINUX_AV_RANK.__getitem__):
+            full_name, vendor = _LINUX_AV_LOOKUP[key]
+            detections.append({
+                'name': full_name,
+                'vendor': vendor,
+                'detection_method': method,
+                field: key
+            })
+        return detections
+    
+    def _linux_command_detections(self, cmd: List[str], method: str, field: str) -> List[Dict]:
+        """Ejecuta cmd si está disponible en PATH y busca antivirus en su salida"""
+        if not which(cmd[0]):
+            return []
+        return self._linux_detections(self._run(cmd)[1], method, field)
+    
+    def _linux_ps(self) -> List[Dict]:
+        """Antivirus con procesos en ejecución"""
+        return self._linux_detections(self._get_process_names(), 'Running process', 'process_name')
+    
+    def _cached_package_list(self, marker_path: str, cmd: List[str]) -> Optional[str]:
+        """
+        Salida (en minúsculas) de un listado de paquetes, cacheada en disco
+        
+        La lista solo cambia al instalar/desinstalar paquetes, lo que
+        actualiza la fecha de marker_path: mientras coincida se reutiliza la
+        salida guardada y no se ejecuta cmd.
+        """
+        if not which(cmd[0]):
+            return None
+        
+        marker_stat = self._stat_or_none(marker_path) if self.use_cache else None
+        if marker_stat is None:
+            output = self._run(cmd)[1]
+            return output.lower() if output is not None else None
+        
+        # Un archivo por comando: dpkg y rpm se consultan en paralelo
+        cache_file = os.path.join(
+            os.path.dirname(self.cache_file), f"av_packages_{cmd[0]}.json"
+        )
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('marker') == marker_path and cached.get('mtime') == marker_stat.st_mtime:
+                return cached.get('output')
+        except (OSError, ValueError, AttributeError):
+            pass
+        
+        output = self._run(cmd)[1]
+        if output is None:
+            return None
+        output = output.lower()
+        
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'marker': marker_path, 'mtime': marker_stat.st_mtime, 'output': output}, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            log.warning("No se pudo guardar el cache de paquetes: %s", e)
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+        
+        return output
+    
+    def _linux_dpkg(self) -> List[Dict]:
+        """Antivirus instalados como paquete dpkg (Debian/Ubuntu)"""
+        return self._linux_detections(
+            self._cached_package_list(_DPKG_STATUS, ['dpkg', '-l']),
+            'Installed package (dpkg)',
+            'package_name'
+        )
+    
+    def _linux_rpm(self) -> List[Dict]:
+        """Antivirus instalados como paquete rpm (RedHat/CentOS/Fedora)"""
+        marker = next((path for path in _RPM_DBS if _exists(path)), _RPM_DBS[0])
+        return self._linux_detections(
+            self._cached_package_list(marker, ['rpm', '-qa']),
+            'Installed package (rpm)',
+            'package_name'
+        )
+    
+    def _linux_systemd(self) -> List[Dict]:
+        """Antivirus registrados como servicio systemd"""
+        return self._linux_command_detections(
+            ['systemctl', 'list-units', '--type=service', '--all'],
+            'systemd service',
+            'service_name'
+        )
+    
     def _get_clamav_scan_info(self) -> Optional[Dict]:
         """
         Obtiene información de escaneo de ClamAV desde logs
@@ -1284,48 +2460,46 @@ class AntivirusCollector:
             freshclam_log = '/var/log/clamav/freshclam.log'
             if os.path.exists(freshclam_log):
                 try:
-                    # Leer las últimas líneas del log
-                    result = subprocess.run(
-                        ['tail', '-20', freshclam_log],
-                        capture_output=True,
-                        text=True,
-                        timeout=5
-                    )
+                    # Leer las últimas líneas del log (sin lanzar 'tail')
+                    lines = _tail_lines(freshclam_log, 20)
                     
-                    # Buscar líneas con "Database updated"
-                    for line in result.stdout.split('\n'):
-                        if 'database updated' in line.lower():
-                            # Extraer fecha (formato: Mon Dec 25 12:00:00 2025)
-                            parts = line.split()
-                            if len(parts) >= 5:
-                                import datetime
-                                try:
-                                    date_str = ' '.join(parts[:5])
-                                    # Parsear la fecha
-                                    scan_info['last_update'] = date_str
-                                    print(f"   Última actualización de ClamAV: {scan_info['last_update']}")
-                                    break
-                                except:
-                                    pass
+                    # Buscar la línea "Database updated" más reciente (al final)
+                    for line in reversed(lines):
+                        if not _FRESHCLAM_UPDATED_RE.search(line):
+                            continue
+                        
+                        # Extraer fecha (formato: Mon Dec 25 12:00:00 2025)
+                        match = _FRESHCLAM_DATE_RE.match(line)
+                        if not match:
+                            continue
+                        try:
+                            updated = datetime.strptime(
+                                ' '.join(match.group(1).split()), '%a %b %d %H:%M:%S %Y'
+                            )
+                        except ValueError:
+                            continue
+                        
+                        scan_info['last_update'] = updated.isoformat()
+                        log.debug("Última actualización de ClamAV: %s", scan_info['last_update'])
+                        break
                 except Exception as e:
-                    print(f"   ⚠️  Error leyendo log de freshclam: {e}")
+                    log.warning("Error leyendo log de freshclam: %s", e)
             
             # Intentar obtener última actualización desde base de datos
             clamav_db = '/var/lib/clamav/daily.cvd'
             if os.path.exists(clamav_db):
                 try:
-                    import datetime
                     mod_time = os.path.getmtime(clamav_db)
-                    last_update = datetime.datetime.fromtimestamp(mod_time).isoformat()
+                    last_update = _iso(int(mod_time))
                     scan_info['last_update'] = last_update
-                    print(f"   Última actualización de base de datos: {last_update}")
+                    log.debug("Última actualización de base de datos: %s", last_update)
                 except:
                     pass
             
             return scan_info if scan_info else None
         
         except Exception as e:
-            print(f"   ⚠️  Error obteniendo info de ClamAV: {e}")
+            log.warning("Error obteniendo info de ClamAV: %s", e)
             return None
 # ═══════════════════════════════════════════════════════════
 # USO COMO SCRIPT INDEPENDIENTE
@@ -3,7 +3,11 @@ Clase base abstracta para todos los collectors
 """
 
 from abc import ABC, abstractmethod
+import contextvars
 import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
 
 
 class BaseCollector(ABC):
@@ -11,11 +15,36 @@ class BaseCollector(ABC):
     Clase base abstracta para todos los collectors de datos
     """
     
+    # Segundos durante los que safe_collect() reutiliza el último resultado
+    CACHE_TTL = 300
+    
+    # Pool de hilos compartido por todos los collectors: los hilos se crean
+    # una sola vez y se reutilizan en cada ciclo de recopilación
+    _EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='ITAgent')
+    
     def __init__(self):
         """
         Inicializa el collector base
         """
         self.logger = logging.getLogger(f'ITAgent.{self.__class__.__name__}')
+        
+        # Último resultado exitoso de collect() y su instante (monotónico)
+        self._cache: Optional[Dict] = None
+        self._cache_ts = 0.0
+    
+    @classmethod
+    def submit(cls, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """
+        Ejecuta fn(*args, **kwargs) en el pool compartido
+        
+        La tarea corre en una copia del contexto actual (contextvars), igual
+        que si se ejecutara en el hilo que la envía.
+        
+        Returns:
+            Future: Resultado de la tarea
+        """
+        context = contextvars.copy_context()
+        return cls._EXECUTOR.submit(context.run, fn, *args, **kwargs)
     
     @abstractmethod
     def collect(self):
@@ -27,18 +56,38 @@ class BaseCollector(ABC):
         """
         pass
     
-    def safe_collect(self):
+    def safe_collect(self, force_refresh: bool = False):
         """
         Ejecuta collect() con manejo de errores
         
+        Los datos de dominio, antivirus, etc. cambian en minutos u horas: el
+        último resultado exitoso se reutiliza durante CACHE_TTL segundos. Un
+        error no se cachea, de modo que la siguiente llamada reintenta.
+        Se devuelve una copia superficial: modificar el resultado no altera
+        el cache.
+        
+        Args:
+            force_refresh: Ignorar el cache y recopilar de nuevo
+        
         Returns:
             dict: Datos recopilados o dict vacío si hay error
         """
+        if (
+            not force_refresh
+            and self._cache is not None
+            and time.monotonic() - self._cache_ts < self.CACHE_TTL
+        ):
+            self.logger.debug(f"Usando datos cacheados de {self.__class__.__name__}")
+            return dict(self._cache)
+        
         try:
             self.logger.debug(f"Iniciando recopilación de {self.__class__.__name__}")
             data = self.collect()
             self.logger.debug(f"✓ Recopilación exitosa de {self.__class__.__name__}")
-            return data
         except Exception as e:
             self.logger.error(f"Error en {self.__class__.__name__}: {e}", exc_info=True)
-            return {}
\ No newline at end of file
+            return {}
+        
+        self._cache = data
+        self._cache_ts = time.monotonic()
+        return dict(data)
@@ -3,22 +3,60 @@ Domain Collector - Recopila información de dominio/Active Directory
 Multiplataforma: Windows, macOS, Linux
 """
 
-import platform
+import re
 import subprocess
 import os
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, Any, List
 
+from utils.system_info import OS_TYPE
 from .base_collector import BaseCollector
 
+try:
+    import pythoncom
+except ImportError:
+    pythoncom = None  # Solo disponible en Windows con pywin32
+
+
+# Parámetro 'workgroup' de smb.conf (no coincide con líneas comentadas)
+_WORKGROUP_RE = re.compile(r'\s*workgroup\s*=\s*(.+)', re.IGNORECASE)
+
+# Solo las columnas necesarias: menos datos que serializar por DCOM
+_COMPUTER_SYSTEM_WQL = "SELECT Domain, PartOfDomain, Workgroup FROM Win32_ComputerSystem"
+
+# wbemFlagReturnImmediately | wbemFlagForwardOnly: WMI entrega y libera las
+# filas a medida que se consumen en lugar de materializar el resultado
+_WBEM_FLAG_RETURN_IMMEDIATELY = 0x10
+_WBEM_FLAG_FORWARD_ONLY = 0x20
+_WBEM_QUERY_FLAGS = _WBEM_FLAG_RETURN_IMMEDIATELY | _WBEM_FLAG_FORWARD_ONLY
+
 
 class DomainCollector(BaseCollector):
     """
     Recopila información sobre configuración de dominio
     """
     
+    # Segundos máximos para una consulta WMI: un DCOM colgado no bloquea al agente
+    WMI_TIMEOUT = 5
+    
+    # Segundos durante los que se reutiliza la lista de GPOs aplicadas
+    GPO_CACHE_TTL = 600
+    
     def __init__(self):
         super().__init__()
-        self.system = platform.system()
+        self.system = OS_TYPE
+        
+        # Conexión WMI reutilizada entre ciclos; se crea y se usa siempre en
+        # el mismo hilo del executor
+        self._wmi = None
+        self._wmi_executor = None
+        
+        # GPOs aplicadas (gpresult /X) y su instante (monotónico)
+        self._gpo_cache = None
+        self._gpo_cache_ts = 0.0
     
     def collect(self) -> Dict[str, Any]:
         """
@@ -51,19 +89,16 @@ class DomainCollector(BaseCollector):
         info = {}
         
         try:
-            import wmi
-            c = wmi.WMI()
-            
             # Verificar si está en dominio
-            for cs in c.Win32_ComputerSystem():
-                if cs.PartOfDomain:
+            for part_of_domain, domain, workgroup in self._query_computer_system():
+                if part_of_domain:
                     info['is_domain_joined'] = True
-                    info['domain_name'] = cs.Domain
+                    info['domain_name'] = domain
                     info['workgroup'] = None
                 else:
                     info['is_domain_joined'] = False
                     info['domain_name'] = None
-                    info['workgroup'] = cs.Workgroup
+                    info['workgroup'] = workgroup
             
             # Obtener usuario actual
             info['domain_user'] = os.getenv('USERNAME')
@@ -83,11 +118,58 @@ class DomainCollector(BaseCollector):
         except ImportError:
             self.logger.warning("Librería WMI no disponible, usando métodos alternativos")
             info = self.get_windows_domain_info_fallback()
+        except FutureTimeoutError:
+            self.logger.warning(f"Timeout de WMI ({self.WMI_TIMEOUT}s), usando métodos alternativos")
+            self._reset_wmi()
+            info = self.get_windows_domain_info_fallback()
         except Exception as e:
             self.logger.error(f"Error al obtener info de dominio Windows: {e}")
         
         return info
     
+    def _get_wmi(self):
+        """
+        Conexión WMI cacheada (SWbemServices de root\\cimv2)
+        
+        La inicialización de COM y de la conexión DCOM se paga una sola vez;
+        los ciclos siguientes reutilizan el mismo handle.
+        """
+        if self._wmi is None:
+            import win32com.client
+            
+            if pythoncom is not None:
+                pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+            locator = win32com.client.Dispatch("WbemScripting.SWbemLocator")
+            self._wmi = locator.ConnectServer(".", "root\\cimv2")
+        return self._wmi
+    
+    def _query_computer_system(self) -> List[tuple]:
+        """
+        Filas (PartOfDomain, Domain, Workgroup) de Win32_ComputerSystem
+        
+        La consulta corre en el hilo dedicado a WMI con un timeout de
+        WMI_TIMEOUT segundos (lanza concurrent.futures.TimeoutError).
+        """
+        def query():
+            rows = self._get_wmi().ExecQuery(_COMPUTER_SYSTEM_WQL, "WQL", _WBEM_QUERY_FLAGS)
+            try:
+                return [(cs.PartOfDomain, cs.Domain, cs.Workgroup) for cs in rows]
+            finally:
+                # El enumerador forward-only no se puede recorrer de nuevo:
+                # liberarlo devuelve sus recursos a WMI
+                del rows
+        
+        if self._wmi_executor is None:
+            self._wmi_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='DomainWMI')
+        return self._wmi_executor.submit(query).result(timeout=self.WMI_TIMEOUT)
+    
+    def _reset_wmi(self) -> None:
+        """Descarta la conexión y el hilo de WMI tras un timeout"""
+        if self._wmi_executor is not None:
+            self._wmi_executor.shutdown(wait=False)
+        self._wmi_executor = None
+        self._wmi = None
+    
     def get_windows_domain_info_fallback(self) -> Dict[str, Any]:
         """Método alternativo para obtener info de dominio en Windows"""
         info = {
@@ -125,37 +207,72 @@ class DomainCollector(BaseCollector):
         return info
     
     def get_applied_gpos(self) -> List[str]:
-        """Obtiene las GPOs aplicadas en Windows"""
-        gpos = []
+        """
+        Obtiene las GPOs aplicadas en Windows
+        
+        Se usa el informe RSOP en XML de 'gpresult /X' (estructurado, sin
+        depender del idioma de la salida de texto). Las GPOs cambian poco: la
+        lista se reutiliza durante GPO_CACHE_TTL segundos.
+        """
+        if self._gpo_cache is not None and time.monotonic() - self._gpo_cache_ts < self.GPO_CACHE_TTL:
+            return list(self._gpo_cache)
         
+        fd, xml_path = tempfile.mkstemp(suffix='.xml')
+        os.close(fd)
         try:
-            cmd = 'gpresult /R /SCOPE:COMPUTER'
-            result = subprocess.check_output(cmd, shell=True, text=True, 
-                                            errors='ignore', timeout=30)
-            
-            # Parsear el resultado para extraer GPOs
-            lines = result.split('\n')
-            in_gpo_section = False
+            result = subprocess.run(
+                ['gpresult', '/X', xml_path, '/SCOPE:COMPUTER', '/F'],
+                capture_output=True,
+                timeout=30
+            )
+            if result.returncode != 0:
+                self.logger.warning(f"gpresult terminó con código {result.returncode}")
+                return []
             
-            for line in lines:
-                if 'Applied Group Policy Objects' in line:
-                    in_gpo_section = True
-                    continue
-                
-                if in_gpo_section:
-                    if line.strip() and not line.startswith('--'):
-                        gpo_name = line.strip()
-                        if gpo_name and gpo_name not in gpos:
-                            gpos.append(gpo_name)
-                    
-                    # Salir si encontramos otra sección
-                    if 'The following GPOs were not applied' in line:
-                        break
-                        
+            gpos = self._parse_rsop_gpos(ET.parse(xml_path).getroot())
         except subprocess.TimeoutExpired:
             self.logger.warning("Timeout al ejecutar gpresult")
+            return []
         except Exception as e:
             self.logger.warning(f"No se pudieron obtener GPOs: {e}")
+            return []
+        finally:
+            try:
+                os.remove(xml_path)
+            except OSError:
+                pass
+        
+        self._gpo_cache = gpos
+        self._gpo_cache_ts = time.monotonic()
+        return list(gpos)
+    
+    @staticmethod
+    def _parse_rsop_gpos(root: ET.Element) -> List[str]:
+        """
+        Nombres de las GPOs aplicadas en un informe RSOP de gpresult /X
+        
+        Los elementos <GPO> llevan el namespace de GroupPolicy; se comparan
+        por nombre local. Se omiten las GPOs filtradas, denegadas o inválidas.
+        """
+        def local(tag: str) -> str:
+            return tag.rsplit('}', 1)[-1]
+        
+        gpos = []
+        for element in root.iter():
+            if local(element.tag) != 'GPO':
+                continue
+            
+            fields = {local(child.tag): (child.text or '').strip() for child in element}
+            if (
+                fields.get('FilterAllowed', 'true').lower() == 'false'
+                or fields.get('AccessDenied', 'false').lower() == 'true'
+                or fields.get('IsValid', 'true').lower() == 'false'
+            ):
+                continue
+            
+            name = fields.get('Name')
+            if name and name not in gpos:
+                gpos.append(name)
         
         return gpos
     
@@ -174,12 +291,12 @@ class DomainCollector(BaseCollector):
             # Verificar si está unido a un dominio AD (usando realm o similar)
             # Verificar Samba/Winbind
             if os.path.exists('/etc/samba/smb.conf'):
+                # Lectura línea a línea: se detiene en la primera coincidencia
                 with open('/etc/samba/smb.conf', 'r') as f:
-                    content = f.read()
-                    for line in content.split('\n'):
-                        if 'workgroup' in line.lower() and '=' in line:
-                            workgroup = line.split('=')[1].strip()
-                            info['workgroup'] = workgroup
+                    for line in f:
+                        match = _WORKGROUP_RE.match(line)
+                        if match:
+                            info['workgroup'] = match.group(1).strip()
                             break
             
             # Verificar realm (FreeIPA, AD)
@@ -200,16 +317,17 @@ class DomainCollector(BaseCollector):
             if os.path.exists('/etc/sssd/sssd.conf'):
                 info['is_domain_joined'] = True
                 try:
-                    # Intentar leer la configuración de sssd (puede requerir permisos)
-                    cmd = 'sudo cat /etc/sssd/sssd.conf 2>/dev/null || cat /etc/sssd/sssd.conf 2>/dev/null'
-                    result = subprocess.check_output(cmd, shell=True, text=True, timeout=5)
-                    # Buscar dominio en la configuración
-                    for line in result.split('\n'):
-                        if 'ldap_uri' in line or 'ad_domain' in line:
-                            parts = line.split('=')
-                            if len(parts) > 1:
-                                info['domain_controller'] = parts[1].strip()
-                                break
+                    # sssd.conf suele ser 0600 root; sin permisos no se intenta sudo
+                    with open('/etc/sssd/sssd.conf', 'r') as f:
+                        # Buscar dominio en la configuración
+                        for line in f:
+                            if 'ldap_uri' in line or 'ad_domain' in line:
+                                parts = line.split('=')
+                                if len(parts) > 1:
+                                    info['domain_controller'] = parts[1].strip()
+                                    break
+                except PermissionError:
+                    self.logger.debug("Sin permisos para leer /etc/sssd/sssd.conf")
                 except Exception:
                     pass
                     
@@ -10,6 +10,7 @@ from datetime import datetime
 
 # Importar modelos
 from models import Hardware, HardwareType, HardwareStatus, HardwareComponent, Asset, AssetType, AssetStatus, AssetLocation
+from utils.system_info import OS_TYPE
 
 
 class HardwareCollector:
@@ -19,7 +20,7 @@ class HardwareCollector:
     """
     
     def __init__(self):
-        self.os_type = platform.system()
+        self.os_type = OS_TYPE
     
     def collect(self) -> Dict[str, Any]:
         """
@@ -28,7 +29,7 @@ class HardwareCollector:
         return {
             'report_date': datetime.now().isoformat(),
             'hostname': socket.gethostname(),
-            'operating_system': platform.system(),
+            'operating_system': OS_TYPE,
             'os_version': platform.version(),
             'architecture': platform.machine(),
             'processor': platform.processor(),
@@ -58,7 +59,7 @@ class HardwareCollector:
         hardware = {
             'report_date': datetime.now().isoformat(),
             'hostname': socket.gethostname(),
-            'operating_system': platform.system(),
+            'operating_system': OS_TYPE,
             'os_version': platform.version(),
             'architecture': platform.machine(),
             'processor': platform.processor(),
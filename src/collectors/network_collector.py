@@ -1,12 +1,32 @@
 # src/collectors/network_collector.py
 
-import platform
+import json
 import subprocess
 import re
 import socket
 import logging
 from typing import Dict, List, Optional
 
+from utils.system_info import OS_TYPE, which
+
+
+# Patrones del parseo línea por línea de ifconfig / ip address: se compilan
+# una vez al importar el módulo en lugar de buscarse en el cache de re
+_IFCONFIG_NAME_RE = re.compile(r'^(\S+):')
+_IFCONFIG_ETHER_RE = re.compile(r'ether\s+([0-9a-f:]+)', re.IGNORECASE)
+_IFCONFIG_HWADDR_RE = re.compile(r'HWaddr\s+([0-9a-f:]+)', re.IGNORECASE)
+_IFCONFIG_INET_RE = re.compile(r'inet\s+(\d+\.\d+\.\d+\.\d+)')
+_IFCONFIG_NETMASK_RE = re.compile(r'netmask\s+(\d+\.\d+\.\d+\.\d+)')
+_IFCONFIG_CIDR_RE = re.compile(r'inet\s+\d+\.\d+\.\d+\.\d+/(\d+)')
+_IFCONFIG_INET6_RE = re.compile(r'inet6\s+([0-9a-f:]+)', re.IGNORECASE)
+
+_IP_INDEX_RE = re.compile(r'^\d+:')
+_IP_NAME_RE = re.compile(r'^\d+:\s+(\S+):')
+_IP_ETHER_RE = re.compile(r'link/ether\s+([0-9a-f:]+)')
+_IP_INET_RE = re.compile(r'inet\s+(\d+\.\d+\.\d+\.\d+)/(\d+)')
+_IP_INET6_RE = re.compile(r'inet6\s+([0-9a-f:]+)/(\d+)')
+
+
 class NetworkCollector:
     """
     Recopila información sobre la configuración de red del sistema.
@@ -14,7 +34,7 @@ class NetworkCollector:
     """
     
     def __init__(self):
-        self.os_type = platform.system()
+        self.os_type = OS_TYPE
         self.logger = logging.getLogger('ITAgent.NetworkCollector')
     
     def safe_collect(self) -> Dict:
@@ -175,7 +195,6 @@ class NetworkCollector:
             )
             
             if result.returncode == 0 and result.stdout.strip():
-                import json
                 adapters_data = json.loads(result.stdout)
                 
                 # Si es un solo adaptador, convertir a lista
@@ -284,7 +303,7 @@ class NetworkCollector:
                     interfaces.append(current_interface)
                 
                 # Parsear nombre de interfaz
-                match = re.match(r'^(\S+):', line)
+                match = _IFCONFIG_NAME_RE.match(line)
                 if match:
                     interface_name = match.group(1)
                     current_interface = {
@@ -307,29 +326,29 @@ class NetworkCollector:
             # Información de la interfaz actual
             elif current_interface:
                 # MAC address
-                mac_match = re.search(r'ether\s+([0-9a-f:]+)', line, re.IGNORECASE)
+                mac_match = _IFCONFIG_ETHER_RE.search(line)
                 if not mac_match:
-                    mac_match = re.search(r'HWaddr\s+([0-9a-f:]+)', line, re.IGNORECASE)
+                    mac_match = _IFCONFIG_HWADDR_RE.search(line)
                 if mac_match:
                     current_interface['mac_address'] = mac_match.group(1)
                 
                 # IPv4
-                ipv4_match = re.search(r'inet\s+(\d+\.\d+\.\d+\.\d+)', line)
+                ipv4_match = _IFCONFIG_INET_RE.search(line)
                 if ipv4_match:
                     current_interface['ipv4_address'] = ipv4_match.group(1)
                     
                     # Máscara de subred
-                    netmask_match = re.search(r'netmask\s+(\d+\.\d+\.\d+\.\d+)', line)
+                    netmask_match = _IFCONFIG_NETMASK_RE.search(line)
                     if netmask_match:
                         current_interface['ipv4_subnet'] = netmask_match.group(1)
                     
                     # O en formato CIDR
-                    cidr_match = re.search(r'inet\s+\d+\.\d+\.\d+\.\d+/(\d+)', line)
+                    cidr_match = _IFCONFIG_CIDR_RE.search(line)
                     if cidr_match:
                         current_interface['ipv4_subnet'] = cidr_match.group(1)
                 
                 # IPv6
-                ipv6_match = re.search(r'inet6\s+([0-9a-f:]+)', line, re.IGNORECASE)
+                ipv6_match = _IFCONFIG_INET6_RE.search(line)
                 if ipv6_match:
                     current_interface['ipv6_address'] = ipv6_match.group(1)
         
@@ -351,13 +370,13 @@ class NetworkCollector:
         
         for line in lines:
             # Nueva interfaz
-            if re.match(r'^\d+:', line):
+            if _IP_INDEX_RE.match(line):
                 # Guardar interfaz anterior
                 if current_interface:
                     interfaces.append(current_interface)
                 
                 # Parsear nueva interfaz
-                match = re.match(r'^\d+:\s+(\S+):', line)
+                match = _IP_NAME_RE.match(line)
                 if match:
                     interface_name = match.group(1)
                     current_interface = {
@@ -380,18 +399,18 @@ class NetworkCollector:
             # Información de la interfaz actual
             elif current_interface:
                 # MAC address
-                mac_match = re.search(r'link/ether\s+([0-9a-f:]+)', line)
+                mac_match = _IP_ETHER_RE.search(line)
                 if mac_match:
                     current_interface['mac_address'] = mac_match.group(1)
                 
                 # IPv4
-                ipv4_match = re.search(r'inet\s+(\d+\.\d+\.\d+\.\d+)/(\d+)', line)
+                ipv4_match = _IP_INET_RE.search(line)
                 if ipv4_match:
                     current_interface['ipv4_address'] = ipv4_match.group(1)
                     current_interface['ipv4_subnet'] = ipv4_match.group(2)
                 
                 # IPv6
-                ipv6_match = re.search(r'inet6\s+([0-9a-f:]+)/(\d+)', line)
+                ipv6_match = _IP_INET6_RE.search(line)
                 if ipv6_match:
                     current_interface['ipv6_address'] = ipv6_match.group(1)
         
@@ -534,16 +553,8 @@ class NetworkCollector:
         return None
     
     def _command_exists(self, command: str) -> bool:
-        """Verifica si un comando existe en el sistema"""
-        try:
-            subprocess.run(
-                ["which" if self.os_type != "Windows" else "where", command],
-                capture_output=True,
-                timeout=5
-            )
-            return True
-        except:
-            return False
+        """Verifica si un comando existe en el sistema (búsqueda en PATH, sin lanzar which/where)"""
+        return which(command) is not None
     
     def _get_empty_data(self) -> Dict:
         """Retorna estructura de datos vacía"""
@@ -1,12 +1,16 @@
 # src/collectors/office_collector.py
 
-import platform
+import json
+import os
 import subprocess
 import re
 import logging
 from typing import Dict, Optional, List
 from datetime import datetime
 
+from utils.system_info import OS_TYPE, which
+
+
 class OfficeCollector:
     """
     Recopila información sobre Microsoft Office instalado.
@@ -14,7 +18,7 @@ class OfficeCollector:
     """
     
     def __init__(self):
-        self.os_type = platform.system()
+        self.os_type = OS_TYPE
         self.logger = logging.getLogger('ITAgent.OfficeCollector')
     
     def safe_collect(self) -> Dict:
@@ -127,7 +131,6 @@ class OfficeCollector:
             )
             
             if result.returncode == 0 and result.stdout.strip():
-                import json
                 office_data = json.loads(result.stdout)
                 
                 version = office_data.get('VersionToReport', '')
@@ -326,14 +329,8 @@ class OfficeCollector:
             
             for app_name, app_path in office_apps_paths.items():
                 try:
-                    # Verificar si existe
-                    result = subprocess.run(
-                        ["test", "-d", app_path],
-                        capture_output=True,
-                        timeout=3
-                    )
-                    
-                    if result.returncode == 0:
+                    # Verificar si existe (un stat, sin lanzar 'test -d')
+                    if os.path.isdir(app_path):
                         installed_apps.append(app_name)
                         
                         # Obtener versión de la primera app encontrada
@@ -378,22 +375,14 @@ class OfficeCollector:
             ]
             
             for license_path in license_paths:
-                try:
-                    result = subprocess.run(
-                        ["test", "-f", license_path],
-                        capture_output=True,
-                        timeout=3
-                    )
-                    
-                    if result.returncode == 0:
-                        # Si existe el archivo de Microsoft 365
-                        if 'Office365' in license_path:
-                            return 'Subscription'
-                        else:
-                            return 'Retail'
-                
-                except Exception:
-                    continue
+                # os.path.isfile en lugar de 'test -f'; sin shell el '~'
+                # nunca se expandía
+                if os.path.isfile(os.path.expanduser(license_path)):
+                    # Si existe el archivo de Microsoft 365
+                    if 'Office365' in license_path:
+                        return 'Subscription'
+                    else:
+                        return 'Retail'
         
         except Exception as e:
             self.logger.debug(f"Error detectando licencia macOS: {e}")
@@ -535,16 +524,8 @@ class OfficeCollector:
             return 'Unknown'
     
     def _command_exists(self, command: str) -> bool:
-        """Verifica si un comando existe en el sistema"""
-        try:
-            subprocess.run(
-                ["which" if self.os_type != "Windows" else "where", command],
-                capture_output=True,
-                timeout=5
-            )
-            return True
-        except:
-            return False
+        """Verifica si un comando existe en el sistema (búsqueda en PATH, sin lanzar which/where)"""
+        return which(command) is not None
     
     def _get_empty_data(self) -> Dict:
         """Retorna estructura de datos vacía"""
@@ -1,6 +1,6 @@
 # src/collectors/software_collector.py
 
-import platform
+import json
 import subprocess
 import re
 import uuid
@@ -9,6 +9,7 @@ from typing import List, Dict, Any, Optional
 
 # Importar modelos
 from models import Software, SoftwareType
+from utils.system_info import OS_TYPE, which
 
 
 class SoftwareCollector:
@@ -18,7 +19,7 @@ class SoftwareCollector:
     """
     
     def __init__(self):
-        self.os_type = platform.system()
+        self.os_type = OS_TYPE
     
     def collect(self) -> Dict[str, Any]:
         """
@@ -80,7 +81,6 @@ class SoftwareCollector:
             )
             
             if result.returncode == 0 and result.stdout.strip():
-                import json
                 software_data = json.loads(result.stdout)
                 
                 # Si es un solo elemento, convertirlo a lista
@@ -358,16 +358,8 @@ class SoftwareCollector:
         return software_list
     
     def _command_exists(self, command: str) -> bool:
-        """Verifica si un comando existe"""
-        try:
-            subprocess.run(
-                ["which" if self.os_type != "Windows" else "where", command],
-                capture_output=True,
-                timeout=5
-            )
-            return True
-        except:
-            return False
+        """Verifica si un comando existe (búsqueda en PATH, sin lanzar which/where)"""
+        return which(command) is not None
     
     # ═══════════════════════════════════════════════════════════
     # MÉTODOS PARA MODELOS
@@ -4,24 +4,100 @@
 Sistema de gestión de backups para configuraciones
 """
 
+import os
+import sys
 import shutil
 import json
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Set
 import zipfile
 
 
+# ═══════════════════════════════════════════════════════════
+# CHUNKING POR CONTENIDO (deduplicación)
+# ═══════════════════════════════════════════════════════════
+
+CDC_MIN_SIZE = 2 * 1024      # Tamaño mínimo de chunk
+CDC_MAX_SIZE = 64 * 1024     # Tamaño máximo de chunk
+CDC_MASK = (1 << 13) - 1     # Corte promedio cada ~8 KiB
+
+_MASK64 = (1 << 64) - 1
+
+# Tabla "gear" determinista: un valor pseudoaleatorio de 64 bits por byte
+_GEAR = tuple(
+    int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=8).digest(), 'little')
+    for i in range(256)
+)
+
+
+def _cdc_chunks(data: bytes) -> Iterator[bytes]:
+    """
+    Dividir datos en chunks de tamaño variable (gear hash, estilo FastCDC)
+    
+    Los cortes dependen solo del contenido, así que una modificación
+    local solo altera los chunks cercanos y el resto se deduplica.
+    
+    El bucle por byte retiene el GIL: varios hilos no lo aceleran.
+    """
+    length = len(data)
+    start = 0
+    
+    while start < length:
+        end = min(start + CDC_MAX_SIZE, length)
+        cut = end
+        h = 0
+        
+        for i in range(start + CDC_MIN_SIZE, end):
+            h = ((h << 1) + _GEAR[data[i]]) & _MASK64
+            if not h & CDC_MASK:
+                cut = i + 1
+                break
+        
+        yield data[start:cut]
+        start = cut
+
+
+def _chunk_hash(chunk: bytes) -> str:
+    """Hash de contenido de un chunk (no criptográfico: omite chequeos FIPS)"""
+    if sys.version_info >= (3, 9):
+        return hashlib.blake2b(chunk, digest_size=16, usedforsecurity=False).hexdigest()
+    return hashlib.blake2b(chunk, digest_size=16).hexdigest()
+
+
 class BackupManager:
-    """Gestor de backups automáticos"""
+    """
+    Gestor de backups automáticos
+    
+    Los backups de configuración (``backup_config``) se deduplican por
+    contenido: cada archivo se divide en chunks guardados una sola vez en
+    ``data/<hash>.chunk`` y el backup es un manifiesto JSON
+    (``<nombre>.manifest.json``) con la lista de chunks de cada archivo.
+    """
+    
+    CHUNKS_DIR = 'data'
+    MANIFEST_SUFFIX = '.manifest.json'
+    
+    # Chunks (y temporales) modificados hace menos de esto no se eliminan:
+    # pueden pertenecer a un backup en curso cuyo manifiesto aún no existe
+    GC_GRACE_SECONDS = 3600
     
     def __init__(self, backup_dir: str = "data/backup"):
         self.backup_dir = Path(backup_dir)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self.chunks_dir = self.backup_dir / self.CHUNKS_DIR
         
         # Configuración
         self.max_backups = 10  # Mantener últimos N backups
         self.compress = True   # Comprimir backups
+        self.dedup = True      # Deduplicar backups de configuración
+        self.max_workers = min(8, os.cpu_count() or 1)  # Hilos para E/S de backups y GC
+        self.compress_level = 1          # Deflate rápido: prima CPU sobre ratio
+        self.io_buffer_size = 1 << 20    # Buffer de escritura de 1 MiB
     
     def create_backup(
         self, 
@@ -61,7 +137,13 @@ class BackupManager:
         backup_file: Path
     ) -> str:
         """Crear backup comprimido en ZIP"""
-        with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        # El buffer grande agrupa las escrituras de headers y bloques
+        # comprimidos en pocas llamadas write() al sistema
+        with open(backup_file, 'wb', buffering=self.io_buffer_size) as out, \
+                zipfile.ZipFile(
+                    out, 'w', zipfile.ZIP_DEFLATED,
+                    compresslevel=self.compress_level
+                ) as zipf:
             for source in source_files:
                 source_path = Path(source)
                 
@@ -119,6 +201,112 @@ class BackupManager:
         
         return str(backup_folder)
     
+    def create_dedup_backup(
+        self,
+        source_files: List[str],
+        backup_name: str = None
+    ) -> Optional[str]:
+        """
+        Crear backup deduplicado (manifiesto + chunks por contenido)
+        
+        Args:
+            source_files: Lista de archivos a respaldar
+            backup_name: Nombre del backup (None = automático con timestamp)
+        
+        Returns:
+            str: Ruta del manifiesto creado o None si falla
+        """
+        try:
+            if backup_name is None:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                backup_name = f"backup_{timestamp}"
+            
+            self.chunks_dir.mkdir(parents=True, exist_ok=True)
+            
+            paths = [source for source in source_files if os.path.isfile(source)]
+            
+            # Solo se solapan lecturas, hash y escrituras (liberan el GIL); el
+            # chunking (_cdc_chunks) es Python puro y sigue siendo serial
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(self._store_file_chunks, paths))
+            
+            entries = [
+                {'path': path, 'chunks': chunks}
+                for path, chunks in zip(paths, results)
+            ]
+            
+            manifest = {
+                'created_at': datetime.now().isoformat(),
+                'files': source_files,
+                'entries': entries
+            }
+            
+            manifest_file = self.backup_dir / f"{backup_name}{self.MANIFEST_SUFFIX}"
+            with open(manifest_file, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            
+            return str(manifest_file)
+        
+        except Exception as e:
+            print(f"❌ Error creando backup: {e}")
+            return None
+    
+    def _store_file_chunks(self, path: str) -> List[List[Any]]:
+        """
+        Dividir un archivo en chunks y guardar solo los que no existen
+        
+        Returns:
+            list: Pares [hash, tamaño] de cada chunk, en orden
+        """
+        data = self._read_file(path)
+        
+        chunks = []
+        for chunk in _cdc_chunks(data):
+            digest = _chunk_hash(chunk)
+            chunk_file = self.chunks_dir / f"{digest}.chunk"
+            
+            try:
+                # Renovar la fecha protege el chunk del GC hasta que se
+                # escriba el manifiesto de este backup
+                os.utime(chunk_file)
+            except FileNotFoundError:
+                # Nombre temporal único por hilo: dos archivos pueden
+                # compartir un chunk y escribirlo a la vez
+                tmp_file = chunk_file.with_name(
+                    f"{chunk_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+                )
+                with open(tmp_file, 'wb') as f:
+                    f.write(chunk)
+                os.replace(tmp_file, chunk_file)
+            
+            chunks.append([digest, len(chunk)])
+        
+        return chunks
+    
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        """Leer un archivo completo (con os.pread: sin offset compartido entre hilos)"""
+        if not hasattr(os, 'pread'):
+            with open(path, 'rb') as f:
+                return f.read()
+        
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            parts = []
+            offset = 0
+            size = os.fstat(fd).st_size
+            
+            while True:
+                block = os.pread(fd, max(size - offset, 1 << 16), offset)
+                if not block:
+                    break
+                parts.append(block)
+                offset += len(block)
+            
+            return b''.join(parts)
+        finally:
+            os.close(fd)
+    
     def restore_backup(self, backup_name: str, restore_dir: str = None) -> bool:
         """
         Restaurar backup
@@ -132,8 +320,11 @@ class BackupManager:
         """
         try:
             backup_file = self.backup_dir / f"{backup_name}.zip"
+            manifest_file = self.backup_dir / f"{backup_name}{self.MANIFEST_SUFFIX}"
             
-            if backup_file.exists():
+            if manifest_file.exists():
+                return self._restore_dedup_backup(manifest_file, restore_dir)
+            elif backup_file.exists():
                 return self._restore_compressed_backup(backup_file, restore_dir)
             else:
                 backup_folder = self.backup_dir / backup_name
@@ -181,59 +372,162 @@ class BackupManager:
         
         return True
     
+    def _restore_dedup_backup(
+        self,
+        manifest_file: Path,
+        restore_dir: str = None
+    ) -> bool:
+        """Restaurar backup deduplicado reensamblando sus chunks"""
+        target_dir = Path(restore_dir) if restore_dir else Path.cwd()
+        manifest = self._read_metadata(manifest_file)
+        
+        for entry in manifest.get('entries', []):
+            rel_path = Path(entry['path'])
+            if rel_path.is_absolute():
+                rel_path = rel_path.relative_to(rel_path.anchor)
+            
+            dest = target_dir / rel_path
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            
+            with open(dest, 'wb') as out:
+                for digest, _ in entry['chunks']:
+                    with open(self.chunks_dir / f"{digest}.chunk", 'rb') as f:
+                        out.write(f.read())
+        
+        return True
+    
     def list_backups(self) -> List[Dict[str, Any]]:
         """Listar todos los backups disponibles"""
         backups = []
         
-        # Buscar backups comprimidos
-        for zip_file in self.backup_dir.glob('*.zip'):
-            metadata_file = zip_file.with_suffix('.json')
-            
-            metadata = {}
-            if metadata_file.exists():
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-            
-            backups.append({
-                'name': zip_file.stem,
-                'type': 'compressed',
-                'size_mb': round(zip_file.stat().st_size / (1024 * 1024), 2),
-                'created_at': metadata.get('created_at', 'Unknown'),
-                'files': metadata.get('files', []),
-                'path': str(zip_file)
-            })
+        # Un solo recorrido del directorio: el DirEntry ya trae tipo y tamaño
+        with os.scandir(self.backup_dir) as it:
+            entries = list(it)
+        
+        manifests = {}
         
-        # Buscar backups en carpetas
-        for folder in self.backup_dir.iterdir():
-            if folder.is_dir():
-                metadata_file = folder / 'backup_info.json'
+        for entry in entries:
+            # Backups deduplicados (se completan abajo)
+            if entry.name.endswith(self.MANIFEST_SUFFIX):
+                manifests[entry.path] = self._read_metadata(Path(entry.path))
+            
+            # Buscar backups comprimidos
+            elif entry.name.endswith('.zip') and entry.is_file(follow_symlinks=False):
+                zip_file = Path(entry.path)
+                metadata = self._read_metadata(zip_file.with_suffix('.json'))
+                files = metadata.get('files')
                 
-                metadata = {}
-                if metadata_file.exists():
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
+                if files is None:
+                    # Sin metadata: leer el directorio central del ZIP
+                    try:
+                        with zipfile.ZipFile(zip_file, 'r') as zipf:
+                            files = zipf.namelist()
+                    except zipfile.BadZipFile:
+                        files = []
                 
-                # Calcular tamaño total
-                total_size = sum(
-                    f.stat().st_size 
-                    for f in folder.rglob('*') 
-                    if f.is_file()
-                )
+                backups.append({
+                    'name': zip_file.stem,
+                    'type': 'compressed',
+                    'size_mb': round(entry.stat(follow_symlinks=False).st_size / (1024 * 1024), 2),
+                    'created_at': metadata.get('created_at', 'Unknown'),
+                    'files': files,
+                    'path': entry.path
+                })
+            
+            # Buscar backups en carpetas (excepto el almacén de chunks)
+            elif entry.is_dir(follow_symlinks=False) and entry.name != self.CHUNKS_DIR:
+                folder = Path(entry.path)
+                metadata = self._read_metadata(folder / 'backup_info.json')
                 
                 backups.append({
-                    'name': folder.name,
+                    'name': entry.name,
                     'type': 'folder',
-                    'size_mb': round(total_size / (1024 * 1024), 2),
+                    'size_mb': round(self._dir_size(entry.path) / (1024 * 1024), 2),
                     'created_at': metadata.get('created_at', 'Unknown'),
                     'files': metadata.get('files', []),
-                    'path': str(folder)
+                    'path': entry.path
                 })
         
+        backups.extend(self._describe_dedup_backups(manifests))
+        
         # Ordenar por fecha (más reciente primero)
         backups.sort(key=lambda x: x['created_at'], reverse=True)
         
         return backups
     
+    def _describe_dedup_backups(
+        self,
+        manifests: Dict[str, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Describir backups deduplicados con tamaño lógico y físico
+        
+        El tamaño lógico es la suma de los archivos respaldados; el físico
+        es lo que ocupan los chunks que solo referencia ese backup (lo que
+        se liberaría al eliminarlo).
+        """
+        refcounts: Dict[str, int] = {}
+        chunk_sets = {}
+        
+        for path, manifest in manifests.items():
+            chunk_set = {
+                digest: size
+                for entry in manifest.get('entries', [])
+                for digest, size in entry['chunks']
+            }
+            chunk_sets[path] = chunk_set
+            for digest in chunk_set:
+                refcounts[digest] = refcounts.get(digest, 0) + 1
+        
+        backups = []
+        for path, manifest in manifests.items():
+            logical = sum(
+                size
+                for entry in manifest.get('entries', [])
+                for _, size in entry['chunks']
+            )
+            physical = sum(
+                size for digest, size in chunk_sets[path].items()
+                if refcounts[digest] == 1
+            )
+            
+            backups.append({
+                'name': os.path.basename(path)[:-len(self.MANIFEST_SUFFIX)],
+                'type': 'dedup',
+                'size_mb': round(logical / (1024 * 1024), 2),
+                'physical_mb': round(physical / (1024 * 1024), 2),
+                'created_at': manifest.get('created_at', 'Unknown'),
+                'files': manifest.get('files', []),
+                'path': path
+            })
+        
+        return backups
+    
+    @staticmethod
+    def _read_metadata(metadata_file: Path) -> Dict[str, Any]:
+        """Leer la metadata de un backup ({} si no existe)"""
+        try:
+            with open(metadata_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+    
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        """Tamaño total de un directorio usando os.scandir (sin stat extra por archivo)"""
+        total = 0
+        stack = [path]
+        
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        
+        return total
+    
     def cleanup_old_backups(self) -> int:
         """
         Limpiar backups antiguos manteniendo solo los últimos N
@@ -254,7 +548,9 @@ class BackupManager:
             for backup in to_delete:
                 backup_path = Path(backup['path'])
                 
-                if backup['type'] == 'compressed':
+                if backup['type'] == 'dedup':
+                    backup_path.unlink()
+                elif backup['type'] == 'compressed':
                     backup_path.unlink()
                     # Eliminar metadata
                     metadata_file = backup_path.with_suffix('.json')
@@ -265,12 +561,60 @@ class BackupManager:
                 
                 count += 1
             
+            self._gc_chunks()
+            
             return count
         
         except Exception as e:
             print(f"⚠️  Error en cleanup: {e}")
             return 0
     
+    def _gc_chunks(self) -> int:
+        """
+        Eliminar chunks que ya no referencia ningún manifiesto
+        
+        Returns:
+            int: Número de chunks eliminados
+        """
+        if not self.chunks_dir.exists():
+            return 0
+        
+        referenced: Set[str] = set()
+        for manifest_file in self.backup_dir.glob(f"*{self.MANIFEST_SUFFIX}"):
+            manifest = self._read_metadata(manifest_file)
+            for entry in manifest.get('entries', []):
+                referenced.update(digest for digest, _ in entry['chunks'])
+        
+        cutoff = time.time() - self.GC_GRACE_SECONDS
+        garbage = []
+        with os.scandir(self.chunks_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.chunk'):
+                    if entry.name[:-len('.chunk')] in referenced:
+                        continue
+                elif not entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        garbage.append(entry.path)
+                except FileNotFoundError:
+                    pass
+        
+        # unlink es puramente syscall: solapar las llamadas en hilos
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            removed = sum(executor.map(self._unlink_missing_ok, garbage))
+        
+        return removed
+    
+    @staticmethod
+    def _unlink_missing_ok(path: str) -> bool:
+        """Eliminar un archivo; False si ya no existía (otro GC concurrente)"""
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+    
     def backup_config(self, config_dir: str = "config") -> Optional[str]:
         """
         Crear backup específico de configuración
@@ -296,6 +640,9 @@ class BackupManager:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_name = f"config_backup_{timestamp}"
         
+        if self.dedup:
+            return self.create_dedup_backup(config_files, backup_name)
+        
         return self.create_backup(config_files, backup_name)
 
 
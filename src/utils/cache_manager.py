@@ -4,17 +4,75 @@
 Sistema de gestión de cache para datos temporales
 """
 
+import atexit
 import json
 import os
+import heapq
 import shutil
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 import hashlib
 
 
+# Instancias vivas: sus cambios pendientes se guardan al salir
+_instances: 'weakref.WeakSet[CacheManager]' = weakref.WeakSet()
+
+
+def _flush_all():
+    """Persistir los cambios pendientes de todas las instancias"""
+    for cache in list(_instances):
+        cache.flush()
+
+
+atexit.register(_flush_all)
+
+
 class CacheManager:
-    """Gestor de cache para datos temporales"""
+    """
+    Gestor de cache para datos temporales
+
+    Mantiene un índice en disco (``.cache_index``) con la metadata de cada
+    entrada, de modo que listar, limpiar expirados o desalojar no requiere
+    abrir cada archivo del cache:
+
+    - ``_entries``: OrderedDict clave → metadata, en orden de acceso
+    - ``_expiry_heap``: min-heap de ``(expires_ts, clave)`` con borrado
+      perezoso; ``cleanup_expired()`` solo visita las k entradas expiradas
+    - ``_credit_heap``: min-heap de ``(crédito, clave)`` para el desalojo
+      GreedyDualSize: crédito = L + costo / tamaño, donde L es el crédito
+      de la última entrada desalojada. Así las entradas grandes y poco
+      usadas salen antes que las pequeñas, a diferencia de un LRU puro.
+
+    Los heaps se reconstruyen desde ``_entries`` cuando los registros
+    obsoletos superan al doble de las entradas vivas.
+
+    ``set()``, ``delete()`` y ``get()`` (contadores y créditos) no reescriben
+    el índice en cada llamada: se persiste cada ``STATS_FLUSH_EVERY``
+    cambios (o tantos como entradas haya, si son más), en las operaciones por lotes (``cleanup_expired``, ``clear``,
+    ``delete_many``), con ``flush()`` y al salir del intérprete.
+
+    Varios procesos (agente, ``manage_data.py``) comparten el directorio:
+    antes de escribir, si ``.cache_index`` cambió en disco se fusiona con
+    el índice en memoria (solo sobreviven entradas cuyo archivo existe) y
+    los contadores se suman. ``cleanup_expired()`` y ``list_keys()``
+    reconcilian el índice con los archivos si el número no coincide.
+    """
+
+    INDEX_FILE = '.cache_index'
+    HEAP_COMPACT_MIN = 64  # Tamaño mínimo de heap antes de compactar
+    STATS_FLUSH_EVERY = 32  # Cambios mínimos entre escrituras del índice
+    
+    # Contadores del índice: nombre en disco → atributo
+    _STAT_FIELDS = (
+        ('hits', '_hits'),
+        ('misses', '_misses'),
+        ('hit_bytes', '_hit_bytes'),
+        ('miss_bytes', '_miss_bytes'),
+        ('gds_evictions', '_evictions'),
+    )
     
     def __init__(self, cache_dir: str = "data/cache"):
         self.cache_dir = Path(cache_dir)
@@ -23,8 +81,35 @@ class CacheManager:
         # Configuración por defecto
         self.max_age_hours = 24  # Tiempo máximo de vida del cache
         self.max_size_mb = 100   # Tamaño máximo del cache
+        
+        # Índice en memoria
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._total_size = 0
+        self._credit_heap: List[Tuple[float, str]] = []
+        self._gds_clock = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._hit_bytes = 0
+        self._miss_bytes = 0
+        self._evictions = 0
+        self._pending_changes = 0  # Cambios no persistidos en el índice
+        
+        # Versión (inode, mtime, tamaño) del índice en disco que ya se
+        # incorporó, y sus contadores: lo que exceda es aporte local
+        self._index_version: Optional[Tuple[int, int, int]] = None
+        self._synced_stats: Dict[str, int] = {}
+        
+        self._load_index()
+        _instances.add(self)
     
-    def set(self, key: str, data: Any, ttl_hours: int = None) -> bool:
+    def set(
+        self,
+        key: str,
+        data: Any,
+        ttl_hours: int = None,
+        cost: float = 1.0
+    ) -> bool:
         """
         Guardar datos en cache
         
@@ -32,6 +117,7 @@ class CacheManager:
             key: Clave única para identificar los datos
             data: Datos a cachear (debe ser serializable a JSON)
             ttl_hours: Tiempo de vida en horas (None = usar default)
+            cost: Costo relativo de recalcular los datos (para el desalojo)
         
         Returns:
             bool: True si se guardó correctamente
@@ -41,12 +127,13 @@ class CacheManager:
             
             # Preparar metadata
             ttl = ttl_hours if ttl_hours is not None else self.max_age_hours
-            expires_at = datetime.now() + timedelta(hours=ttl)
+            created_at = datetime.now()
+            expires_at = created_at + timedelta(hours=ttl)
             
             cache_data = {
                 'key': key,
                 'data': data,
-                'created_at': datetime.now().isoformat(),
+                'created_at': created_at.isoformat(),
                 'expires_at': expires_at.isoformat(),
                 'ttl_hours': ttl
             }
@@ -55,6 +142,19 @@ class CacheManager:
             with open(cache_file, 'w', encoding='utf-8') as f:
                 json.dump(cache_data, f, indent=2)
             
+            size = cache_file.stat().st_size
+            self._index_add(
+                key,
+                cache_file.name,
+                created_at.timestamp(),
+                expires_at.timestamp(),
+                size,
+                cost
+            )
+            self._miss_bytes += size
+            self._evict_if_needed()
+            self._mark_dirty()
+            
             return True
         
         except Exception as e:
@@ -75,6 +175,9 @@ class CacheManager:
             cache_file = self._get_cache_file(key)
             
             if not cache_file.exists():
+                self._index_remove(key)
+                self._misses += 1
+                self._mark_dirty()
                 return None
             
             # Leer datos
@@ -87,20 +190,61 @@ class CacheManager:
             if datetime.now() > expires_at:
                 # Cache expirado, eliminar
                 cache_file.unlink()
+                self._index_remove(key)
+                self._misses += 1
+                self._mark_dirty()
                 return None
             
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._refresh_credit(key)
+            else:
+                # Entrada escrita por otro proceso: incorporarla al índice
+                self._index_add(
+                    key,
+                    cache_file.name,
+                    datetime.fromisoformat(cache_data['created_at']).timestamp(),
+                    expires_at.timestamp(),
+                    cache_file.stat().st_size
+                )
+            
+            self._hits += 1
+            self._hit_bytes += self._entries[key]['size']
+            self._mark_dirty()
             return cache_data['data']
         
         except Exception as e:
             print(f"⚠️  Error leyendo cache: {e}")
             return None
     
+    def flush(self):
+        """Persistir los cambios pendientes del índice"""
+        if not self._pending_changes:
+            return
+        try:
+            self._save_index()
+        except Exception as e:
+            print(f"⚠️  Error guardando índice del cache: {e}")
+    
+    def _mark_dirty(self):
+        """
+        Contar un cambio y persistir el índice cuando se acumulan suficientes
+        
+        El umbral crece con el número de entradas: escribir un índice de n
+        entradas cada n cambios mantiene el costo amortizado en O(1).
+        """
+        self._pending_changes += 1
+        if self._pending_changes >= max(self.STATS_FLUSH_EVERY, len(self._entries)):
+            self.flush()
+    
     def delete(self, key: str) -> bool:
         """Eliminar entrada del cache"""
         try:
             cache_file = self._get_cache_file(key)
+            self._index_remove(key)
             if cache_file.exists():
                 cache_file.unlink()
+                self._mark_dirty()
                 return True
             return False
         except Exception as e:
@@ -119,10 +263,16 @@ class CacheManager:
             int: Número de archivos eliminados
         """
         try:
-            count = 0
-            for file in self.cache_dir.glob('*.json'):
-                file.unlink()
-                count += 1
+            count = self._unlink_files(
+                [entry.name for entry in self._scan_cache_files()]
+            )
+            
+            self._entries.clear()
+            self._expiry_heap.clear()
+            self._credit_heap.clear()
+            self._total_size = 0
+            self._save_index()
+            
             return count
         except Exception as e:
             print(f"⚠️  Error limpiando cache: {e}")
@@ -132,59 +282,97 @@ class CacheManager:
         """
         Limpiar entradas expiradas
         
+        Solo recorre las entradas del heap cuya expiración ya pasó, por lo
+        que el costo es proporcional al número de expirados, no al tamaño
+        total del cache.
+        
         Returns:
             int: Número de archivos eliminados
         """
         try:
-            count = 0
-            for file in self.cache_dir.glob('*.json'):
-                try:
-                    with open(file, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-                    
-                    expires_at = datetime.fromisoformat(cache_data['expires_at'])
-                    
-                    if datetime.now() > expires_at:
-                        file.unlink()
-                        count += 1
-                except:
-                    # Si hay error leyendo, eliminar el archivo corrupto
-                    file.unlink()
-                    count += 1
+            self._reconcile()
+            expired_files = []
+            now = datetime.now().timestamp()
+            heap = self._expiry_heap
             
-            return count
+            while heap and heap[0][0] <= now:
+                expires_ts, key = heapq.heappop(heap)
+                entry = self._entries.get(key)
+                
+                # Borrado perezoso: ignorar registros obsoletos del heap
+                if entry is None or entry['expires_ts'] != expires_ts:
+                    continue
+                
+                self._index_remove(key)
+                expired_files.append(entry['file'])
+            
+            if expired_files:
+                self._unlink_files(expired_files)
+                self._save_index()
+            
+            return len(expired_files)
         except Exception as e:
             print(f"⚠️  Error en cleanup: {e}")
             return 0
     
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Obtener varias claves de una vez
+        
+        Returns:
+            dict: clave → datos, solo para las claves existentes y vigentes
+        """
+        results = {}
+        for key in keys:
+            data = self.get(key)
+            if data is not None:
+                results[key] = data
+        return results
+    
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Eliminar varias claves con una sola escritura del índice
+        
+        Returns:
+            int: Número de archivos eliminados
+        """
+        try:
+            filenames = []
+            for key in keys:
+                entry = self._index_remove(key)
+                filenames.append(entry['file'] if entry else self._get_cache_file(key).name)
+            
+            count = self._unlink_files(filenames)
+            self._save_index()
+            return count
+        except Exception as e:
+            print(f"⚠️  Error eliminando cache: {e}")
+            return 0
+    
     def get_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas del cache"""
         try:
-            files = list(self.cache_dir.glob('*.json'))
-            total_size = sum(f.stat().st_size for f in files)
-            
-            expired = 0
-            valid = 0
-            
-            for file in files:
-                try:
-                    with open(file, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-                    
-                    expires_at = datetime.fromisoformat(cache_data['expires_at'])
-                    
-                    if datetime.now() > expires_at:
-                        expired += 1
-                    else:
-                        valid += 1
-                except:
-                    expired += 1
+            now = datetime.now().timestamp()
+            expired = sum(
+                1 for entry in self._entries.values()
+                if entry['expires_ts'] <= now
+            )
+            lookups = self._hits + self._misses
+            requested_bytes = self._hit_bytes + self._miss_bytes
             
             return {
-                'total_entries': len(files),
-                'valid_entries': valid,
+                'total_entries': len(self._entries),
+                'valid_entries': len(self._entries) - expired,
                 'expired_entries': expired,
-                'total_size_mb': round(total_size / (1024 * 1024), 2),
+                'total_size_mb': round(self._total_size / (1024 * 1024), 2),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 2) if lookups else 0.0,
+                'byte_hit_ratio': (
+                    round(self._hit_bytes / requested_bytes, 2)
+                    if requested_bytes else 0.0
+                ),
+                'gds_evictions': self._evictions,
                 'cache_dir': str(self.cache_dir)
             }
         except Exception as e:
@@ -199,27 +387,315 @@ class CacheManager:
     
     def list_keys(self) -> List[Dict[str, Any]]:
         """Listar todas las claves en el cache"""
-        keys = []
+        self._reconcile()
+        now = datetime.now().timestamp()
+        
+        return [
+            {
+                'key': key,
+                'created_at': datetime.fromtimestamp(entry['created_ts']),
+                'expires_at': datetime.fromtimestamp(entry['expires_ts']),
+                'expired': now > entry['expires_ts'],
+                'size_kb': round(entry['size'] / 1024, 2)
+            }
+            for key, entry in self._entries.items()
+        ]
+    
+    # ═══════════════════════════════════════════════════════════
+    # ÍNDICE
+    # ═══════════════════════════════════════════════════════════
+    
+    def _index_add(
+        self,
+        key: str,
+        filename: str,
+        created_ts: float,
+        expires_ts: float,
+        size: int,
+        cost: float = 1.0
+    ):
+        """Registrar (o reemplazar) una entrada en el índice"""
+        self._index_remove(key)
+        self._entries[key] = {
+            'file': filename,
+            'created_ts': created_ts,
+            'expires_ts': expires_ts,
+            'size': size,
+            'cost': cost
+        }
+        self._total_size += size
+        heapq.heappush(self._expiry_heap, (expires_ts, key))
+        self._refresh_credit(key)
+    
+    def _index_remove(self, key: str) -> Optional[Dict[str, Any]]:
+        """Quitar una entrada del índice (el heap se limpia de forma perezosa)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_size -= entry['size']
+        return entry
+    
+    def _refresh_credit(self, key: str):
+        """Asignar a una entrada su crédito GreedyDualSize (al admitirla o accederla)"""
+        entry = self._entries[key]
+        credit = self._gds_clock + entry.get('cost', 1.0) / max(entry['size'], 1)
+        entry['credit'] = credit
+        heapq.heappush(self._credit_heap, (credit, key))
+        self._compact_heaps()
+    
+    def _compact_heaps(self):
+        """Descartar registros obsoletos si superan 2× las entradas vivas"""
+        limit = max(2 * len(self._entries), self.HEAP_COMPACT_MIN)
         
-        for file in self.cache_dir.glob('*.json'):
+        if len(self._expiry_heap) > limit:
+            self._expiry_heap = [
+                (entry['expires_ts'], key) for key, entry in self._entries.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+        
+        if len(self._credit_heap) > limit:
+            self._credit_heap = [
+                (entry['credit'], key) for key, entry in self._entries.items()
+                if 'credit' in entry
+            ]
+            heapq.heapify(self._credit_heap)
+    
+    def _evict_if_needed(self):
+        """Desalojar por GreedyDualSize mientras se supere max_size_mb"""
+        max_bytes = self.max_size_mb * 1024 * 1024
+        heap = self._credit_heap
+        
+        while self._total_size > max_bytes and len(self._entries) > 1 and heap:
+            credit, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            
+            # Borrado perezoso: ignorar créditos obsoletos
+            if entry is None or entry.get('credit') != credit:
+                continue
+            
+            # Envejecer: las entradas restantes "pierden" el crédito desalojado
+            self._gds_clock = credit
+            self._index_remove(key)
+            self._evictions += 1
             try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                
-                expires_at = datetime.fromisoformat(cache_data['expires_at'])
-                created_at = datetime.fromisoformat(cache_data['created_at'])
-                
-                keys.append({
-                    'key': cache_data['key'],
-                    'created_at': created_at,
-                    'expires_at': expires_at,
-                    'expired': datetime.now() > expires_at,
-                    'size_kb': round(file.stat().st_size / 1024, 2)
-                })
-            except:
+                (self.cache_dir / entry['file']).unlink()
+            except FileNotFoundError:
+                pass
+    
+    def _load_index(self):
+        """Cargar el índice desde disco, reconstruyéndolo si no existe"""
+        index_file = self.cache_dir / self.INDEX_FILE
+        
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            
+            for key, entry in index.get('entries', []):
+                self._entries[key] = entry
+                self._total_size += entry['size']
+            for name, attr in self._STAT_FIELDS:
+                setattr(self, attr, index.get(name, 0))
+            self._gds_clock = index.get('gds_clock', 0.0)
+            self._index_version = self._stat_index()
+            self._synced_stats = {name: index.get(name, 0) for name, _ in self._STAT_FIELDS}
+        except FileNotFoundError:
+            self._rebuild_index()
+            return
+        except Exception:
+            # Índice corrupto: reconstruir desde los archivos
+            self._entries.clear()
+            self._total_size = 0
+            self._rebuild_index()
+            return
+        
+        self._rebuild_heaps()
+    
+    def _rebuild_heaps(self):
+        """Reconstruir los heaps de expiración y crédito desde _entries"""
+        self._expiry_heap = [
+            (entry['expires_ts'], key) for key, entry in self._entries.items()
+        ]
+        heapq.heapify(self._expiry_heap)
+        
+        self._credit_heap = []
+        for key, entry in self._entries.items():
+            if 'credit' in entry:
+                self._credit_heap.append((entry['credit'], key))
+            else:
+                self._refresh_credit(key)
+        heapq.heapify(self._credit_heap)
+    
+    def _rebuild_index(self):
+        """Reconstruir el índice leyendo los archivos del cache"""
+        for entry in self._scan_cache_files():
+            self._index_file(entry)
+        
+        if self._entries:
+            self._save_index()
+    
+    def _index_file(self, entry: os.DirEntry):
+        """Registrar en el índice un archivo del cache leyendo su metadata"""
+        size = entry.stat(follow_symlinks=False).st_size
+        try:
+            with open(entry.path, 'r', encoding='utf-8') as f:
+                cache_data = json.load(f)
+            
+            self._index_add(
+                cache_data['key'],
+                entry.name,
+                datetime.fromisoformat(cache_data['created_at']).timestamp(),
+                datetime.fromisoformat(cache_data['expires_at']).timestamp(),
+                size
+            )
+        except:
+            # Archivo corrupto: tratarlo como expirado
+            self._index_add(entry.name, entry.name, 0.0, 0.0, size)
+    
+    def _stat_index(self) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime_ns, tamaño) de .cache_index; None si no existe"""
+        try:
+            st = (self.cache_dir / self.INDEX_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    
+    def _sync_index(self):
+        """
+        Fusionar el índice en disco si otro proceso lo reescribió
+        
+        Se conservan las entradas de ambos índices cuyo archivo sigue
+        existiendo (para una misma clave gana la más reciente) y a los
+        contadores en disco se suma lo acumulado localmente.
+        """
+        version = self._stat_index()
+        if version is None or version == self._index_version:
+            return
+        
+        try:
+            with open(self.cache_dir / self.INDEX_FILE, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except Exception:
+            return
+        
+        present = {entry.name for entry in self._scan_cache_files()}
+        merged: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        
+        for key, entry in index.get('entries', []):
+            if entry['file'] in present:
+                merged[key] = entry
+        
+        # Las entradas locales van al final: son las accedidas por este proceso
+        for key, entry in self._entries.items():
+            if entry['file'] not in present:
                 continue
+            other = merged.pop(key, None)
+            if other is not None and other['created_ts'] > entry['created_ts']:
+                entry = other
+            merged[key] = entry
+        
+        self._entries = merged
+        self._total_size = sum(entry['size'] for entry in merged.values())
+        
+        for name, attr in self._STAT_FIELDS:
+            local = getattr(self, attr) - self._synced_stats.get(name, 0)
+            setattr(self, attr, index.get(name, 0) + local)
+        self._gds_clock = max(self._gds_clock, index.get('gds_clock', 0.0))
+        self._synced_stats = {name: index.get(name, 0) for name, _ in self._STAT_FIELDS}
+        self._index_version = version
+        
+        self._rebuild_heaps()
+    
+    def _reconcile(self):
+        """
+        Alinear el índice con los archivos del directorio
+        
+        Otro proceso puede haber escrito o borrado archivos sin que su
+        índice llegara a disco: si el número de archivos no coincide con
+        el de entradas se quitan las entradas sin archivo y se registran
+        los archivos sin entrada.
+        """
+        self._sync_index()
+        
+        files = self._scan_cache_files()
+        if len(files) == len(self._entries):
+            return
+        
+        names = {entry.name: entry for entry in files}
+        for key, entry in list(self._entries.items()):
+            if entry['file'] not in names:
+                self._index_remove(key)
+        
+        indexed = {entry['file'] for entry in self._entries.values()}
+        for name, entry in names.items():
+            if name not in indexed:
+                self._index_file(entry)
+        
+        self._mark_dirty()
+    
+    def _scan_cache_files(self) -> List[os.DirEntry]:
+        """Listar los archivos del cache con os.scandir (stat cacheado en el DirEntry)"""
+        with os.scandir(self.cache_dir) as it:
+            return [
+                entry for entry in it
+                if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False)
+            ]
+    
+    def _unlink_files(self, filenames: List[str]) -> int:
+        """
+        Eliminar archivos del directorio del cache en lote
+        
+        Donde el sistema lo soporta se abre el directorio una sola vez y se
+        usa unlinkat() con nombres relativos, evitando resolver la ruta
+        completa en cada llamada.
+        
+        Returns:
+            int: Número de archivos eliminados
+        """
+        removed = 0
+        dir_fd = None
+        
+        if os.unlink in os.supports_dir_fd:
+            dir_fd = os.open(self.cache_dir, os.O_RDONLY)
+        
+        try:
+            for name in filenames:
+                try:
+                    if dir_fd is not None:
+                        os.unlink(name, dir_fd=dir_fd)
+                    else:
+                        os.unlink(self.cache_dir / name)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+        
+        return removed
+    
+    def _save_index(self):
+        """Persistir el índice de forma atómica (fusionando cambios de otros procesos)"""
+        self._sync_index()
+        
+        index_file = self.cache_dir / self.INDEX_FILE
+        tmp_file = index_file.with_name(f"{index_file.name}.{os.getpid()}.tmp")
+        
+        index = {
+            'entries': list(self._entries.items()),
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_bytes': self._hit_bytes,
+            'miss_bytes': self._miss_bytes,
+            'gds_evictions': self._evictions,
+            'gds_clock': self._gds_clock
+        }
+        
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_file, index_file)
         
-        return keys
+        self._index_version = self._stat_index()
+        self._synced_stats = {name: index[name] for name, _ in self._STAT_FIELDS}
+        self._pending_changes = 0
 
 
 # CLI de prueba
@@ -4,6 +4,7 @@ Funciones para operaciones seguras con archivos y directorios
 """
 
 import os
+import sys
 import shutil
 import hashlib
 import gzip
@@ -13,6 +14,10 @@ from pathlib import Path
 from typing import Optional, Union, List, Dict, Any
 
 
+# hashlib.file_digest disponible desde Python 3.11
+_HAS_FILE_DIGEST = sys.version_info >= (3, 11)
+
+
 def ensure_directory(directory: Union[str, Path], mode: int = 0o755) -> bool:
     """
     Asegura que un directorio existe, creándolo si es necesario
@@ -155,11 +160,15 @@ def get_file_hash(
         Hash hexadecimal o None si falla
     """
     try:
-        hash_obj = hashlib.new(algorithm)
-        
         with open(filepath, 'rb') as f:
+            if _HAS_FILE_DIGEST:
+                # Python 3.11+: lectura y hash completos en C
+                return hashlib.file_digest(f, algorithm).hexdigest()
+            
+            hash_obj = hashlib.new(algorithm)
+            
             # Leer en chunks para archivos grandes
-            for chunk in iter(lambda: f.read(4096), b''):
+            for chunk in iter(lambda: f.read(65536), b''):
                 hash_obj.update(chunk)
         
         return hash_obj.hexdigest()
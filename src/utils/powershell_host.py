@@ -0,0 +1,160 @@
+# src/utils/powershell_host.py
+
+"""
+Proceso de PowerShell persistente compartido por los collectors
+"""
+
+import atexit
+import base64
+import logging
+import queue
+import subprocess
+import threading
+import time
+from typing import List, Optional
+
+
+log = logging.getLogger('ITAgent.PowerShellHost')
+
+
+class PowerShellHost:
+    """
+    Mantiene un único powershell.exe vivo y le envía scripts por stdin
+
+    Arrancar PowerShell cuesta cientos de ms por invocación; con un proceso
+    de larga duración ese costo se paga una sola vez durante la vida del
+    agente:
+
+    - Cada script se envía en una sola línea, codificado en base64, para que
+      saltos de línea y comillas no rompan el modo ``-Command -``
+    - Tras el script se escribe ``SENTINEL``; la respuesta es todo lo que
+      aparece en stdout hasta esa línea
+    - Un hilo lector vuelca stdout en una cola, de modo que ``run()`` puede
+      aplicar un timeout; si se excede, el proceso se descarta y se vuelve a
+      arrancar en la siguiente llamada
+    """
+
+    SENTINEL = '<<<END>>>'
+    COMMAND = [
+        'powershell', '-NoLogo', '-NoProfile', '-NonInteractive',
+        '-ExecutionPolicy', 'Bypass', '-Command', '-'
+    ]
+
+    def __init__(self, command: Optional[List[str]] = None):
+        self.command = command or self.COMMAND
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: 'queue.Queue[Optional[str]]' = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        """Arranca el proceso y su hilo lector"""
+        proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors='replace',
+            bufsize=1
+        )
+        lines: 'queue.Queue[Optional[str]]' = queue.Queue()
+
+        def reader():
+            for line in proc.stdout:
+                lines.put(line.rstrip('\r\n'))
+            lines.put(None)  # EOF: el proceso terminó
+
+        threading.Thread(target=reader, name='PowerShellHostReader', daemon=True).start()
+
+        self._proc = proc
+        self._lines = lines
+        return proc
+
+    def _discard(self) -> None:
+        """Termina el proceso actual sin esperar una respuesta"""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=1)
+        except Exception:
+            pass
+
+    def run(self, script: str, timeout: float = 30) -> Optional[str]:
+        """
+        Ejecuta un script y devuelve su salida
+
+        Args:
+            script: Código de PowerShell (puede tener varias líneas)
+            timeout: Segundos máximos de espera de la respuesta
+
+        Returns:
+            str: stdout del script o None si PowerShell no está disponible,
+            terminó o excedió el timeout
+        """
+        encoded = base64.b64encode(script.encode('utf-8')).decode('ascii')
+        line = (
+            "Invoke-Expression ([Text.Encoding]::UTF8.GetString("
+            f"[Convert]::FromBase64String('{encoded}'))) 2>$null "
+            f"| Out-String -Stream -Width 4096; '{self.SENTINEL}'\n"
+        )
+
+        with self._lock:
+            try:
+                proc = self._proc if self._proc and self._proc.poll() is None else self._start()
+                proc.stdin.write(line)
+                proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                log.debug("PowerShell no disponible: %s", e)
+                self._discard()
+                return None
+
+            output = []
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    received = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    log.warning("Timeout esperando respuesta de PowerShell (%ss)", timeout)
+                    self._discard()
+                    return None
+
+                if received is None:
+                    log.warning("El proceso de PowerShell terminó inesperadamente")
+                    self._discard()
+                    return None
+                if received == self.SENTINEL:
+                    return '\n'.join(output)
+                output.append(received)
+
+    def close(self) -> None:
+        """Envía 'exit' y termina el proceso"""
+        with self._lock:
+            proc, self._proc = self._proc, None
+            if proc is None or proc.poll() is not None:
+                return
+            try:
+                proc.stdin.write('exit\n')
+                proc.stdin.flush()
+                proc.wait(timeout=2)
+            except Exception:
+                proc.kill()
+
+
+_host: Optional[PowerShellHost] = None
+_host_lock = threading.Lock()
+
+
+def get_powershell_host() -> PowerShellHost:
+    """
+    Instancia compartida de PowerShellHost
+
+    Se crea en el primer uso y se cierra al salir del intérprete.
+    """
+    global _host
+    with _host_lock:
+        if _host is None:
+            _host = PowerShellHost()
+            atexit.register(_host.close)
+        return _host
@@ -8,10 +8,16 @@ import os
 import platform
 import socket
 import ctypes
+import functools
+import shutil
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
 
+# Sistema operativo: se consulta una sola vez por proceso
+OS_TYPE = platform.system()
+
+
 def get_os_info() -> Dict[str, str]:
     """
     Obtiene información detallada del sistema operativo
@@ -225,6 +231,20 @@ def get_environment_variables() -> Dict[str, str]:
     return env
 
 
+@functools.lru_cache(maxsize=None)
+def which(command: str) -> Optional[str]:
+    """
+    shutil.which cacheado: el PATH no cambia durante la ejecución
+    
+    Args:
+        command: Nombre del ejecutable
+    
+    Returns:
+        Ruta absoluta del ejecutable o None si no está en el PATH
+    """
+    return shutil.which(command)
+
+
 def is_64bit() -> bool:
     """
     Verifica si el sistema es de 64 bits
@@ -1,7 +1,14 @@
+import os
 import pytest
 import platform
 import subprocess
+import sys
+import threading
 from datetime import datetime
+from collectors import antivirus_collector
+from collectors.antivirus_collector import (
+    AntivirusCollector, ScanInfo, _FRESHCLAM_DATE_RE, _LINUX_AV_RE, _tail_lines, _wmi_datetime_iso
+)
 
 
 @pytest.mark.windows
@@ -262,4 +269,600 @@ class TestAntivirusStateDecoding:
         assert result['updated'] == expected['updated'], \
             f"updated: esperado {expected['updated']}, obtenido {result['updated']}"
         assert result['status_short'] == expected['status_short'], \
-            f"status: esperado {expected['status_short']}, obtenido {result['status_short']}"    f"status: esperado {expected['status_short']}, obtenido {result['status_short']}"
\ No newline at end of file
+            f"status: esperado {expected['status_short']}, obtenido {result['status_short']}"    f"status: esperado {expected['status_short']}, obtenido {result['status_short']}"
+
+
+@pytest.mark.unit
+@pytest.mark.antivirus
+class TestAntivirusCollectorMatching:
+    """Tests de la detección por patrones (sin depender del SO)"""
+    
+    def test_linux_alternation_matches_whole_names(self):
+        """Test: La alternancia detecta nombres completos sin distinguir mayúsculas"""
+        collector = AntivirusCollector()
+        output = "root 1 /usr/sbin/CLAMD --foreground\nii  esets  4.5  antivirus\n"
+        
+        found = collector._find_matches(_LINUX_AV_RE, output)
+        
+        assert found == {'clamd', 'esets'}
+    
+    def test_linux_alternation_matches_joined_names(self):
+        """Test: '_', '.' y los dígitos separan nombres (esets_daemon, clamd.service)"""
+        collector = AntivirusCollector()
+        output = (
+            "root 77 esets_daemon\n"
+            "root 78 mcafeeespd\n"
+            "clamd.service  loaded active running\n"
+        )
+        
+        found = collector._find_matches(_LINUX_AV_RE, output)
+        
+        assert found == {'esets', 'mcafeeespd', 'clamd'}
+    
+    def test_linux_alternation_ignores_substrings(self):
+        """Test: No hay falsos positivos dentro de otras palabras"""
+        collector = AntivirusCollector()
+        
+        assert collector._find_matches(_LINUX_AV_RE, "trending savgol") == set()
+    
+    def test_linux_detection_prefers_running_process(self, monkeypatch):
+        """Test: Un proceso en ejecución define el antivirus principal"""
+        outputs = {
+            'ps': "root 812 /usr/sbin/clamd --foreground\n",
+            'dpkg': "ii  rkhunter  1.4.6  all  rootkit checker\nii  clamav  1.0  amd64\n",
+        }
+        monkeypatch.setattr('collectors.antivirus_collector.psutil', None)
+        monkeypatch.setattr('collectors.antivirus_collector.which', lambda name: name if name in outputs else None)
+        monkeypatch.setattr(AntivirusCollector, '_run', staticmethod(lambda cmd, timeout=5: (cmd, outputs[cmd[0]])))
+        
+        info = AntivirusCollector(use_cache=False, thorough=True)._collect_linux_antivirus({})
+        
+        assert info['antivirus_name'] == 'ClamAV Daemon'
+        assert info['protection_status'] == 'active'
+        assert info['third_party_antivirus'] == ['ClamAV Daemon', 'ClamAV', 'RKHunter']
+        
+        # Sin thorough el proceso en ejecución basta: los paquetes se ignoran
+        info = AntivirusCollector(use_cache=False)._collect_linux_antivirus({})
+        
+        assert info['third_party_antivirus'] == ['ClamAV Daemon']
+    
+    def test_linux_package_probes_overlap_ps(self, monkeypatch):
+        """Test: dpkg se lanza sin esperar a que termine ps"""
+        dpkg_started = threading.Event()
+        outputs = {'ps': "", 'dpkg': "ii  clamav  1.0  amd64\n"}
+        
+        def fake_run(cmd, timeout=5):
+            if cmd[0] == 'dpkg':
+                dpkg_started.set()
+            else:
+                assert dpkg_started.wait(5), 'ps bloqueó a los detectores de paquetes'
+            return cmd, outputs.get(cmd[0], '')
+        
+        monkeypatch.setattr('collectors.antivirus_collector.psutil', None)
+        monkeypatch.setattr('collectors.antivirus_collector.which', lambda name: name if name in outputs else None)
+        monkeypatch.setattr(AntivirusCollector, '_run', staticmethod(fake_run))
+        
+        collector = AntivirusCollector(use_cache=False)
+        monkeypatch.setattr(collector, '_cached_package_list', lambda marker, cmd: collector._run(cmd)[1])
+        info = collector._collect_linux_antivirus({})
+        
+        assert info['antivirus_name'] == 'ClamAV'
+    
+    def test_package_list_cached_by_marker_mtime(self, tmp_path, monkeypatch):
+        """Test: El listado de paquetes se reutiliza mientras no cambie la base"""
+        marker = tmp_path / 'status'
+        marker.write_text('')
+        calls = []
+        monkeypatch.setattr('collectors.antivirus_collector.which', lambda name: name)
+        monkeypatch.setattr(
+            AntivirusCollector, '_run',
+            staticmethod(lambda cmd, timeout=5: calls.append(cmd[0]) or (cmd, "ii  ClamAV  1.0\n"))
+        )
+        collector = AntivirusCollector()
+        collector.cache_file = str(tmp_path / 'cache' / 'av.json')
+        
+        assert collector._cached_package_list(str(marker), ['dpkg', '-l']) == "ii  clamav  1.0\n"
+        assert collector._cached_package_list(str(marker), ['dpkg', '-l']) == "ii  clamav  1.0\n"
+        assert calls == ['dpkg']
+        
+        os.utime(marker, (0, 0))
+        collector._cached_package_list(str(marker), ['dpkg', '-l'])
+        assert calls == ['dpkg', 'dpkg']
+    
+    def test_rpm_marker_supports_sqlite_rpmdb(self, tmp_path, monkeypatch):
+        """Test: Con rpmdb.sqlite (sin Packages) el listado de rpm se cachea igual"""
+        sqlite_db = tmp_path / 'rpmdb.sqlite'
+        sqlite_db.write_text('')
+        monkeypatch.setattr(antivirus_collector, '_RPM_DBS', (str(tmp_path / 'Packages'), str(sqlite_db)))
+        markers = []
+        collector = AntivirusCollector()
+        monkeypatch.setattr(
+            collector, '_cached_package_list',
+            lambda marker, cmd: markers.append(marker) or ''
+        )
+        
+        collector._linux_rpm()
+        
+        assert markers == [str(sqlite_db)]
+    
+    def test_collect_uses_disk_cache(self, tmp_path, monkeypatch):
+        """Test: Con la misma huella se reutiliza la detección guardada"""
+        collector = AntivirusCollector()
+        collector.os_type = 'Linux'
+        collector.cache_file = str(tmp_path / 'av_collector.json')
+        calls = []
+        
+        def fake_collect(info):
+            calls.append(1)
+            info['antivirus_name'] = 'ClamAV'
+            return info
+        
+        monkeypatch.setattr(collector, '_fingerprint', lambda: 'fp-1')
+        monkeypatch.setattr(collector, '_collect_linux_antivirus', fake_collect)
+        monkeypatch.setattr(collector, '_get_firewall_status', lambda: 'active')
+        
+        first = collector.collect()
+        second = collector.collect()
+        
+        assert len(calls) == 1
+        assert second['antivirus_name'] == first['antivirus_name'] == 'ClamAV'
+        assert second['firewall_status'] == 'active'
+    
+    def test_disk_cache_hit_refreshes_firewall(self, tmp_path, monkeypatch):
+        """Test: Con la detección cacheada el firewall se vuelve a consultar"""
+        collector = AntivirusCollector()
+        collector.os_type = 'Linux'
+        collector.cache_file = str(tmp_path / 'av_collector.json')
+        ufw_conf = tmp_path / 'ufw.conf'
+        ufw_conf.write_text('ENABLED=yes\n')
+        monkeypatch.setattr(antivirus_collector, '_UFW_CONF', str(ufw_conf))
+        monkeypatch.setattr(antivirus_collector, '_FIREWALLD_PID_FILES', ())
+        monkeypatch.setattr(collector, '_fingerprint', lambda: 'fp-1')
+        monkeypatch.setattr(collector, '_collect_linux_antivirus', lambda info: dict(
+            info, antivirus_name='ClamAV', firewall_status=antivirus_collector._linux_firewall_state()
+        ))
+        
+        try:
+            assert collector.collect()['firewall_status'] == 'active'
+            
+            ufw_conf.write_text('ENABLED=no\n')
+            
+            assert collector.collect()['firewall_status'] == 'inactive'
+        finally:
+            antivirus_collector._clear_firewall_state_cache()
+    
+    def test_disk_cache_hit_refreshes_running_status(self, tmp_path, monkeypatch):
+        """Test: Con la detección cacheada se vuelve a comprobar el proceso"""
+        collector = AntivirusCollector()
+        collector.os_type = 'Linux'
+        collector.cache_file = str(tmp_path / 'av_collector.json')
+        running = [{'name': 'ClamAV Daemon'}]
+        
+        def fake_collect(info):
+            info['antivirus_name'] = 'ClamAV Daemon'
+            info['third_party_antivirus'] = ['ClamAV Daemon']
+            info['protection_status'] = 'active'
+            info['real_time_protection'] = True
+            return info
+        
+        monkeypatch.setattr(collector, '_fingerprint', lambda: 'fp-1')
+        monkeypatch.setattr(collector, '_collect_linux_antivirus', fake_collect)
+        monkeypatch.setattr(collector, '_get_firewall_status', lambda: 'active')
+        monkeypatch.setattr(collector, '_linux_ps', lambda: running)
+        
+        assert collector.collect()['protection_status'] == 'active'
+        
+        running.clear()
+        cached = collector.collect()
+        
+        assert cached['protection_status'] == 'installed'
+        assert cached['real_time_protection'] is False
+    
+    def test_macos_application_scan(self, tmp_path, monkeypatch):
+        """Test: Detectar aplicaciones de antivirus con una pasada por directorio"""
+        (tmp_path / 'Malwarebytes.app').mkdir()
+        (tmp_path / 'ESET Cyber Security.app').mkdir()
+        (tmp_path / 'Safari.app').mkdir()
+        (tmp_path / 'Sophos Home.app').write_text('no es una aplicación')
+        monkeypatch.setattr('os.path.expanduser', lambda path: str(tmp_path))
+        
+        collector = AntivirusCollector()
+        monkeypatch.setattr(collector, '_get_process_names', lambda: '')
+        info = collector._collect_macos_antivirus({})
+        
+        assert info['third_party_antivirus'] == ['ESET Cyber Security', 'Malwarebytes']
+    
+    def test_wmi_datetime_to_iso(self):
+        """Test: Convertir datetime CIM a ISO 8601"""
+        assert _wmi_datetime_iso('20240115103000.000000+000') == '2024-01-15T10:30:00'
+        assert _wmi_datetime_iso(None) is None
+        assert _wmi_datetime_iso('invalid') is None
+    
+    def test_profile_timings(self, monkeypatch):
+        """Test: AV_COLLECTOR_PROFILE adjunta la duración de los subdetectores"""
+        monkeypatch.setenv('AV_COLLECTOR_PROFILE', '1')
+        collector = AntivirusCollector(use_cache=False)
+        collector.os_type = 'Linux'
+        monkeypatch.setattr(collector, '_linux_ps', lambda: [])
+        monkeypatch.setattr(collector, '_linux_dpkg', lambda: [])
+        monkeypatch.setattr(collector, '_linux_rpm', lambda: [])
+        monkeypatch.setattr(collector, '_linux_systemd', lambda: [])
+        
+        timings = collector.collect()['_timings_ns']
+        
+        assert {'total', 'linux.ps', 'linux.dpkg', 'linux.firewall'} <= set(timings)
+        assert all(value >= 0 for value in timings.values())
+    
+    def test_concurrent_collect_is_single_flight(self, monkeypatch):
+        """Test: Llamadas concurrentes comparten una sola recopilación"""
+        import threading
+        import time
+        
+        collector = AntivirusCollector(use_cache=False)
+        calls = []
+        
+        def slow_collect(detail_level='full'):
+            calls.append(1)
+            time.sleep(0.2)
+            return {'antivirus_name': 'ClamAV'}
+        
+        monkeypatch.setattr(collector, 'collect_antivirus_info', slow_collect)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(collector.collect()))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1
+        assert [r['antivirus_name'] for r in results] == ['ClamAV'] * 4
+    
+    def test_single_flight_results_are_independent(self, monkeypatch):
+        """Test: Cada llamador recibe su propia copia (también las listas)"""
+        collector = AntivirusCollector(use_cache=False)
+        started = threading.Event()
+        release = threading.Event()
+        
+        def slow_collect(detail_level='full'):
+            started.set()
+            release.wait(5)
+            return {'antivirus_name': 'ClamAV', 'third_party_antivirus': ['ClamAV']}
+        
+        monkeypatch.setattr(collector, 'collect_antivirus_info', slow_collect)
+        results = []
+        leader = threading.Thread(target=lambda: results.append(collector.collect()))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(collector.collect()))
+        follower.start()
+        release.set()
+        leader.join()
+        follower.join()
+        
+        results[0]['third_party_antivirus'].append('otro')
+        
+        assert results[1]['third_party_antivirus'] == ['ClamAV']
+    
+    def test_single_flight_timeout_returns_last_result(self, monkeypatch):
+        """Test: Si la recopilación en curso tarda, no se lanza otra"""
+        collector = AntivirusCollector(use_cache=False)
+        collector.INFLIGHT_TIMEOUT = 0.05
+        release = threading.Event()
+        started = threading.Event()
+        calls = []
+        
+        def collect_info(detail_level='full'):
+            calls.append(1)
+            if len(calls) > 1:
+                started.set()
+                release.wait(5)
+            return {'antivirus_name': 'ClamAV'}
+        
+        monkeypatch.setattr(collector, 'collect_antivirus_info', collect_info)
+        collector.collect()
+        
+        leader = threading.Thread(target=collector.collect)
+        leader.start()
+        started.wait(5)
+        try:
+            result = collector.collect()
+        finally:
+            release.set()
+            leader.join()
+        
+        assert result == {'antivirus_name': 'ClamAV'}
+        assert len(calls) == 2
+
+    def test_generic_scan_respects_depth(self, tmp_path):
+        """Test: La búsqueda genérica encuentra definiciones sin pasar la profundidad"""
+        shallow = tmp_path / 'data' / 'Definitions'
+        shallow.mkdir(parents=True)
+        deep = tmp_path / 'b' / 'c' / 'd' / 'e' / 'signatures'
+        deep.mkdir(parents=True)
+
+        found = AntivirusCollector._find_definitions_mtime(str(tmp_path))
+
+        assert found == shallow.stat().st_mtime
+        assert AntivirusCollector._find_definitions_mtime(str(tmp_path / 'b')) is None
+
+    def test_windows_vendor_dispatch(self, monkeypatch):
+        """Test: El nombre del antivirus selecciona el método del vendor"""
+        collector = AntivirusCollector(use_cache=False)
+        monkeypatch.setattr(collector, '_scan_by_vendor', lambda vendor: {'vendor': vendor})
+        monkeypatch.setattr(
+            collector, '_get_generic_antivirus_scan_info', lambda av: {'vendor': 'generic'}
+        )
+
+        assert collector._get_windows_scan_info({'name': 'ESET Security'}) == {'vendor': 'ESET'}
+        assert collector._get_windows_scan_info({'name': 'Symantec Endpoint'}) == {'vendor': 'Norton'}
+        assert collector._get_windows_scan_info({'name': 'Other AV'}) == {'vendor': 'generic'}
+
+        monkeypatch.setattr(collector, '_get_windows_defender_scan_info', lambda: {'vendor': 'defender'})
+        defender = {'name': 'Microsoft Defender Antivirus', 'is_defender': True}
+        assert collector._get_windows_scan_info(defender) == {'vendor': 'defender'}
+
+    def test_defender_scan_info_skips_powershell(self, monkeypatch):
+        """Test: Con MSFT_MpComputerStatus no se lanza PowerShell"""
+        collector = AntivirusCollector(use_cache=False)
+        monkeypatch.setattr(collector, '_query_defender_status', lambda: {
+            'last_update': '2024-01-15T10:30:00',
+            'last_scan': None,
+        })
+
+        def fail(*args, **kwargs):
+            raise AssertionError('PowerShell no debería ejecutarse')
+
+        monkeypatch.setattr('collectors.antivirus_collector.subprocess.run', fail)
+
+        assert collector._get_windows_defender_scan_info() == {
+            'last_update': '2024-01-15T10:30:00'
+        }
+
+    def test_defender_powershell_fallback_uses_host(self, monkeypatch):
+        """Test: El fallback de PowerShell usa el proceso persistente"""
+        collector = AntivirusCollector(use_cache=False)
+        monkeypatch.setattr(collector, '_query_defender_status', lambda: None)
+        monkeypatch.setattr(collector, '_read_defender_registry', lambda: None)
+        scripts = []
+
+        class FakeHost:
+            def run(self, script, timeout=30):
+                scripts.append(script)
+                return '{"QuickScanEndTime": "2024-01-14", "FullScanEndTime": "2024-01-10"}'
+
+        monkeypatch.setattr(antivirus_collector, 'get_powershell_host', FakeHost)
+
+        assert collector._get_windows_defender_scan_info() == {'last_scan': '2024-01-14'}
+        assert scripts[0].startswith('Get-MpComputerStatus')
+
+    def test_defender_registry_before_powershell(self, monkeypatch):
+        """Test: Sin WMI el estado de Defender se lee del registro"""
+        filetime = (1705314600 * 10_000_000 + antivirus_collector._FILETIME_EPOCH_OFFSET).to_bytes(8, 'little')
+        values = {
+            'AVSignatureVersion': '1.403.123.0',
+            'SignaturesLastUpdated': filetime,
+            'DisableRealtimeMonitoring': 1,
+        }
+        monkeypatch.setattr(
+            antivirus_collector, '_read_hklm_value', lambda key_path, value_name: values.get(value_name)
+        )
+        collector = AntivirusCollector(use_cache=False)
+        monkeypatch.setattr(collector, '_query_defender_status', lambda: None)
+        monkeypatch.setattr(collector, '_run_ps', lambda *args, **kwargs: pytest.fail('PowerShell'))
+
+        assert collector._read_defender_registry() == {
+            'real_time_protection': False,
+            'signature_version': '1.403.123.0',
+            'last_update': datetime.fromtimestamp(1705314600).isoformat(),
+            'last_scan': None,
+        }
+        assert collector._get_windows_defender_scan_info() == {
+            'last_update': datetime.fromtimestamp(1705314600).isoformat()
+        }
+
+    def test_windows_firewall_from_registry(self, monkeypatch):
+        """Test: EnableFirewall de los perfiles evita lanzar netsh"""
+        antivirus_collector._clear_firewall_state_cache()
+        monkeypatch.setattr(antivirus_collector, '_wsc_provider_health', lambda provider: None)
+        monkeypatch.setattr(
+            antivirus_collector, '_read_hklm_value',
+            lambda key_path, value_name: 1 if key_path.endswith('PublicProfile') else 0
+        )
+        monkeypatch.setattr(
+            'collectors.antivirus_collector.subprocess.run',
+            lambda *args, **kwargs: pytest.fail('netsh no debería ejecutarse')
+        )
+
+        try:
+            assert antivirus_collector._windows_firewall_state() == 'active'
+        finally:
+            antivirus_collector._clear_firewall_state_cache()
+
+    def test_decode_antivirus_state(self):
+        """Test: Decodificar productState con las máscaras de bits"""
+        collector = AntivirusCollector(use_cache=False)
+
+        assert collector._decode_antivirus_state(0x061000)._asdict() == {
+            'protection_status': 'active',
+            'real_time_protection': True,
+            'definitions_up_to_date': False
+        }
+        assert collector._decode_antivirus_state(0x060000).definitions_up_to_date is True
+        assert collector._decode_antivirus_state(0x001000).protection_status == 'inactive'
+        assert collector._decode_antivirus_state(None).protection_status == 'unknown'
+
+    def test_iso_matches_datetime_isoformat(self):
+        """Test: _iso produce el mismo texto que datetime.isoformat()"""
+        for timestamp in (0, 1705314600, 1718000000):
+            assert antivirus_collector._iso(timestamp) == datetime.fromtimestamp(timestamp).isoformat()
+    
+    def test_mtime_iso(self, tmp_path):
+        """Test: Fecha de modificación en ISO o None si no existe"""
+        log_file = tmp_path / 'virlog.dat'
+        log_file.write_text('log')
+
+        assert AntivirusCollector._mtime_iso(str(log_file)).startswith(str(datetime.now().year))
+        assert AntivirusCollector._mtime_iso(str(tmp_path / 'missing')) is None
+
+    def test_latest_mtime(self, tmp_path):
+        """Test: mtime del log más reciente del directorio"""
+        old_log = tmp_path / 'old.log'
+        new_log = tmp_path / 'new.log'
+        other = tmp_path / 'notes.txt'
+        for path in (old_log, new_log, other):
+            path.write_text('x')
+        os.utime(old_log, (1000, 1000))
+        os.utime(new_log, (2000, 2000))
+        os.utime(other, (3000, 3000))
+
+        assert AntivirusCollector._latest_mtime(str(tmp_path), '.log') == 2000
+        assert AntivirusCollector._latest_mtime(str(tmp_path / 'missing'), '.log') is None
+
+    def test_collect_rejects_unknown_detail_level(self):
+        """Test: collect() valida el nivel de detalle"""
+        collector = AntivirusCollector(use_cache=False)
+
+        with pytest.raises(ValueError):
+            collector.collect(detail_level='verbose')
+
+    def test_vendor_update_first_path_wins(self, tmp_path, monkeypatch):
+        """Test: La primera ruta existente define la última actualización"""
+        defs = tmp_path / 'defs'
+        defs.mkdir()
+        report = tmp_path / 'report.txt'
+        report.write_text('x')
+        os.utime(defs, (1000, 1000))
+        monkeypatch.setitem(
+            antivirus_collector._WINDOWS_VENDOR_TABLE,
+            'Avast', {'update_paths': (str(tmp_path / 'missing'), str(defs), str(report))}
+        )
+
+        info = AntivirusCollector(use_cache=False)._scan_by_vendor('Avast')
+
+        assert info == {'last_update': datetime.fromtimestamp(1000).isoformat()}
+
+    def test_tail_lines_reads_end_of_file(self, tmp_path):
+        """Test: _tail_lines devuelve las últimas líneas sin leer todo el archivo"""
+        log_file = tmp_path / 'freshclam.log'
+        log_file.write_text(''.join(f'line {i}\n' for i in range(5000)))
+
+        assert _tail_lines(str(log_file), 3) == ['line 4997', 'line 4998', 'line 4999']
+        assert _tail_lines(str(log_file), 2, block=64) == ['line 4998', 'line 4999']
+
+    def test_freshclam_date_regex(self):
+        """Test: Extraer la fecha de una línea de freshclam.log"""
+        line = 'Mon Dec  1 12:00:00 2025 -> daily database updated (version: 27000)'
+
+        match = _FRESHCLAM_DATE_RE.match(line)
+
+        assert match is not None
+        assert match.group(1) == 'Mon Dec  1 12:00:00 2025'
+        assert _FRESHCLAM_DATE_RE.match('-> daily.cld database is up-to-date') is None
+
+    def test_scan_eset_dir_bounded_bfs(self, tmp_path):
+        """Test: La búsqueda de ESET clasifica archivos y respeta la profundidad"""
+        (tmp_path / 'logs').mkdir()
+        (tmp_path / 'logs' / 'scan.log').write_text('')
+        (tmp_path / 'update.dat').write_text('')
+        too_deep = tmp_path / 'a' / 'b' / 'c'
+        too_deep.mkdir(parents=True)
+        (too_deep / 'virus_update.dat').write_text('')
+        os.utime(tmp_path / 'update.dat', (0, 0))
+        
+        scan_info = ScanInfo()
+        AntivirusCollector._scan_eset_dir(str(tmp_path), scan_info)
+        
+        assert scan_info.last_scan == datetime.fromtimestamp(
+            int(os.path.getmtime(tmp_path / 'logs' / 'scan.log'))
+        ).isoformat()
+        assert scan_info.last_update == datetime.fromtimestamp(0).isoformat()
+        assert scan_info.definitions_up_to_date is None
+        assert not ScanInfo()
+    
+    def test_macos_vendor_dispatch(self, monkeypatch):
+        """Test: El nombre del antivirus de macOS selecciona su método"""
+        collector = AntivirusCollector(use_cache=False)
+        monkeypatch.setattr(collector, '_get_avast_macos_info', lambda: {'vendor': 'avast'})
+        monkeypatch.setattr(
+            collector, '_get_generic_macos_antivirus_info', lambda av: {'vendor': 'generic'}
+        )
+
+        assert collector._get_macos_scan_info({'name': 'AVG Antivirus'}) == {'vendor': 'avast'}
+        assert collector._get_macos_scan_info({'name': 'Norton 360'}) == {'vendor': 'generic'}
+
+    def test_fingerprint_tracks_signature_files(self, tmp_path, monkeypatch):
+        """Test: Una actualización de firmas cambia la huella del cache"""
+        signatures = tmp_path / 'daily.cvd'
+        signatures.write_text('x')
+        monkeypatch.setitem(
+            antivirus_collector._SIGNATURE_WATCH_PATHS, 'Linux', (str(signatures),)
+        )
+        collector = AntivirusCollector()
+        collector.os_type = 'Linux'
+
+        before = collector._fingerprint()
+        os.utime(signatures, (1000, 1000))
+
+        assert before is not None
+        assert collector._fingerprint() != before
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason="posix_spawn solo aplica a POSIX")
+    def test_spawn_uses_posix_spawn_path(self, monkeypatch):
+        """Test: _spawn lanza con ruta absoluta y close_fds=False"""
+        calls = []
+        real_run = subprocess.run
+
+        def spy(cmd, **kwargs):
+            calls.append((cmd, kwargs))
+            return real_run(cmd, **kwargs)
+
+        monkeypatch.setattr('collectors.antivirus_collector.subprocess.run', spy)
+
+        result = antivirus_collector._spawn([sys.executable, '-c', 'print("ok")'], timeout=10)
+
+        assert result.stdout.strip() == 'ok'
+        assert os.path.isabs(calls[0][0][0])
+        assert calls[0][1]['close_fds'] is False
+
+    def test_spawn_missing_command(self):
+        """Test: Un comando inexistente lanza FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            antivirus_collector._spawn(['comando-que-no-existe-xyz'], timeout=1)
+
+    def test_linux_firewall_from_ufw_conf(self, tmp_path, monkeypatch):
+        """Test: ufw.conf da el estado del firewall sin lanzar procesos"""
+        ufw_conf = tmp_path / 'ufw.conf'
+        monkeypatch.setattr(antivirus_collector, '_UFW_CONF', str(ufw_conf))
+        monkeypatch.setattr(antivirus_collector, '_FIREWALLD_PID_FILES', (str(tmp_path / 'firewalld.pid'),))
+        monkeypatch.setattr(
+            'collectors.antivirus_collector.subprocess.run',
+            lambda *args, **kwargs: pytest.fail('ufw no debería ejecutarse')
+        )
+
+        try:
+            ufw_conf.write_text('# /etc/ufw/ufw.conf\nENABLED=yes\nLOGLEVEL=low\n')
+            antivirus_collector._clear_firewall_state_cache()
+            assert antivirus_collector._linux_firewall_state() == 'active'
+
+            ufw_conf.write_text('ENABLED=no\n')
+            antivirus_collector._clear_firewall_state_cache()
+            assert antivirus_collector._linux_firewall_state() == 'inactive'
+        finally:
+            antivirus_collector._clear_firewall_state_cache()
+
+    def test_linux_firewall_from_firewalld_pid(self, tmp_path, monkeypatch):
+        """Test: El pid file de firewalld con un proceso vivo indica 'active'"""
+        pid_file = tmp_path / 'firewalld.pid'
+        pid_file.write_text(f'{os.getpid()}\n')
+        monkeypatch.setattr(antivirus_collector, '_UFW_CONF', str(tmp_path / 'missing.conf'))
+        monkeypatch.setattr(antivirus_collector, '_FIREWALLD_PID_FILES', (str(pid_file),))
+        monkeypatch.setattr(antivirus_collector.os.path, 'exists', lambda path: path == f'/proc/{os.getpid()}')
+
+        antivirus_collector._clear_firewall_state_cache()
+        try:
+            assert antivirus_collector._linux_firewall_state() == 'active'
+        finally:
+            antivirus_collector._clear_firewall_state_cache()
@@ -0,0 +1,72 @@
+# tests/test_collectors/test_base_collector.py
+
+"""
+Tests para BaseCollector
+"""
+
+import threading
+import pytest
+from collectors.base_collector import BaseCollector
+
+
+class CountingCollector(BaseCollector):
+    """Collector de prueba que cuenta sus recopilaciones"""
+    
+    def __init__(self, fail=False):
+        super().__init__()
+        self.calls = 0
+        self.fail = fail
+    
+    def collect(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("fallo simulado")
+        return {'calls': self.calls}
+
+
+@pytest.mark.unit
+class TestBaseCollector:
+    """Suite de tests para BaseCollector"""
+    
+    def test_safe_collect_uses_cache(self):
+        """Test: Dentro del TTL se reutiliza el último resultado"""
+        collector = CountingCollector()
+        
+        assert collector.safe_collect() == {'calls': 1}
+        assert collector.safe_collect() == {'calls': 1}
+        assert collector.safe_collect(force_refresh=True) == {'calls': 2}
+    
+    def test_safe_collect_returns_copy(self):
+        """Test: Modificar el resultado no altera el cache"""
+        collector = CountingCollector()
+        
+        collector.safe_collect()['calls'] = 99
+        collector.safe_collect().pop('calls')
+        
+        assert collector.safe_collect() == {'calls': 1}
+    
+    def test_safe_collect_cache_expires(self):
+        """Test: Con el TTL vencido se recopila de nuevo"""
+        collector = CountingCollector()
+        collector.CACHE_TTL = 0
+        
+        collector.safe_collect()
+        
+        assert collector.safe_collect() == {'calls': 2}
+    
+    def test_safe_collect_errors_not_cached(self):
+        """Test: Un error devuelve {} y no se cachea"""
+        collector = CountingCollector(fail=True)
+        
+        assert collector.safe_collect() == {}
+        assert collector.safe_collect() == {}
+        assert collector.calls == 2
+    
+    def test_submit_uses_shared_executor(self):
+        """Test: submit() reutiliza el mismo pool en todas las instancias"""
+        first = CountingCollector().submit(threading.current_thread)
+        second = CountingCollector().submit(threading.current_thread)
+        
+        assert first.result(timeout=5).name.startswith('ITAgent')
+        assert second.result(timeout=5).name.startswith('ITAgent')
+        assert CountingCollector._EXECUTOR is BaseCollector._EXECUTOR
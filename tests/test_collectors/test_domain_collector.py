@@ -4,6 +4,10 @@
 Tests para DomainCollector
 """
 
+import os
+import subprocess
+import sys
+import types
 import pytest
 from collectors.domain_collector import DomainCollector
 
@@ -34,3 +38,136 @@ class TestDomainCollector:
         
         if data['is_domain_joined']:
             assert 'domain_name' in data
+    
+    def test_windows_wmi_timeout_uses_fallback(self, monkeypatch):
+        """Test: Una consulta WMI colgada no bloquea y usa el fallback"""
+        import threading
+        
+        collector = DomainCollector()
+        collector.WMI_TIMEOUT = 0.1
+        release = threading.Event()
+        monkeypatch.setattr(collector, '_get_wmi', lambda: release.wait(5))
+        monkeypatch.setattr(
+            collector, 'get_windows_domain_info_fallback', lambda: {'is_domain_joined': False}
+        )
+        
+        try:
+            assert collector.get_windows_domain_info() == {'is_domain_joined': False}
+            assert collector._wmi_executor is None
+        finally:
+            release.set()
+    
+    def test_windows_wmi_connection_reused(self, monkeypatch):
+        """Test: La conexión WMI se crea una sola vez"""
+        class FakeComputerSystem:
+            PartOfDomain = True
+            Domain = 'corp.example.com'
+            Workgroup = None
+        
+        queries = []
+        
+        class FakeServices:
+            def ExecQuery(self, wql, language, flags):
+                queries.append((wql, flags))
+                return [FakeComputerSystem()]
+        
+        connections = []
+        
+        class FakeLocator:
+            def ConnectServer(self, server, namespace):
+                connections.append(namespace)
+                return FakeServices()
+        
+        fake_client = types.SimpleNamespace(Dispatch=lambda prog_id: FakeLocator())
+        monkeypatch.setitem(sys.modules, 'win32com', types.SimpleNamespace(client=fake_client))
+        monkeypatch.setitem(sys.modules, 'win32com.client', fake_client)
+        monkeypatch.setattr('collectors.domain_collector.pythoncom', None)
+        collector = DomainCollector()
+        monkeypatch.setattr(collector, 'get_applied_gpos', lambda: [])
+        
+        info = collector.get_windows_domain_info()
+        collector.get_windows_domain_info()
+        
+        assert info['is_domain_joined'] is True
+        assert info['domain_name'] == 'corp.example.com'
+        assert connections == ['root\\cimv2']
+        assert queries[0] == (
+            "SELECT Domain, PartOfDomain, Workgroup FROM Win32_ComputerSystem", 0x30
+        )
+    
+    def test_applied_gpos_from_rsop_xml(self, monkeypatch):
+        """Test: Las GPOs se leen del XML de gpresult /X y se cachean"""
+        rsop = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<Rsop xmlns="http://www.microsoft.com/GroupPolicy/Rsop">'
+            '<ComputerResults>'
+            '<GPO xmlns="http://www.microsoft.com/GroupPolicy/Settings">'
+            '<Name>Default Domain Policy</Name><IsValid>true</IsValid>'
+            '<FilterAllowed>true</FilterAllowed><AccessDenied>false</AccessDenied></GPO>'
+            '<GPO xmlns="http://www.microsoft.com/GroupPolicy/Settings">'
+            '<Name>Filtered Policy</Name><IsValid>true</IsValid>'
+            '<FilterAllowed>false</FilterAllowed><AccessDenied>false</AccessDenied></GPO>'
+            '</ComputerResults></Rsop>'
+        )
+        calls = []
+        
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            with open(cmd[2], 'w', encoding='utf-8') as f:
+                f.write(rsop)
+            return subprocess.CompletedProcess(cmd, 0, stdout=b'', stderr=b'')
+        
+        monkeypatch.setattr('collectors.domain_collector.subprocess.run', fake_run)
+        collector = DomainCollector()
+        
+        assert collector.get_applied_gpos() == ['Default Domain Policy']
+        assert collector.get_applied_gpos() == ['Default Domain Policy']
+        assert len(calls) == 1
+        assert not os.path.exists(calls[0][2])
+    
+    def test_linux_workgroup_from_smb_conf(self, tmp_path, monkeypatch):
+        """Test: El workgroup se lee de smb.conf ignorando comentarios"""
+        smb_conf = tmp_path / 'smb.conf'
+        smb_conf.write_text("# workgroup = COMMENTED\n[global]\n   Workgroup = OFICINA \n")
+        files = {'/etc/samba/smb.conf': str(smb_conf)}
+        
+        def fake_check_output(*args, **kwargs):
+            raise FileNotFoundError('realm')
+        
+        monkeypatch.setattr('collectors.domain_collector.os.path.exists', lambda path: path in files)
+        monkeypatch.setattr(
+            'collectors.domain_collector.open',
+            lambda path, *args, **kwargs: open(files[path], *args, **kwargs),
+            raising=False
+        )
+        monkeypatch.setattr('collectors.domain_collector.subprocess.check_output', fake_check_output)
+        
+        info = DomainCollector().get_linux_domain_info()
+        
+        assert info['workgroup'] == 'OFICINA'
+        assert info['is_domain_joined'] is False
+    
+    def test_linux_sssd_conf_read_without_subprocess(self, tmp_path, monkeypatch):
+        """Test: sssd.conf se lee directamente, sin lanzar sudo"""
+        sssd_conf = tmp_path / 'sssd.conf'
+        sssd_conf.write_text("[domain/empresa.local]\nad_domain = empresa.local\n")
+        files = {'/etc/sssd/sssd.conf': str(sssd_conf)}
+        calls = []
+        
+        def fake_check_output(cmd, *args, **kwargs):
+            calls.append(cmd)
+            raise FileNotFoundError(cmd)
+        
+        monkeypatch.setattr('collectors.domain_collector.os.path.exists', lambda path: path in files)
+        monkeypatch.setattr(
+            'collectors.domain_collector.open',
+            lambda path, *args, **kwargs: open(files[path], *args, **kwargs),
+            raising=False
+        )
+        monkeypatch.setattr('collectors.domain_collector.subprocess.check_output', fake_check_output)
+        
+        info = DomainCollector().get_linux_domain_info()
+        
+        assert info['is_domain_joined'] is True
+        assert info['domain_controller'] == 'empresa.local'
+        assert not any('sssd' in str(cmd) for cmd in calls)
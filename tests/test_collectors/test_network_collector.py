@@ -33,3 +33,37 @@ class TestNetworkCollector:
         
         # Todo sistema tiene al menos una interfaz de red
         assert 'interfaces' in data or 'network_interfaces' in data
+    
+    def test_parse_ip_command(self):
+        """Test: Parsear la salida de 'ip address'"""
+        output = (
+            "1: lo: <LOOPBACK,UP> mtu 65536 state UNKNOWN\n"
+            "    inet 127.0.0.1/8 scope host lo\n"
+            "2: eth0: <BROADCAST,UP> mtu 1500 state UP\n"
+            "    link/ether 52:54:00:12:34:56 brd ff:ff:ff:ff:ff:ff\n"
+            "    inet 192.168.1.10/24 brd 192.168.1.255 scope global eth0\n"
+            "    inet6 fe80::5054:ff:fe12:3456/64 scope link\n"
+        )
+        
+        interfaces = NetworkCollector()._parse_ip_command(output)
+        eth0 = next(iface for iface in interfaces if iface['name'] == 'eth0')
+        
+        assert eth0['status'] == 'Up'
+        assert eth0['mac_address'] == '52:54:00:12:34:56'
+        assert eth0['ipv4_address'] == '192.168.1.10'
+        assert eth0['ipv4_subnet'] == '24'
+        assert eth0['ipv6_address'] == 'fe80::5054:ff:fe12:3456'
+    
+    def test_parse_ifconfig(self):
+        """Test: Parsear la salida de 'ifconfig'"""
+        output = (
+            "en0: flags=8863<UP,BROADCAST,RUNNING> mtu 1500\n"
+            "\tether a4:83:e7:00:11:22\n"
+            "\tinet 10.0.0.5 netmask 0xffffff00 broadcast 10.0.0.255\n"
+        )
+        
+        interfaces = NetworkCollector()._parse_ifconfig(output)
+        
+        assert interfaces[0]['name'] == 'en0'
+        assert interfaces[0]['mac_address'] == 'a4:83:e7:00:11:22'
+        assert interfaces[0]['ipv4_address'] == '10.0.0.5'
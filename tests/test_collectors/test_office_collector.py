@@ -4,6 +4,8 @@
 Tests para OfficeCollector
 """
 
+import os
+import subprocess
 import pytest
 from collectors.office_collector import OfficeCollector
 
@@ -26,3 +28,24 @@ class TestOfficeCollector:
         assert isinstance(data, dict)
         # Verificar estructura básica
         assert len(data) > 0
+    
+    def test_macos_detection_without_subprocess(self, tmp_path, monkeypatch):
+        """Test: Las apps de Office en macOS se detectan sin lanzar 'test -d'"""
+        real_isdir = os.path.isdir
+        monkeypatch.setattr(
+            'collectors.office_collector.os.path.isdir',
+            lambda path: path == '/Applications/Microsoft Excel.app' or real_isdir(path)
+        )
+        
+        def fake_run(cmd, **kwargs):
+            assert cmd[0] == 'defaults'
+            return subprocess.CompletedProcess(cmd, 0, stdout='16.80\n', stderr='')
+        
+        monkeypatch.setattr('collectors.office_collector.subprocess.run', fake_run)
+        monkeypatch.setenv('HOME', str(tmp_path))
+        
+        data = OfficeCollector()._collect_macos()
+        
+        assert data['installed_apps'] == ['Excel']
+        assert data['office_version'] == '16.80'
+        assert data['office_edition'] == 'Microsoft 365'
@@ -158,3 +158,6 @@ class TestSoftwareCollector:
         
         # Comandos que deberían existir en cualquier sistema
         assert collector._command_exists("ls") or collector._command_exists("dir")
+        
+        # Un comando inexistente ya no se reporta como disponible
+        assert collector._command_exists("comando-que-no-existe-xyz") is False
@@ -0,0 +1,104 @@
+# tests/test_utils/test_backup_manager.py
+
+"""
+Tests para BackupManager
+"""
+
+import os
+import pytest
+from utils.backup_manager import BackupManager, _cdc_chunks
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    """Directorio de configuración de ejemplo"""
+    config = tmp_path / 'config'
+    config.mkdir()
+    (config / 'agent.ini').write_text('[agent]\nid = 1\n' * 500)
+    (config / 'logging.yaml').write_bytes(os.urandom(200 * 1024))
+    return config
+
+
+@pytest.mark.unit
+class TestBackupManager:
+    """Suite de tests para BackupManager"""
+
+    def test_cdc_chunks_roundtrip(self):
+        """Test: Los chunks reconstruyen los datos originales"""
+        data = os.urandom(300 * 1024)
+        chunks = list(_cdc_chunks(data))
+
+        assert b''.join(chunks) == data
+        assert len(chunks) > 1
+
+    def test_backup_config_dedup(self, tmp_path, config_dir):
+        """Test: Un segundo backup sin cambios no agrega chunks"""
+        backup_mgr = BackupManager(backup_dir=str(tmp_path / 'backup'))
+
+        backup_mgr.backup_config(str(config_dir))
+        chunks_before = set(os.listdir(backup_mgr.chunks_dir))
+        backup_mgr.create_dedup_backup(
+            [str(p) for p in config_dir.iterdir()], 'config_backup_second'
+        )
+
+        assert set(os.listdir(backup_mgr.chunks_dir)) == chunks_before
+
+    def test_restore_dedup_backup(self, tmp_path, config_dir):
+        """Test: Restaurar un backup deduplicado"""
+        backup_mgr = BackupManager(backup_dir=str(tmp_path / 'backup'))
+        source = config_dir / 'logging.yaml'
+        backup_mgr.create_dedup_backup([str(source)], 'restore_test')
+
+        restore_dir = tmp_path / 'restore'
+        assert backup_mgr.restore_backup('restore_test', str(restore_dir)) is True
+
+        restored = restore_dir / source.relative_to(source.anchor)
+        assert restored.read_bytes() == source.read_bytes()
+
+    def test_list_backups_dedup(self, tmp_path, config_dir):
+        """Test: Listar backups deduplicados"""
+        backup_mgr = BackupManager(backup_dir=str(tmp_path / 'backup'))
+        backup_mgr.backup_config(str(config_dir))
+
+        backups = backup_mgr.list_backups()
+
+        assert len(backups) == 1
+        assert backups[0]['type'] == 'dedup'
+        assert len(backups[0]['files']) == 2
+        assert backups[0]['physical_mb'] <= backups[0]['size_mb']
+
+    def test_cleanup_removes_unreferenced_chunks(self, tmp_path, config_dir):
+        """Test: El cleanup elimina chunks sin referencias"""
+        backup_mgr = BackupManager(backup_dir=str(tmp_path / 'backup'))
+        backup_mgr.max_backups = 1
+        big_file = config_dir / 'logging.yaml'
+
+        backup_mgr.create_dedup_backup([str(big_file)], 'backup_1')
+        big_file.write_bytes(os.urandom(200 * 1024))
+        backup_mgr.create_dedup_backup([str(big_file)], 'backup_2')
+
+        assert backup_mgr.cleanup_old_backups() == 1
+        remaining = backup_mgr.list_backups()
+        assert [b['name'] for b in remaining] == ['backup_2']
+        assert backup_mgr.restore_backup('backup_2', str(tmp_path / 'restore'))
+    
+    def test_gc_skips_recent_and_temporary_chunks(self, tmp_path, config_dir):
+        """Test: El GC respeta chunks recientes y temporales de un backup en curso"""
+        backup_mgr = BackupManager(backup_dir=str(tmp_path / 'backup'))
+        backup_mgr.create_dedup_backup([str(config_dir / 'agent.ini')], 'base')
+        chunks_dir = backup_mgr.chunks_dir
+        
+        orphan = chunks_dir / ('0' * 32 + '.chunk')
+        in_flight = chunks_dir / ('1' * 32 + '.chunk.123.456.tmp')
+        orphan.write_bytes(b'huerfano')
+        in_flight.write_bytes(b'en curso')
+        
+        assert backup_mgr._gc_chunks() == 0
+        assert orphan.exists() and in_flight.exists()
+        
+        for path in (orphan, in_flight):
+            os.utime(path, (0, 0))
+        
+        assert backup_mgr._gc_chunks() == 2
+        assert backup_mgr._gc_chunks() == 0
+        assert backup_mgr.restore_backup('base', str(tmp_path / 'restore'))
@@ -0,0 +1,176 @@
+# tests/test_utils/test_cache_manager.py
+
+"""
+Tests para CacheManager
+"""
+
+import pytest
+from utils.cache_manager import CacheManager
+
+
+@pytest.mark.unit
+class TestCacheManager:
+    """Suite de tests para CacheManager"""
+
+    def test_set_and_get(self, tmp_path):
+        """Test: Guardar y leer datos"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+
+        assert cache.set('inventory', {'hardware': 'data'}) is True
+        assert cache.get('inventory') == {'hardware': 'data'}
+        assert cache.get('missing') is None
+
+    def test_cleanup_expired(self, tmp_path):
+        """Test: Limpiar solo las entradas expiradas"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('expired', {'value': 1}, ttl_hours=-1)
+        cache.set('valid', {'value': 2}, ttl_hours=1)
+
+        assert cache.cleanup_expired() == 1
+        assert [k['key'] for k in cache.list_keys()] == ['valid']
+
+    def test_index_persists_between_instances(self, tmp_path):
+        """Test: El índice se reutiliza en una nueva instancia"""
+        CacheManager(cache_dir=str(tmp_path)).set('test_data', {'value': 123})
+
+        cache = CacheManager(cache_dir=str(tmp_path))
+        keys = cache.list_keys()
+
+        assert len(keys) == 1
+        assert keys[0]['key'] == 'test_data'
+        assert keys[0]['expired'] is False
+
+    def test_index_rebuilt_from_files(self, tmp_path):
+        """Test: Reconstruir el índice si no existe"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('test_data', {'value': 123})
+        cache.flush()
+        (tmp_path / CacheManager.INDEX_FILE).unlink()
+
+        cache = CacheManager(cache_dir=str(tmp_path))
+
+        assert cache.get_stats()['total_entries'] == 1
+
+    def test_stats_hits_and_misses(self, tmp_path):
+        """Test: Contadores de hits/misses"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('test_data', {'value': 123})
+        cache.get('test_data')
+        cache.get('missing')
+
+        stats = cache.get_stats()
+
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_ratio'] == 0.5
+
+    def test_gds_eviction_prefers_large_entries(self, tmp_path):
+        """Test: GreedyDualSize desaloja primero las entradas grandes"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('small', {'payload': 'x' * 100})
+        cache.set('big', {'payload': 'x' * 4096})
+        cache.max_size_mb = 3 / 1024  # ~3 KB
+        cache.set('newest', {'payload': 'x' * 100})
+
+        keys = [k['key'] for k in cache.list_keys()]
+
+        assert keys == ['small', 'newest']
+        assert cache.get_stats()['gds_evictions'] == 1
+
+    def test_get_many_and_delete_many(self, tmp_path):
+        """Test: API por lotes"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        assert cache.get_many(['a', 'b', 'missing']) == {'a': 1, 'b': 2}
+        assert cache.delete_many(['a', 'b', 'missing']) == 2
+        assert cache.list_keys() == []
+
+    def test_heaps_compacted_on_rewrites(self, tmp_path):
+        """Test: Reescribir la misma clave no hace crecer los heaps sin límite"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+
+        for i in range(500):
+            cache.set('inventory', {'value': i})
+            cache.get('inventory')
+
+        assert len(cache._expiry_heap) <= CacheManager.HEAP_COMPACT_MIN
+        assert len(cache._credit_heap) <= CacheManager.HEAP_COMPACT_MIN
+        assert cache.get('inventory') == {'value': 499}
+        assert cache.cleanup_expired() == 0
+
+    def test_stats_persist_after_flush(self, tmp_path):
+        """Test: Los contadores de get() sobreviven a una nueva instancia"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('test_data', {'value': 123})
+        cache.get('test_data')
+        cache.get('missing')
+        cache.flush()
+
+        stats = CacheManager(cache_dir=str(tmp_path)).get_stats()
+
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_index_flushed_periodically(self, tmp_path):
+        """Test: set() y get() no reescriben el índice hasta STATS_FLUSH_EVERY cambios"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        index_file = tmp_path / CacheManager.INDEX_FILE
+        cache.set('test_data', {'value': 123})
+
+        assert not index_file.exists()
+
+        for _ in range(CacheManager.STATS_FLUSH_EVERY - 1):
+            cache.get('test_data')
+
+        assert index_file.exists()
+        assert CacheManager(cache_dir=str(tmp_path)).get_stats()['hits'] == CacheManager.STATS_FLUSH_EVERY - 1
+
+    def test_concurrent_instances_merge_index(self, tmp_path):
+        """Test: Dos instancias sobre el mismo directorio no pierden entradas"""
+        a = CacheManager(cache_dir=str(tmp_path))
+        b = CacheManager(cache_dir=str(tmp_path))
+
+        a.set('k1', 1)
+        a.flush()
+        b.clear()
+        a.set('k2', 2)
+        a.flush()
+
+        assert [k['key'] for k in CacheManager(cache_dir=str(tmp_path)).list_keys()] == ['k2']
+
+        b.set('k3', 3)
+        b.flush()
+        a.set('k4', 4)
+        a.flush()
+
+        keys = {k['key'] for k in CacheManager(cache_dir=str(tmp_path)).list_keys()}
+        assert keys == {'k2', 'k3', 'k4'}
+
+    def test_unflushed_files_reconciled(self, tmp_path):
+        """Test: Archivos sin entrada en el índice se registran y se limpian"""
+        a = CacheManager(cache_dir=str(tmp_path))
+        b = CacheManager(cache_dir=str(tmp_path))
+        a.set('valid', 1)
+        a.flush()
+        b.set('expired', 2, ttl_hours=-1)  # Sin flush: no llega al índice
+
+        cache = CacheManager(cache_dir=str(tmp_path))
+
+        assert cache.cleanup_expired() == 1
+        assert [k['key'] for k in cache.list_keys()] == ['valid']
+
+    def test_stats_merged_between_instances(self, tmp_path):
+        """Test: Los contadores de varias instancias se suman en el índice"""
+        a = CacheManager(cache_dir=str(tmp_path))
+        a.set('k', 1)
+        a.flush()
+        b = CacheManager(cache_dir=str(tmp_path))
+
+        a.get('k')
+        a.flush()
+        b.get('k')
+        b.flush()
+
+        assert CacheManager(cache_dir=str(tmp_path)).get_stats()['hits'] == 2
@@ -0,0 +1,66 @@
+# tests/test_utils/test_powershell_host.py
+
+"""
+Tests para PowerShellHost
+"""
+
+import sys
+import pytest
+from utils.powershell_host import PowerShellHost
+
+
+# Shell falso: decodifica el script de cada línea, lo "ejecuta" y responde
+# con el mismo protocolo que PowerShell (salida + centinela)
+FAKE_SHELL = r'''
+import base64, re, sys, time
+for line in sys.stdin:
+    if line.strip() == 'exit':
+        break
+    script = base64.b64decode(re.search(r"FromBase64String\('([^']*)'\)", line).group(1)).decode()
+    if script.startswith('sleep'):
+        time.sleep(float(script.split()[1]))
+    print(script)
+    print(re.search(r"; '([^']*)'$", line.strip()).group(1))
+    sys.stdout.flush()
+'''
+
+
+@pytest.fixture
+def host():
+    """PowerShellHost sobre el shell falso"""
+    ps_host = PowerShellHost(command=[sys.executable, '-u', '-c', FAKE_SHELL])
+    yield ps_host
+    ps_host.close()
+
+
+@pytest.mark.unit
+class TestPowerShellHost:
+    """Suite de tests para PowerShellHost"""
+
+    def test_run_reuses_process(self, host):
+        """Test: Varios scripts se ejecutan en el mismo proceso"""
+        assert host.run('Get-Date') == 'Get-Date'
+        pid = host._proc.pid
+
+        assert host.run("Write-Output 'a'\nWrite-Output \"b\"") == "Write-Output 'a'\nWrite-Output \"b\""
+        assert host._proc.pid == pid
+
+    def test_timeout_restarts_process(self, host):
+        """Test: Un script colgado se descarta y el siguiente arranca otro proceso"""
+        assert host.run('sleep 5', timeout=0.5) is None
+        assert host._proc is None
+
+        assert host.run('Get-Date') == 'Get-Date'
+
+    def test_missing_powershell(self):
+        """Test: Sin PowerShell run() devuelve None"""
+        assert PowerShellHost(command=['no-such-powershell']).run('Get-Date') is None
+
+    def test_close_sends_exit(self, host):
+        """Test: close() termina el proceso"""
+        host.run('Get-Date')
+        proc = host._proc
+
+        host.close()
+
+        assert proc.poll() == 0